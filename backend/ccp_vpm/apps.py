@@ -2,3 +2,14 @@ from django.apps import AppConfig
 class CcpVpmConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ccp_vpm"
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from . import cache
+        from .models import Item
+        from .signals import items_reseeded
+
+        # correct_index e item sets cacheados por proceso: se descartan si cambia cualquier Item
+        post_save.connect(cache.invalidate, sender=Item, dispatch_uid="ccp_vpm_item_cache_save")
+        post_delete.connect(cache.invalidate, sender=Item, dispatch_uid="ccp_vpm_item_cache_delete")
+        items_reseeded.connect(cache.invalidate, dispatch_uid="ccp_vpm_item_cache_reseed")
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Sum
+
+from .models import Item
+
+# Items que recibe cada sesión / UI ghost
+ITEM_SET_SIZE = 12
+ITEM_SET_FIELDS = ("id", "difficulty_level", "stimulus", "options", "params")
+
+# Igual que el filtro json_script: JSON seguro dentro de <script>
+_SCRIPT_ESCAPES = {ord(">"): "\\u003E", ord("<"): "\\u003C", ord("&"): "\\u0026"}
+
+_lock = threading.Lock()
+
+# item_id -> correct_index (los items apenas cambian; se invalida por señales de Item)
+_correct_index = None
+
+# Versión local (sube con cada invalidación) + firma de la tabla para detectar
+# cambios hechos desde otros procesos (p. ej. seed_vpm_demo) o sin señales
+# (QuerySet.update), comprobada cada TTL por correct_index_map e item_set
+_version = 0
+_item_sets = {}       # submodality -> ItemSet
+_signature = None
+_checked_at = 0.0
+
+
+class ItemSet:
+    """Items de una submodalidad ya serializados (API y <script>), con su versión."""
+    __slots__ = ("version", "items", "json", "script_json")
+
+    def __init__(self, version, items):
+        self.version = version
+        self.items = items
+        self.json = json.dumps(items)
+        self.script_json = self.json.translate(_SCRIPT_ESCAPES)
+
+
+def correct_index_map(item_ids=()):
+    """
+    Devuelve {item_id: correct_index} para los ids pedidos (todos si no se pasan).
+    Carga el mapa completo una vez; los ids que falten se buscan con in_bulk.
+    """
+    global _correct_index
+    with _lock:
+        _check_signature_locked()
+        if _correct_index is None:
+            _correct_index = dict(Item.objects.values_list("id", "correct_index"))
+        cache = _correct_index
+        missing = [i for i in item_ids if i not in cache]
+        if missing:
+            for pk, item in Item.objects.in_bulk(missing).items():
+                cache[pk] = item.correct_index
+    if not item_ids:
+        return dict(cache)
+    return {i: cache[i] for i in item_ids if i in cache}
+
+
+def _ttl() -> float:
+    return float(getattr(settings, "CCP_VPM_ITEMSET_TTL_S", 30))
+
+
+def _db_signature():
+    # checksum: cambiar el correct_index de un item (aunque sea in situ) la altera
+    agg = Item.objects.order_by().aggregate(
+        n=Count("id"), last=Max("id"), checksum=Sum(F("id") * (F("correct_index") + 1)),
+    )
+    return agg["n"], agg["last"], agg["checksum"]
+
+
+def _check_signature_locked():
+    """Cada TTL compara la firma de la tabla; si cambió, descarta lo cacheado."""
+    global _signature, _checked_at
+    now = time.monotonic()
+    cached = _item_sets or _correct_index is not None
+    if cached and now - _checked_at >= _ttl():
+        _checked_at = now
+        if _db_signature() != _signature:
+            _drop_locked()
+            cached = False
+    if not cached:
+        _signature, _checked_at = _db_signature(), now
+
+
+def item_set(submodality) -> ItemSet:
+    """Conjunto precompilado de items de una submodalidad; solo consulta la DB si no está en caché."""
+    with _lock:
+        _check_signature_locked()
+        cached = _item_sets.get(submodality)
+        if cached is not None:
+            return cached
+        items = list(
+            Item.objects.filter(submodality=submodality)
+            .order_by("difficulty_level")[:ITEM_SET_SIZE]
+            .values(*ITEM_SET_FIELDS)
+        )
+        cached = _item_sets[submodality] = ItemSet(_version, items)
+        return cached
+
+
+def version() -> int:
+    return _version
+
+
+def _drop_locked():
+    global _correct_index, _version
+    _correct_index = None
+    _item_sets.clear()
+    _version += 1
+
+
+def invalidate(**kwargs):
+    """Descarta correct_index e item sets (receptor de señales de Item y de seed_vpm_demo)."""
+    with _lock:
+        _drop_locked()
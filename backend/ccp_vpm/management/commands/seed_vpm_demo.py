@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from ccp_vpm.models import Item, VpmSubmodality
+from ccp_vpm.signals import items_reseeded
 
 class Command(BaseCommand):
     help = "Carga items demo para VPM (Visual Simbólica e Icónica)"
@@ -37,4 +38,5 @@ class Command(BaseCommand):
                 params=params
             )
 
+        items_reseeded.send(sender=self.__class__)
         self.stdout.write(self.style.SUCCESS("Items demo cargados"))
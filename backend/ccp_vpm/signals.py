@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Se emite tras recargar el banco de items en bloque (p. ej. seed_vpm_demo)
+items_reseeded = Signal()
@@ -1,9 +1,14 @@
 import json, statistics
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
 from django.shortcuts import render, get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
+from .cache import correct_index_map, item_set
 from .models import Session, Item, Trial, VpmSubmodality
 
+TRIAL_FIELDS = ["item_id", "started_ms", "responded_ms", "chosen_index"]
+TRIALS_BATCH_MAX = 500
+
 def _require_fields(data, fields):
     missing = [f for f in fields if f not in data]
     if missing:
@@ -26,9 +31,10 @@ def create_session(request):
         user_id=data.get("user_id"),
         meta=data.get("meta", {})
     )
-    items = list(Item.objects.filter(submodality=data["vpm_mode"]).order_by("difficulty_level")[:12]
-                 .values("id","difficulty_level","stimulus","options","params"))
-    return JsonResponse({"session_id": sess.id, "items": items})
+    # Items precompilados (JSON ya serializado) desde el caché por submodalidad
+    items_json = item_set(data["vpm_mode"]).json
+    return HttpResponse('{"session_id": %d, "items": %s}' % (sess.id, items_json),
+                        content_type="application/json")
 
 @csrf_exempt
 def post_trial(request):
@@ -54,6 +60,65 @@ def post_trial(request):
     )
     return JsonResponse({"ok": True, "is_correct": is_correct, "response_time_ms": rt})
 
+@csrf_exempt
+def post_trials_batch(request):
+    """
+    Todos los ensayos de un bloque en una petición:
+    {"session_id": 1, "trials": [{"item_id", "started_ms", "responded_ms", "chosen_index", "client_meta"?}, ...]}
+    (cada ensayo puede traer su propio session_id). Se guardan todos o ninguno.
+    Consultas constantes por bloque: sesiones con in_bulk, correct_index del caché, bulk_create.
+    """
+    if request.method != "POST":
+        return HttpResponseBadRequest("POST only")
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return HttpResponseBadRequest("Invalid JSON")
+    trials = data.get("trials") if isinstance(data, dict) else None
+    if not isinstance(trials, list) or not trials:
+        return HttpResponseBadRequest("Missing fields: trials")
+    if len(trials) > TRIALS_BATCH_MAX:
+        return HttpResponseBadRequest(f"Too many trials (max {TRIALS_BATCH_MAX})")
+
+    parsed = []
+    for i, t in enumerate(trials):
+        if not isinstance(t, dict):
+            return HttpResponseBadRequest(f"trials[{i}]: object expected")
+        sid = t.get("session_id", data.get("session_id"))
+        err = _require_fields(t, TRIAL_FIELDS) or (None if sid is not None else "Missing fields: session_id")
+        if err:
+            return HttpResponseBadRequest(f"trials[{i}]: {err}")
+        try:
+            parsed.append((int(sid), int(t["item_id"]), int(t["started_ms"]), int(t["responded_ms"]),
+                           int(t["chosen_index"]), t.get("client_meta", {})))
+        except (TypeError, ValueError) as e:
+            return HttpResponseBadRequest(f"trials[{i}]: {e}")
+
+    session_ids = {p[0] for p in parsed}
+    item_ids = sorted({p[1] for p in parsed})
+    sessions = Session.objects.in_bulk(session_ids)
+    correct = correct_index_map(item_ids)
+    missing_sessions = sorted(session_ids - sessions.keys())
+    missing_items = [i for i in item_ids if i not in correct]
+    if missing_sessions or missing_items:
+        return JsonResponse({"ok": False, "error": "Not found",
+                             "missing_sessions": missing_sessions, "missing_items": missing_items}, status=404)
+
+    objs, results = [], []
+    for sid, item_id, started, responded, chosen, meta in parsed:
+        rt = responded - started
+        is_correct = chosen == correct[item_id]
+        objs.append(Trial(
+            session_id=sid, item_id=item_id,
+            started_ms=started, responded_ms=responded,
+            response_time_ms=rt, chosen_index=chosen,
+            is_correct=is_correct, client_meta=meta,
+        ))
+        results.append({"item_id": item_id, "is_correct": is_correct, "response_time_ms": rt})
+    with transaction.atomic():
+        Trial.objects.bulk_create(objs)
+    return JsonResponse({"ok": True, "n": len(results), "results": results})
+
 def session_score(request, session_id: int):
     sess = get_object_or_404(Session, id=session_id)
     trials = list(Trial.objects.filter(session=sess).values("is_correct","response_time_ms","item__difficulty_level"))
@@ -83,12 +148,10 @@ def session_score(request, session_id: int):
 
 def ui_code_ghost(request, session_id:int):
     sess = get_object_or_404(Session, id=session_id, vpm_mode=VpmSubmodality.VIS_S)
-    items = Item.objects.filter(submodality=VpmSubmodality.VIS_S).order_by("difficulty_level")[:12]
-    items = list(items.values("id","difficulty_level","stimulus","options","params"))
-    return render(request, "ccp_vpm/code_ghost.html", {"session_id": session_id, "items": items})
+    items_json = item_set(VpmSubmodality.VIS_S).script_json
+    return render(request, "ccp_vpm/code_ghost.html", {"session_id": session_id, "items_json": items_json})
 
 def ui_scene_ghost(request, session_id:int):
     sess = get_object_or_404(Session, id=session_id, vpm_mode=VpmSubmodality.VIS_I)
-    items = Item.objects.filter(submodality=VpmSubmodality.VIS_I).order_by("difficulty_level")[:12]
-    items = list(items.values("id","difficulty_level","stimulus","options","params"))
-    return render(request, "ccp_vpm/scene_ghost.html", {"session_id": session_id, "items": items})
+    items_json = item_set(VpmSubmodality.VIS_I).script_json
+    return render(request, "ccp_vpm/scene_ghost.html", {"session_id": session_id, "items_json": items_json})
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from runtime import rollup
+from talento_core import core_schema
+
+
+class Command(BaseCommand):
+    help = "Reconstruye tlt_respuesta_rollup desde tlt_respuesta (todo o una sesión)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sesion-id", type=int, default=None,
+                            help="Solo esta sesión (por defecto: todas).")
+
+    def handle(self, *args, **options):
+        core_schema.invalidate()
+        if not core_schema.table_exists(rollup.ROLLUP_TABLE):
+            raise CommandError(f"No existe {rollup.ROLLUP_TABLE}: ejecuta 'manage.py migrate runtime'.")
+        groups = rollup.rebuild(options["sesion_id"])
+        self.stdout.write(self.style.SUCCESS(f"Rollup reconstruido: {groups} grupo(s)."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from runtime import rollup
+from talento_core import core_schema
+
+
+class Command(BaseCommand):
+    help = "Compara tlt_sesion_summary (y tlt_sesion_ccp_summary) con tlt_respuesta y corrige las sesiones que difieran."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sesion-id", type=int, default=None,
+                            help="Solo esta sesión (por defecto: todas).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Solo informa de las diferencias; no corrige.")
+
+    def handle(self, *args, **options):
+        core_schema.invalidate()
+        if not core_schema.table_exists(rollup.SUMMARY_TABLE):
+            raise CommandError(f"No existe {rollup.SUMMARY_TABLE}: ejecuta 'manage.py migrate runtime'.")
+        drift = rollup.summary_drift(options["sesion_id"])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Resumen de sesiones al día."))
+            return
+        shown = ", ".join(str(s) for s in drift[:20]) + (" …" if len(drift) > 20 else "")
+        self.stdout.write(self.style.WARNING(f"{len(drift)} sesión(es) con diferencias: {shown}"))
+        if options["dry_run"]:
+            return
+        fixed = rollup.reconcile_summary(drift)
+        self.stdout.write(self.style.SUCCESS(f"Resumen recalculado para {fixed} sesión(es)."))
@@ -0,0 +1,192 @@
+# Rollup incremental de tlt_respuesta por (sesion_id, ccp_code, ejer_code, día).
+#
+# Los triggers lo mantienen en cada INSERT/UPDATE/DELETE (sea quien sea el que
+# escriba: API, write-behind, backfill, ingesta), así que el panel agrega
+# grupos en lugar de respuestas. Claves NULL se guardan como '' (la PK no admite
+# NULL de forma útil). Reconstrucción completa: manage.py rebuild_rollup.
+
+from django.db import migrations
+
+# Los triggers suman correcta tal cual: desde 0010 es 0/1 estricto (CHECK), y
+# 0015 recrea con esta versión los triggers de las bases ya migradas
+_OK = "{row}.correcta"
+
+# El llenado inicial lee filas anteriores al CHECK (tipos mezclados): mismo
+# criterio que talento_core.correcta (correcta_sql)
+_OK_LEGACY = (
+    "CASE WHEN typeof({row}.correcta) IN ('integer', 'real') THEN ({row}.correcta != 0) "
+    "WHEN LOWER(TRIM({row}.correcta)) IN ('1', 's', 'si', 'sÍ', 'sí', 't', 'true', 'y', 'yes') THEN 1 ELSE 0 END"
+)
+
+_KEY = """sesion_id = {row}.sesion_id
+      AND ccp_code  = COALESCE({row}.ccp_code, '')
+      AND ejer_code = COALESCE({row}.ejer_code, '')
+      AND day       = COALESCE(date({row}.created_at), '')"""
+
+_ADD = f"""
+    INSERT INTO tlt_respuesta_rollup
+        (sesion_id, ccp_code, ejer_code, day, n, n_ok, tr_sum, n_tr, first_ts, last_ts)
+    VALUES (NEW.sesion_id, COALESCE(NEW.ccp_code, ''), COALESCE(NEW.ejer_code, ''),
+            COALESCE(date(NEW.created_at), ''), 1, {_OK.format(row="NEW")},
+            COALESCE(NEW.tr_ms, 0), NEW.tr_ms IS NOT NULL, NEW.created_at, NEW.created_at)
+    ON CONFLICT (sesion_id, ccp_code, ejer_code, day) DO UPDATE SET
+        n        = n + 1,
+        n_ok     = n_ok + excluded.n_ok,
+        tr_sum   = tr_sum + excluded.tr_sum,
+        n_tr     = n_tr + excluded.n_tr,
+        first_ts = CASE WHEN first_ts IS NULL OR excluded.first_ts < first_ts THEN excluded.first_ts ELSE first_ts END,
+        last_ts  = CASE WHEN last_ts IS NULL OR excluded.last_ts > last_ts THEN excluded.last_ts ELSE last_ts END;
+"""
+
+# Al quitar una fila: se descuenta; si el grupo queda vacío se borra, y si la
+# fila era el extremo (first/last) se recalcula con las filas de esa sesión.
+_REMOVE = f"""
+    UPDATE tlt_respuesta_rollup SET
+        n      = n - 1,
+        n_ok   = n_ok - {_OK.format(row="OLD")},
+        tr_sum = tr_sum - COALESCE(OLD.tr_ms, 0),
+        n_tr   = n_tr - (OLD.tr_ms IS NOT NULL)
+    WHERE {_KEY.format(row="OLD")};
+    DELETE FROM tlt_respuesta_rollup WHERE {_KEY.format(row="OLD")} AND n <= 0;
+    UPDATE tlt_respuesta_rollup SET
+        first_ts = (SELECT MIN(r.created_at) FROM tlt_respuesta r
+                    WHERE r.sesion_id = OLD.sesion_id
+                      AND COALESCE(r.ccp_code, '') = COALESCE(OLD.ccp_code, '')
+                      AND COALESCE(r.ejer_code, '') = COALESCE(OLD.ejer_code, '')
+                      AND COALESCE(date(r.created_at), '') = COALESCE(date(OLD.created_at), '')),
+        last_ts  = (SELECT MAX(r.created_at) FROM tlt_respuesta r
+                    WHERE r.sesion_id = OLD.sesion_id
+                      AND COALESCE(r.ccp_code, '') = COALESCE(OLD.ccp_code, '')
+                      AND COALESCE(r.ejer_code, '') = COALESCE(OLD.ejer_code, '')
+                      AND COALESCE(date(r.created_at), '') = COALESCE(date(OLD.created_at), ''))
+    WHERE {_KEY.format(row="OLD")} AND OLD.created_at IN (first_ts, last_ts);
+"""
+
+SQL_TABLE = """
+CREATE TABLE IF NOT EXISTS tlt_respuesta_rollup (
+    sesion_id INTEGER NOT NULL,
+    ccp_code  TEXT    NOT NULL DEFAULT '',
+    ejer_code TEXT    NOT NULL DEFAULT '',
+    day       TEXT    NOT NULL DEFAULT '',   -- date(created_at)
+    n         INTEGER NOT NULL DEFAULT 0,
+    n_ok      INTEGER NOT NULL DEFAULT 0,
+    tr_sum    INTEGER NOT NULL DEFAULT 0,    -- SUM(tr_ms) sin NULL
+    n_tr      INTEGER NOT NULL DEFAULT 0,    -- filas con tr_ms (para AVG)
+    first_ts  DATETIME,
+    last_ts   DATETIME,
+    PRIMARY KEY (sesion_id, ccp_code, ejer_code, day)
+) WITHOUT ROWID;
+"""
+
+SQL_FILL = f"""
+INSERT INTO tlt_respuesta_rollup
+    (sesion_id, ccp_code, ejer_code, day, n, n_ok, tr_sum, n_tr, first_ts, last_ts)
+SELECT sesion_id, COALESCE(ccp_code, ''), COALESCE(ejer_code, ''), COALESCE(date(created_at), ''),
+       COUNT(*), SUM({_OK_LEGACY.format(row="tlt_respuesta")}), COALESCE(SUM(tr_ms), 0), COUNT(tr_ms),
+       MIN(created_at), MAX(created_at)
+FROM tlt_respuesta
+GROUP BY 1, 2, 3, 4;
+"""
+
+# Un trigger por sentencia (RunSQL con lista: sin partir los BEGIN ... END)
+SQL_TRIGGERS = [
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_rollup_ins
+AFTER INSERT ON tlt_respuesta
+BEGIN
+{_ADD}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_rollup_del
+AFTER DELETE ON tlt_respuesta
+BEGIN
+{_REMOVE}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_rollup_upd
+AFTER UPDATE OF sesion_id, ccp_code, ejer_code, correcta, tr_ms, created_at ON tlt_respuesta
+BEGIN
+{_REMOVE}
+{_ADD}
+END
+""",
+]
+
+SQL_DROP = [
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_rollup_ins",
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_rollup_del",
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_rollup_upd",
+    "DROP TABLE IF EXISTS tlt_respuesta_rollup",
+]
+
+# Las vistas del panel pasan a leer del rollup ('' vuelve a ser NULL)
+SQL_VIEWS = """
+DROP VIEW IF EXISTS v_panel_metrics;
+CREATE VIEW v_panel_metrics AS
+SELECT
+    sesion_id,
+    NULLIF(ccp_code, '')                          AS ccp_code,
+    SUM(n)                                        AS n,
+    SUM(n_ok)                                     AS aciertos,
+    100.0 * SUM(n_ok) / SUM(n)                    AS acierto_pct,
+    1.0 * SUM(tr_sum) / NULLIF(SUM(n_tr), 0)      AS tr_ms_avg,
+    MIN(first_ts)                                 AS first_ts,
+    MAX(last_ts)                                  AS last_ts
+FROM tlt_respuesta_rollup
+GROUP BY sesion_id, ccp_code;
+
+DROP VIEW IF EXISTS v_panel_metrics_session;
+CREATE VIEW v_panel_metrics_session AS
+SELECT
+    sesion_id,
+    SUM(n)                                        AS n,
+    SUM(n_ok)                                     AS aciertos,
+    100.0 * SUM(n_ok) / SUM(n)                    AS acierto_pct,
+    1.0 * SUM(tr_sum) / NULLIF(SUM(n_tr), 0)      AS tr_ms_avg,
+    MIN(first_ts)                                 AS first_ts,
+    MAX(last_ts)                                  AS last_ts
+FROM tlt_respuesta_rollup
+GROUP BY sesion_id;
+"""
+
+# Vuelta a las vistas de 0008 (sobre filas crudas)
+SQL_VIEWS_RAW = """
+DROP VIEW IF EXISTS v_panel_metrics;
+CREATE VIEW v_panel_metrics AS
+SELECT
+    sesion_id,
+    ccp_code,
+    COUNT(*)                                                   AS n,
+    SUM(CASE WHEN correcta IN (1, TRUE) THEN 1 ELSE 0 END)    AS aciertos,
+    100.0 * SUM(CASE WHEN correcta IN (1, TRUE) THEN 1 ELSE 0 END) / COUNT(*) AS acierto_pct,
+    AVG(tr_ms)                                                AS tr_ms_avg,
+    MIN(created_at)                                           AS first_ts,
+    MAX(created_at)                                           AS last_ts
+FROM tlt_respuesta
+GROUP BY sesion_id, ccp_code;
+
+DROP VIEW IF EXISTS v_panel_metrics_session;
+CREATE VIEW v_panel_metrics_session AS
+SELECT
+    sesion_id,
+    COUNT(*)                                                   AS n,
+    SUM(CASE WHEN correcta IN (1, TRUE) THEN 1 ELSE 0 END)    AS aciertos,
+    100.0 * SUM(CASE WHEN correcta IN (1, TRUE) THEN 1 ELSE 0 END) / COUNT(*) AS acierto_pct,
+    AVG(tr_ms)                                                AS tr_ms_avg,
+    MIN(created_at)                                           AS first_ts,
+    MAX(created_at)                                           AS last_ts
+FROM tlt_respuesta
+GROUP BY sesion_id;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("runtime", "0008_panel_metrics_views"),
+    ]
+    operations = [
+        migrations.RunSQL([SQL_TABLE, SQL_FILL, *SQL_TRIGGERS], reverse_sql=SQL_DROP),
+        migrations.RunSQL(SQL_VIEWS, reverse_sql=SQL_VIEWS_RAW),
+    ]
@@ -0,0 +1,115 @@
+# correcta pasa a ser 0/1 estricto: CHECK (correcta IN (0, 1)) y NOT NULL.
+#
+# Las rutas de ingesta guardaban tipos mezclados (1, '1', 't', 'true'...) y
+# cada agregado tenía que evaluar CASE WHEN correcta IN (...) fila a fila.
+# Con el valor normalizado basta SUM(correcta) / AVG(correcta), y el índice
+# cubriente de abajo resuelve los agregados de progreso sin tocar la tabla.
+#
+# SQLite no permite añadir un CHECK con ALTER TABLE: se reconstruye la tabla
+# (create / copy / drop / rename) conservando columnas extra, índices,
+# triggers (rollup de 0009) y vistas que la usan.
+
+import re
+
+from django.db import migrations
+
+TABLE = "tlt_respuesta"
+
+# Mismo criterio que la escritura (talento_core.correcta: correcta_sql);
+# lo que no se reconoce cuenta como fallo
+NORMALIZED = (
+    "CASE WHEN typeof(correcta) IN ('integer', 'real') THEN (correcta != 0) "
+    "WHEN LOWER(TRIM(correcta)) IN ('1', 's', 'si', 'sÍ', 'sí', 't', 'true', 'y', 'yes') THEN 1 ELSE 0 END"
+)
+
+STRICT_COLUMN = "correcta INTEGER NOT NULL DEFAULT 0 CHECK (correcta IN (0, 1))"
+LOOSE_COLUMN = "correcta INTEGER"
+
+
+COVERING_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_tlt_respuesta_progress "
+    "ON tlt_respuesta (sesion_id, ccp_code, ejer_code, created_at, correcta, tr_ms)"
+)
+
+
+def _replace_column(table_sql, column_sql):
+    # Definición de correcta: desde su nombre hasta la ',' o ')' de nivel 0
+    start = re.search(r"\bcorrecta\b", table_sql, re.IGNORECASE).start()
+    depth, end = 0, start
+    while end < len(table_sql):
+        ch = table_sql[end]
+        if ch == "(":
+            depth += 1
+        elif ch in ",)" and depth == 0:
+            break
+        elif ch == ")":
+            depth -= 1
+        end += 1
+    return table_sql[:start] + column_sql + table_sql[end:]
+
+
+def _rebuild(cur, column_sql):
+    cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=%s", [TABLE])
+    row = cur.fetchone()
+    if not row:
+        return  # sin tabla: core_schema la crea ya con el CHECK
+    table_sql = row[0]
+
+    # Dependencias que se pierden con el DROP: se guardan para recrearlas
+    cur.execute(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name=%s AND sql IS NOT NULL",
+        [TABLE],
+    )
+    dependents = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT name, sql FROM sqlite_master WHERE type='view'")
+    views = [(name, sql) for name, sql in cur.fetchall() if re.search(rf"\b{TABLE}\b", sql)]
+
+    cur.execute(f"PRAGMA table_info({TABLE})")
+    columns = [r[1] for r in cur.fetchall()]
+    select = ", ".join(NORMALIZED if c.lower() == "correcta" else c for c in columns)
+
+    # AUTOINCREMENT: no reutilizar ids ya emitidos (el DROP borra su contador)
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_sequence'")
+    seq = None
+    if cur.fetchone():
+        cur.execute("SELECT seq FROM sqlite_sequence WHERE name=%s", [TABLE])
+        seq = (cur.fetchone() or [None])[0]
+
+    new_sql = _replace_column(table_sql, column_sql)
+    new_sql = re.sub(rf"\b{TABLE}\b", f"{TABLE}__new", new_sql, count=1)
+
+    for name, _ in views:
+        cur.execute(f'DROP VIEW IF EXISTS "{name}"')
+    cur.execute(new_sql)
+    cur.execute(f"INSERT INTO {TABLE}__new ({', '.join(columns)}) SELECT {select} FROM {TABLE}")
+    cur.execute(f"DROP TABLE {TABLE}")
+    cur.execute(f"ALTER TABLE {TABLE}__new RENAME TO {TABLE}")
+    if seq is not None:
+        cur.execute("UPDATE sqlite_sequence SET seq=MAX(seq, %s) WHERE name=%s", [seq, TABLE])
+    for sql in dependents:
+        cur.execute(sql)
+    for _, sql in views:
+        cur.execute(sql)
+
+
+def forwards(apps, schema_editor):
+    with schema_editor.connection.cursor() as cur:
+        _rebuild(cur, STRICT_COLUMN)
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [TABLE])
+        if cur.fetchone():
+            cur.execute(COVERING_INDEX)
+
+
+def backwards(apps, schema_editor):
+    with schema_editor.connection.cursor() as cur:
+        cur.execute("DROP INDEX IF EXISTS idx_tlt_respuesta_progress")
+        _rebuild(cur, LOOSE_COLUMN)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("runtime", "0009_tlt_respuesta_rollup"),
+    ]
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,62 @@
+# Versión de datos por sesión (y global) para la caché de respuestas del panel.
+#
+# Cada INSERT/UPDATE/DELETE en tlt_respuesta sube el contador de su sesión
+# ('sesion:<id>') y el global ('all'). El panel compara la versión (una
+# búsqueda por PK) en lugar de volver a agregar: ver runtime/panel_cache.py.
+
+from django.db import migrations
+
+SQL_TABLE = """
+CREATE TABLE IF NOT EXISTS tlt_data_version (
+    scope      TEXT PRIMARY KEY,              -- 'all' | 'sesion:<id>'
+    version    INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME
+) WITHOUT ROWID;
+"""
+
+_BUMP = """
+    INSERT INTO tlt_data_version (scope, version, updated_at)
+    VALUES ('all', 1, CURRENT_TIMESTAMP), ('sesion:' || {row}.sesion_id, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;
+"""
+
+SQL_TRIGGERS = [
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_version_ins
+AFTER INSERT ON tlt_respuesta
+BEGIN
+{_BUMP.format(row="NEW")}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_version_del
+AFTER DELETE ON tlt_respuesta
+BEGIN
+{_BUMP.format(row="OLD")}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_version_upd
+AFTER UPDATE ON tlt_respuesta
+BEGIN
+{_BUMP.format(row="OLD")}
+{_BUMP.format(row="NEW")}
+END
+""",
+]
+
+SQL_DROP = [
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_version_ins",
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_version_del",
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_version_upd",
+    "DROP TABLE IF EXISTS tlt_data_version",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("runtime", "0010_tlt_respuesta_correcta_check"),
+    ]
+    operations = [
+        migrations.RunSQL([SQL_TABLE, *SQL_TRIGGERS], reverse_sql=SQL_DROP),
+    ]
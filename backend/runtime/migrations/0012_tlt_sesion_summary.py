@@ -0,0 +1,94 @@
+# Resumen por sesión (nº de respuestas, primera/última marca) para /api/sessions.
+#
+# Igual que el rollup de 0009, lo mantienen triggers sobre tlt_respuesta, así
+# que cubre todas las rutas de escritura (API, ingesta JSONL, purge de
+# panel-ui). La lista de sesiones sale del índice por last_ts sin agregar.
+# last_ts guarda '' si la sesión no tiene created_at (orden estable).
+# Reconciliación: manage.py reconcile_sesion_summary.
+
+from django.db import migrations
+
+SQL_TABLE = """
+CREATE TABLE IF NOT EXISTS tlt_sesion_summary (
+    sesion_id    INTEGER PRIMARY KEY,
+    n_respuestas INTEGER NOT NULL DEFAULT 0,
+    first_ts     DATETIME,
+    last_ts      TEXT NOT NULL DEFAULT '',
+    updated_at   DATETIME
+);
+"""
+
+SQL_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_tlt_sesion_summary_last
+ON tlt_sesion_summary (last_ts, sesion_id);
+"""
+
+SQL_FILL = """
+INSERT OR REPLACE INTO tlt_sesion_summary (sesion_id, n_respuestas, first_ts, last_ts, updated_at)
+SELECT sesion_id, COUNT(*), MIN(created_at), COALESCE(MAX(created_at), ''), CURRENT_TIMESTAMP
+FROM tlt_respuesta
+GROUP BY sesion_id;
+"""
+
+_ADD = """
+    INSERT INTO tlt_sesion_summary (sesion_id, n_respuestas, first_ts, last_ts, updated_at)
+    VALUES (NEW.sesion_id, 1, NEW.created_at, COALESCE(NEW.created_at, ''), CURRENT_TIMESTAMP)
+    ON CONFLICT (sesion_id) DO UPDATE SET
+        n_respuestas = n_respuestas + 1,
+        first_ts     = CASE WHEN first_ts IS NULL OR excluded.first_ts < first_ts THEN excluded.first_ts ELSE first_ts END,
+        last_ts      = MAX(last_ts, excluded.last_ts),
+        updated_at   = excluded.updated_at;
+"""
+
+# Si la fila quitada era un extremo, se recalcula con idx (sesion_id, created_at)
+_REMOVE = """
+    UPDATE tlt_sesion_summary SET n_respuestas = n_respuestas - 1, updated_at = CURRENT_TIMESTAMP
+    WHERE sesion_id = OLD.sesion_id;
+    DELETE FROM tlt_sesion_summary WHERE sesion_id = OLD.sesion_id AND n_respuestas <= 0;
+    UPDATE tlt_sesion_summary SET
+        first_ts = (SELECT MIN(created_at) FROM tlt_respuesta WHERE sesion_id = OLD.sesion_id),
+        last_ts  = COALESCE((SELECT MAX(created_at) FROM tlt_respuesta WHERE sesion_id = OLD.sesion_id), '')
+    WHERE sesion_id = OLD.sesion_id
+      AND (OLD.created_at IS first_ts OR COALESCE(OLD.created_at, '') = last_ts);
+"""
+
+SQL_TRIGGERS = [
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_summary_ins
+AFTER INSERT ON tlt_respuesta
+BEGIN
+{_ADD}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_summary_del
+AFTER DELETE ON tlt_respuesta
+BEGIN
+{_REMOVE}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_summary_upd
+AFTER UPDATE OF sesion_id, created_at ON tlt_respuesta
+BEGIN
+{_REMOVE}
+{_ADD}
+END
+""",
+]
+
+SQL_DROP = [
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_summary_ins",
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_summary_del",
+    "DROP TRIGGER IF EXISTS trg_tlt_respuesta_summary_upd",
+    "DROP TABLE IF EXISTS tlt_sesion_summary",
+]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("runtime", "0011_tlt_data_version"),
+    ]
+    operations = [
+        migrations.RunSQL([SQL_TABLE, SQL_INDEX, SQL_FILL, *SQL_TRIGGERS], reverse_sql=SQL_DROP),
+    ]
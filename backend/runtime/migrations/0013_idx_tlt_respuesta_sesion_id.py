@@ -0,0 +1,24 @@
+# Export por ítems (/api/export/.../items): WHERE sesion_id = ? AND id > ? ORDER BY id
+# recorre este índice en orden, sin ordenar la sesión entera antes del primer byte.
+
+from django.db import migrations
+
+SQL_FWD = """
+CREATE INDEX IF NOT EXISTS idx_tlt_respuesta_sesion_id
+ON tlt_respuesta (sesion_id, id);
+"""
+
+SQL_BWD = """
+DROP INDEX IF EXISTS idx_tlt_respuesta_sesion_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runtime', '0012_tlt_sesion_summary'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_FWD, reverse_sql=SQL_BWD),
+    ]
@@ -0,0 +1,85 @@
+# Conteos por CCP de cada sesión (hijo de tlt_sesion_summary, 0012).
+#
+# Los mantienen los mismos triggers del resumen: se recrean aquí con las
+# sentencias por CCP añadidas, así cada escritura en tlt_respuesta (API,
+# ingesta JSONL, purge de panel-ui) actualiza ambas tablas a la vez.
+# ccp_code NULL se guarda como ''. Reconciliación: manage.py reconcile_sesion_summary.
+
+import importlib
+
+from django.db import migrations
+
+summary = importlib.import_module("runtime.migrations.0012_tlt_sesion_summary")
+
+SQL_TABLE = """
+CREATE TABLE IF NOT EXISTS tlt_sesion_ccp_summary (
+    sesion_id INTEGER NOT NULL,
+    ccp_code  TEXT NOT NULL,
+    n         INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sesion_id, ccp_code)
+) WITHOUT ROWID;
+"""
+
+SQL_FILL = """
+INSERT OR REPLACE INTO tlt_sesion_ccp_summary (sesion_id, ccp_code, n)
+SELECT sesion_id, COALESCE(ccp_code, ''), COUNT(*)
+FROM tlt_respuesta
+GROUP BY 1, 2;
+"""
+
+_ADD = """
+    INSERT INTO tlt_sesion_ccp_summary (sesion_id, ccp_code, n)
+    VALUES (NEW.sesion_id, COALESCE(NEW.ccp_code, ''), 1)
+    ON CONFLICT (sesion_id, ccp_code) DO UPDATE SET n = n + 1;
+"""
+
+_REMOVE = """
+    UPDATE tlt_sesion_ccp_summary SET n = n - 1
+    WHERE sesion_id = OLD.sesion_id AND ccp_code = COALESCE(OLD.ccp_code, '');
+    DELETE FROM tlt_sesion_ccp_summary
+    WHERE sesion_id = OLD.sesion_id AND ccp_code = COALESCE(OLD.ccp_code, '') AND n <= 0;
+"""
+
+SQL_TRIGGERS = [
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_summary_ins
+AFTER INSERT ON tlt_respuesta
+BEGIN
+{summary._ADD}
+{_ADD}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_summary_del
+AFTER DELETE ON tlt_respuesta
+BEGIN
+{summary._REMOVE}
+{_REMOVE}
+END
+""",
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_tlt_respuesta_summary_upd
+AFTER UPDATE OF sesion_id, ccp_code, created_at ON tlt_respuesta
+BEGIN
+{summary._REMOVE}
+{_REMOVE}
+{summary._ADD}
+{_ADD}
+END
+""",
+]
+
+# Los triggers se llaman igual que en 0012: se sustituyen
+SQL_DROP_TRIGGERS = [sql for sql in summary.SQL_DROP if sql.startswith("DROP TRIGGER")]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("runtime", "0013_idx_tlt_respuesta_sesion_id"),
+    ]
+    operations = [
+        migrations.RunSQL(
+            [SQL_TABLE, SQL_FILL, *SQL_DROP_TRIGGERS, *SQL_TRIGGERS],
+            reverse_sql=[*SQL_DROP_TRIGGERS, "DROP TABLE IF EXISTS tlt_sesion_ccp_summary", *summary.SQL_TRIGGERS],
+        ),
+    ]
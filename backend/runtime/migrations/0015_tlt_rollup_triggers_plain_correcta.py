@@ -0,0 +1,23 @@
+# Triggers del rollup (0009) sin el CASE sobre correcta en cada escritura:
+# con el CHECK 0/1 de 0010 basta sumar la columna. Las bases migradas antes
+# conservan los triggers viejos; aquí se recrean con la definición actual.
+
+import importlib
+
+from django.db import migrations
+
+rollup = importlib.import_module("runtime.migrations.0009_tlt_respuesta_rollup")
+
+SQL_DROP_TRIGGERS = [sql for sql in rollup.SQL_DROP if sql.startswith("DROP TRIGGER")]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("runtime", "0014_tlt_sesion_ccp_summary"),
+    ]
+    operations = [
+        migrations.RunSQL(
+            [*SQL_DROP_TRIGGERS, *rollup.SQL_TRIGGERS],
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
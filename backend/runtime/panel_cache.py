@@ -0,0 +1,201 @@
+# runtime/panel_cache.py
+"""
+Caché de respuestas de las APIs del panel (JSON y CSV), por proceso.
+
+La clave combina la vista, el método, los parámetros normalizados y la
+versión de datos del ámbito consultado (tlt_data_version, migración runtime
+0011): 'sesion:<id>' si la petición es de una sesión, 'all' si no. Una sesión
+sin cambios cuesta una búsqueda por PK; cualquier escritura en tlt_respuesta
+sube la versión y las entradas antiguas dejan de usarse (salen por LRU).
+
+- Tope por nº de entradas (TALENTO_PANEL_CACHE_ENTRIES) y por bytes
+  (TALENTO_PANEL_CACHE_MAX_BYTES); 0 entradas desactiva la caché.
+- ETag (derivado de la clave) y Last-Modified (updated_at de la versión):
+  el navegador revalida y recibe 304 sin que se ejecute la vista.
+- Las respuestas streaming se guardan al terminar de enviarse (si caben).
+  La clave distingue si la respuesta va comprimida (gzip).
+- Sin tabla de versiones (migración no aplicada) se sirve sin caché.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from talento_core import core_schema, csv_stream
+
+VERSION_TABLE = "tlt_data_version"
+
+# Parámetros que no cambian la respuesta
+IGNORED_PARAMS = {"token", "_"}
+
+
+def _max_entries() -> int:
+    return int(getattr(settings, "TALENTO_PANEL_CACHE_ENTRIES", 256))
+
+
+def _max_bytes() -> int:
+    return int(getattr(settings, "TALENTO_PANEL_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+
+class ResponseCache:
+    """LRU de respuestas ya renderizadas: key -> (status, headers, content)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, status, headers, content):
+        size = len(content)
+        max_entries, max_bytes = _max_entries(), _max_bytes()
+        if max_entries <= 0 or size > max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[2])
+            self._entries[key] = (status, headers, content)
+            self._bytes += size
+            while self._entries and (len(self._entries) > max_entries or self._bytes > max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+cache = ResponseCache()
+
+
+def data_version(sesion_id=None):
+    """
+    (version, updated_at) del ámbito ('all' o 'sesion:<id>'); (0, None) si
+    nunca se escribió. None si no existe tlt_data_version.
+    """
+    if not core_schema.table_exists(VERSION_TABLE):
+        return None
+    scope = "all" if sesion_id is None else f"sesion:{sesion_id}"
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT version, updated_at FROM {VERSION_TABLE} WHERE scope = %s", [scope])
+        row = cur.fetchone()
+    return (int(row[0]), row[1]) if row else (0, None)
+
+
+def _last_modified(updated_at):
+    if not updated_at:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(updated_at))
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=dt.tzinfo or timezone.utc).timestamp()  # CURRENT_TIMESTAMP es UTC
+
+
+def _sesion_of(request, kwargs):
+    raw = kwargs.get("sesion_id") or request.GET.get("sesion_id") or request.GET.get("session_id")
+    try:
+        return int(raw) if raw not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _finish(response, etag, last_modified, state):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["X-Panel-Cache"] = state
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("X-Panel-Token",))
+    return response
+
+
+def _tee(key, headers, chunks):
+    """Deja pasar el stream y lo guarda al final si no supera el tope de bytes."""
+    kept, size, limit = [], 0, _max_bytes()
+    for chunk in chunks:
+        if kept is not None:
+            size += len(chunk)
+            if size <= limit:
+                kept.append(chunk)
+            else:
+                kept = None
+        yield chunk
+    if kept is not None:
+        cache.put(key, 200, headers, b"".join(kept))
+
+
+def cached_response(auth):
+    """
+    Decorador para vistas GET/HEAD del panel. auth(request) decide si se puede
+    usar la caché: si no hay acceso, la vista responde como siempre (403/401).
+    Solo se guardan respuestas 200 sin cookies; las streaming (CSV), al
+    terminar de enviarse y si caben en el tope de bytes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or not auth(request):
+                return view(request, *args, **kwargs)
+            sesion_id = _sesion_of(request, kwargs)
+            version = data_version(sesion_id)
+            if version is None:
+                return view(request, *args, **kwargs)
+
+            params = sorted(
+                (k, tuple(v)) for k, v in request.GET.lists() if k not in IGNORED_PARAMS
+            )
+            key = (
+                view.__name__, request.method, tuple(sorted(kwargs.items())), tuple(params),
+                csv_stream.accepts_gzip(request), sesion_id, version[0],
+            )
+            etag = '"%s"' % hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:24]
+            last_modified = _last_modified(version[1])
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return _finish(not_modified, etag, last_modified, "revalidated")
+
+            entry = cache.get(key)
+            if entry is not None:
+                status, headers, content = entry
+                response = HttpResponse(content, status=status)
+                for name, value in headers:
+                    response[name] = value
+                return _finish(response, etag, last_modified, "hit")
+
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            # Con cookies la respuesta es de este cliente: no se guarda
+            if not response.cookies:
+                if response.streaming:
+                    response.streaming_content = _tee(key, list(response.items()), response.streaming_content)
+                else:
+                    cache.put(key, response.status_code, list(response.items()), response.content)
+            return _finish(response, etag, last_modified, "miss")
+        return wrapper
+    return decorator
@@ -0,0 +1,169 @@
+# runtime/rollup.py
+"""
+Rollup de tlt_respuesta por (sesion_id, ccp_code, ejer_code, día) y resumen
+por sesión (tlt_sesion_summary, con los conteos por CCP en tlt_sesion_ccp_summary).
+
+Las tablas y sus triggers los crean las migraciones runtime 0009, 0012 y 0014; aquí
+están la lectura que comparten los endpoints del panel y la reconstrucción /
+reconciliación (manage.py rebuild_rollup, reconcile_sesion_summary). Las
+claves NULL del rollup y del resumen por CCP se guardan como ''.
+
+Los endpoints usan el rollup solo si existe (y TALENTO_PANEL_ROLLUP no está
+desactivado) y sus filtros son por día completo; si no, agregan filas crudas.
+"""
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from talento_core import core_schema
+
+ROLLUP_TABLE = "tlt_respuesta_rollup"
+SUMMARY_TABLE = "tlt_sesion_summary"
+SUMMARY_CCP_TABLE = "tlt_sesion_ccp_summary"
+
+# Mismo resultado que COUNT / aciertos / AVG(tr_ms) / MIN / MAX sobre filas crudas
+AGG_COLUMNS = """
+    SUM(n)                                    AS n,
+    SUM(n_ok)                                 AS aciertos,
+    100.0 * SUM(n_ok) / SUM(n)                AS acierto_pct,
+    1.0 * SUM(tr_sum) / NULLIF(SUM(n_tr), 0)  AS tr_ms_avg,
+    MIN(first_ts)                             AS first_ts,
+    MAX(last_ts)                              AS last_ts
+"""
+
+_REBUILD = f"""
+    INSERT INTO {ROLLUP_TABLE}
+        (sesion_id, ccp_code, ejer_code, day, n, n_ok, tr_sum, n_tr, first_ts, last_ts)
+    SELECT sesion_id, COALESCE(ccp_code, ''), COALESCE(ejer_code, ''), COALESCE(date(created_at), ''),
+           COUNT(*),
+           SUM(correcta),
+           COALESCE(SUM(tr_ms), 0), COUNT(tr_ms),
+           MIN(created_at), MAX(created_at)
+    FROM tlt_respuesta
+    {{where}}
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+_SUMMARY_AGG = """
+    SELECT sesion_id, COUNT(*) AS n, MIN(created_at) AS first_ts, COALESCE(MAX(created_at), '') AS last_ts
+    FROM tlt_respuesta
+    {where}
+    GROUP BY sesion_id
+"""
+
+_SUMMARY_CCP_AGG = """
+    SELECT sesion_id, COALESCE(ccp_code, '') AS ccp_code, COUNT(*) AS n
+    FROM tlt_respuesta
+    {where}
+    GROUP BY 1, 2
+"""
+
+
+def _enabled() -> bool:
+    return bool(getattr(settings, "TALENTO_PANEL_ROLLUP", True))
+
+
+def available() -> bool:
+    return _enabled() and core_schema.table_exists(ROLLUP_TABLE)
+
+
+def summary_available() -> bool:
+    return _enabled() and core_schema.table_exists(SUMMARY_TABLE)
+
+
+def summary_ccp_available() -> bool:
+    return _enabled() and core_schema.table_exists(SUMMARY_CCP_TABLE)
+
+
+def add_day_filters(where: list, params: list, day_from=None, day_to=None, day_before=None):
+    """
+    Filtros por día (YYYY-MM-DD) sobre la columna day: day_from <= day <= day_to
+    y day < day_before. Las filas sin created_at (day='') quedan fuera, como en
+    la comparación sobre filas crudas.
+    """
+    if day_from or day_to or day_before:
+        where.append("day <> ''")
+    if day_from:
+        where.append("day >= %s")
+        params.append(str(day_from))
+    if day_to:
+        where.append("day <= %s")
+        params.append(str(day_to))
+    if day_before:
+        where.append("day < %s")
+        params.append(str(day_before))
+
+
+def rebuild(sesion_id=None) -> int:
+    """Recalcula el rollup desde tlt_respuesta (todo o una sesión). Devuelve nº de grupos."""
+    where, params = "", []
+    if sesion_id is not None:
+        where, params = "WHERE sesion_id = %s", [sesion_id]
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {ROLLUP_TABLE} {where}", params)
+        cur.execute(_REBUILD.format(where=where), params)
+        cur.execute(f"SELECT COUNT(*) FROM {ROLLUP_TABLE} {where}", params)
+        return int(cur.fetchone()[0])
+
+
+def summary_drift(sesion_id=None) -> list:
+    """
+    sesion_ids cuyo resumen (y conteos por CCP, si existe la tabla) no coincide
+    con tlt_respuesta: faltan, sobran o difieren.
+    """
+    where, one = "", []
+    if sesion_id is not None:
+        where, one = "WHERE sesion_id = %s", [sesion_id]
+    parts = [
+        (f"""
+        SELECT a.sesion_id FROM ({_SUMMARY_AGG.format(where=where)}) a
+        LEFT JOIN {SUMMARY_TABLE} s ON s.sesion_id = a.sesion_id
+        WHERE s.sesion_id IS NULL OR s.n_respuestas != a.n
+           OR s.first_ts IS NOT a.first_ts OR s.last_ts != a.last_ts
+        """, one),
+        (f"""
+        SELECT s.sesion_id FROM {SUMMARY_TABLE} s
+        WHERE {"s.sesion_id = %s AND" if sesion_id is not None else ""}
+              NOT EXISTS (SELECT 1 FROM tlt_respuesta r WHERE r.sesion_id = s.sesion_id)
+        """, one),
+    ]
+    if core_schema.table_exists(SUMMARY_CCP_TABLE):
+        stored = f"SELECT sesion_id, ccp_code, n FROM {SUMMARY_CCP_TABLE} {where}"
+        agg = _SUMMARY_CCP_AGG.format(where=where)
+        parts += [
+            (f"SELECT sesion_id FROM ({agg} EXCEPT {stored})", one * 2),
+            (f"SELECT sesion_id FROM ({stored} EXCEPT {agg})", one * 2),
+        ]
+    sql = "\nUNION\n".join(p for p, _ in parts) + "\nORDER BY 1"
+    with connection.cursor() as cur:
+        cur.execute(sql, [v for _, params in parts for v in params])
+        return [row[0] for row in cur.fetchall()]
+
+
+def reconcile_summary(sesion_ids, chunk=500) -> int:
+    """Recalcula el resumen (y los conteos por CCP) de las sesiones dadas, por tramos."""
+    ids = sorted(set(sesion_ids))
+    with_ccp = core_schema.table_exists(SUMMARY_CCP_TABLE)
+    for i in range(0, len(ids), chunk):
+        part = ids[i:i + chunk]
+        marks = ", ".join(["%s"] * len(part))
+        in_part = f"WHERE sesion_id IN ({marks})"
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute(f"DELETE FROM {SUMMARY_TABLE} {in_part}", part)
+            cur.execute(
+                f"""
+                INSERT INTO {SUMMARY_TABLE} (sesion_id, n_respuestas, first_ts, last_ts, updated_at)
+                SELECT sesion_id, n, first_ts, last_ts, CURRENT_TIMESTAMP
+                FROM ({_SUMMARY_AGG.format(where=in_part)})
+                """,
+                part,
+            )
+            if with_ccp:
+                cur.execute(f"DELETE FROM {SUMMARY_CCP_TABLE} {in_part}", part)
+                cur.execute(
+                    f"INSERT INTO {SUMMARY_CCP_TABLE} (sesion_id, ccp_code, n) "
+                    f"SELECT sesion_id, ccp_code, n FROM ({_SUMMARY_CCP_AGG.format(where=in_part)})",
+                    part,
+                )
+    return len(ids)
@@ -5,6 +5,10 @@ from django.utils.dateparse import parse_date
 from django.views.decorators.http import require_GET
 from django.shortcuts import render
 
+from talento_core import csv_stream
+
+from . import panel_cache, rollup
+
 
 def smoke(request):
     return JsonResponse({"ok": True, "app": "runtime", "status": "alive"})
@@ -17,15 +21,49 @@ def _auth_ok(request):
     got = request.headers.get("X-Panel-Token")
     return bool(expected) and (got == expected)
 
+def _fetch_metrics_rollup(sesion_id=None, ccp=None, since=None, until=None):
+    # since/until son días completos: el rollup da el mismo resultado que las filas crudas
+    where, params = [], []
+    if sesion_id:
+        where.append("sesion_id = %s")
+        params.append(sesion_id)
+    if ccp:
+        where.append("ccp_code = %s")
+        params.append(ccp)
+    rollup.add_day_filters(where, params, day_from=since, day_before=until)
+    sql_str = (
+        f"SELECT sesion_id, COALESCE(NULLIF(ccp_code, ''), 'UNK') AS ccp_code, {rollup.AGG_COLUMNS} "
+        f"FROM {rollup.ROLLUP_TABLE} "
+        + ("WHERE " + " AND ".join(where) + " " if where else "")
+        + "GROUP BY 1, 2 ORDER BY 1, 2"
+    )
+    with connection.cursor() as cur:
+        cur.execute(sql_str, params)
+        cols = [c[0] for c in cur.description]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+
 def _fetch_metrics(sesion_id=None, ccp=None, since=None, until=None):
+    if rollup.available():
+        rows = _fetch_metrics_rollup(sesion_id, ccp, since, until)
+    else:
+        rows = _fetch_metrics_raw(sesion_id, ccp, since, until)
+    # Normaliza tipos/decimales
+    for r in rows:
+        r["n"] = int(r["n"] or 0)
+        r["aciertos"] = int(r["aciertos"] or 0)
+        r["acierto_pct"] = float(r["acierto_pct"] or 0.0)
+        r["tr_ms_avg"] = float(r["tr_ms_avg"]) if r["tr_ms_avg"] is not None else None
+    return rows
+
+def _fetch_metrics_raw(sesion_id=None, ccp=None, since=None, until=None):
     # Agregación directa (SQLite/PG portable)
     sql = [
         "SELECT",
         "  sesion_id,",
-        "  ccp_code,",
+        "  COALESCE(NULLIF(ccp_code, ''), 'UNK') AS ccp_code,",
         "  COUNT(*) AS n,",
-        "  SUM(CASE WHEN correcta IN (1, TRUE) THEN 1 ELSE 0 END) AS aciertos,",
-        "  100.0 * SUM(CASE WHEN correcta IN (1, TRUE) THEN 1 ELSE 0 END) / COUNT(*) AS acierto_pct,",
+        "  SUM(correcta) AS aciertos,",
+        "  100.0 * SUM(correcta) / COUNT(*) AS acierto_pct,",
         "  AVG(tr_ms) AS tr_ms_avg,",
         "  MIN(created_at) AS first_ts,",
         "  MAX(created_at) AS last_ts",
@@ -45,21 +83,14 @@ def _fetch_metrics(sesion_id=None, ccp=None, since=None, until=None):
     if until:
         sql.append("AND date(created_at) < %s")
         params.append(str(until))
-    sql.append("GROUP BY sesion_id, ccp_code")
-    sql.append("ORDER BY sesion_id, ccp_code")
+    sql.append("GROUP BY 1, 2")
+    sql.append("ORDER BY 1, 2")
     sql_str = " ".join(sql)
 
     with connection.cursor() as cur:
         cur.execute(sql_str, params)
         cols = [c[0] for c in cur.description]
-        rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-    # Normaliza tipos/decimales
-    for r in rows:
-        r["n"] = int(r["n"] or 0)
-        r["aciertos"] = int(r["aciertos"] or 0)
-        r["acierto_pct"] = float(r["acierto_pct"] or 0.0)
-        r["tr_ms_avg"] = float(r["tr_ms_avg"]) if r["tr_ms_avg"] is not None else None
-    return rows
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
 
 def _group_by_session(rows):
     by_session = {}
@@ -87,6 +118,7 @@ def _group_by_session(rows):
     return sorted(by_session.values(), key=lambda x: x["sesion_id"])
 
 @require_GET
+@panel_cache.cached_response(_auth_ok)
 def panel_metrics(request):
     if not _auth_ok(request):
         return JsonResponse({"error": "unauthorized"}, status=401)
@@ -101,17 +133,14 @@ def panel_metrics(request):
     grouped = _group_by_session(rows)
 
     if fmt == "csv":
-        import io, csv
-        buf = io.StringIO()
-        w = csv.writer(buf)
-        w.writerow(["sesion_id","ccp_code","n","aciertos","acierto_pct","tr_ms_avg","first_ts","last_ts"])
-        for g in grouped:
-            for x in g["ccp"]:
-                w.writerow([g["sesion_id"], x["ccp_code"], x["n"], x["aciertos"],
-                            x["acierto_pct"], x["tr_ms_avg"], x["first_ts"], x["last_ts"]])
-        resp = HttpResponse(buf.getvalue(), content_type="text/csv; charset=utf-8")
-        resp["Content-Disposition"] = 'attachment; filename="panel_metrics.csv"'
-        return resp
+        return csv_stream.csv_response(
+            request,
+            ["sesion_id","ccp_code","n","aciertos","acierto_pct","tr_ms_avg","first_ts","last_ts"],
+            ([g["sesion_id"], x["ccp_code"], x["n"], x["aciertos"],
+              x["acierto_pct"], x["tr_ms_avg"], x["first_ts"], x["last_ts"]]
+             for g in grouped for x in g["ccp"]),
+            filename="panel_metrics.csv",
+        )
 
     return JsonResponse({"sessions": grouped}, json_dumps_params={"ensure_ascii": False})
 
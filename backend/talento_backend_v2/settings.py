@@ -182,6 +182,31 @@ LOGGING = {
     },
 }
 
+# ===============================
+# ✍️ Ingesta write-behind (opcional)
+# ===============================
+# off | async (ack al encolar) | sync (ack tras commit agrupado)
+TALENTO_WRITE_BEHIND = os.getenv("TALENTO_WRITE_BEHIND", "off").lower()
+TALENTO_WRITE_BEHIND_MAX_ROWS = int(os.getenv("TALENTO_WRITE_BEHIND_MAX_ROWS", "200"))
+TALENTO_WRITE_BEHIND_MAX_AGE_MS = int(os.getenv("TALENTO_WRITE_BEHIND_MAX_AGE_MS", "50"))
+TALENTO_WRITE_BEHIND_ACK_TIMEOUT_MS = int(os.getenv("TALENTO_WRITE_BEHIND_ACK_TIMEOUT_MS", "5000"))
+
+# Índice id_item → (ccp, ejer) en memoria: cada cuántos segundos se comprueba la firma del catálogo
+TALENTO_CATALOG_TTL_S = float(os.getenv("TALENTO_CATALOG_TTL_S", "30"))
+
+# Jobs en segundo plano (backfill): sin latido en este tiempo → se da por muerto
+TALENTO_JOB_STALE_S = int(os.getenv("TALENTO_JOB_STALE_S", "300"))
+# True → el job corre en la propia petición (tests / depuración)
+TALENTO_JOBS_INLINE = os.getenv("TALENTO_JOBS_INLINE", "0") == "1"
+
+# Panel: agregar desde tlt_respuesta_rollup (migración runtime 0009) en lugar de filas crudas
+TALENTO_PANEL_ROLLUP = os.getenv("TALENTO_PANEL_ROLLUP", "1") == "1"
+# Caché de respuestas del panel (por proceso, LRU): nº de entradas (0 = sin caché) y tope en bytes
+TALENTO_PANEL_CACHE_ENTRIES = int(os.getenv("TALENTO_PANEL_CACHE_ENTRIES", "256"))
+TALENTO_PANEL_CACHE_MAX_BYTES = int(os.getenv("TALENTO_PANEL_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# Export de cohorte (ZIP): hilos que adelantan los agregados por sesión (0 = en la propia petición)
+TALENTO_EXPORT_WORKERS = int(os.getenv("TALENTO_EXPORT_WORKERS", "4"))
+
 # Solo permitir token por cabecera fuera de DEBUG
 PANEL_ALLOW_QUERYTOKEN = os.getenv("PANEL_ALLOW_QUERYTOKEN", "1" if DEBUG else "0") == "1"
 
@@ -12,6 +12,9 @@ DATABASES["default"]["NAME"] = DB_PATH
 
 PANEL_ORIENTADOR_TOKEN = os.environ.get("PANEL_ORIENTADOR_TOKEN", "mi-token-local")
 
+# Jobs en línea: el hilo de fondo no vería la transacción del test
+TALENTO_JOBS_INLINE = True
+
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 
 DATABASES["default"]["TEST"] = {"NAME": DATABASES["default"]["NAME"]}
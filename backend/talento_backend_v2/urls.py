@@ -5,7 +5,8 @@ from . import views
 from talento_core.core_views import (
     ui_progress, play_ui, api_export_session,
     create_respuesta, api_next_vpm_item, api_answer,
-    api_debug_db, api_csrf, qa_final, api_backfill_legacy_to_tlt
+    api_debug_db, api_csrf, qa_final, api_backfill_legacy_to_tlt,
+    api_submit_answers_batch, api_answers_ticket,
 )
 
 urlpatterns = [
@@ -21,10 +22,14 @@ urlpatterns = [
     path("api/respuesta", create_respuesta, name="create_respuesta"),
     path("api/next-vpm-item", api_next_vpm_item, name="api_next_vpm_item"),
     path("api/answer", api_answer, name="api_answer"),
+    path("api/answers/batch", api_submit_answers_batch, name="api_answers_batch"),
+    path("api/answers/tickets/<str:ticket>", api_answers_ticket, name="api_answers_ticket"),
     path("api/debug-db", api_debug_db, name="api_debug_db"),
     path("api/csrf", api_csrf, name="api_csrf"),
     path("api/qa/final/", qa_final, name="qa_final"),
     path("api/backfill", views.api_backfill, name="api_backfill"),
+    path("api/backfill/jobs", views.api_backfill_jobs, name="api_backfill_jobs"),
+    path("api/backfill/jobs/<str:job_id>", views.api_backfill_job, name="api_backfill_job"),
 
 
     # Nuevo Panel Orientador (M4/M5)
@@ -36,6 +41,9 @@ urlpatterns = [
     path("api/progress", views.api_progress, name="api_progress"),
     path("api/export/session/<int:sesion_id>/by_ccp", views.api_export_by_ccp, name="api_export_by_ccp"),
     path("api/export/session/<int:sesion_id>/by_ejer", views.api_export_by_ejer, name="api_export_by_ejer"),
+    path("api/export/session/<int:sesion_id>/items", views.api_export_items, name="api_export_items"),
+    path("api/export/items", views.api_export_items_multi, name="api_export_items_multi"),
+    path("api/export/cohort", views.api_export_cohort, name="api_export_cohort"),
 
     # (Opcional) otras rutas del core
     path("", include("talento_core.core_urls")),
@@ -4,15 +4,23 @@ from django.db import connection
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render
 from django.utils.encoding import smart_str
+from django.utils.http import content_disposition_header
 from django.views.decorators.http import require_GET, require_http_methods, require_POST
 from django.views.decorators.csrf import ensure_csrf_cookie
 
-import io
-import csv
+import base64
+import heapq
+import json
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, Tuple
 
+from runtime import panel_cache, rollup
+from talento_core import core_jobs, csv_stream
+from talento_core.core_views import _backfill_legacy_to_tlt, _backfill_scope
+
 # Parser de datetimes (si viene hora en date_to, no añadimos 23:59:59)
 from django.utils.dateparse import parse_datetime as dt_parse
 
@@ -22,6 +30,19 @@ from django.utils.dateparse import parse_datetime as dt_parse
 # -----------------------------
 DATE_FMT = "%Y-%m-%d"
 
+# Paginación de /api/sessions
+SESSIONS_PAGE_DEFAULT = 50
+SESSIONS_PAGE_MAX = 500
+
+# Export por ítems: columnas (en este orden) y máximo de sesiones por petición
+ITEMS_COLUMNS = ["id", "sesion_id", "ccp_code", "ejer_code", "item_id", "respuesta", "correcta", "tr_ms", "created_at"]
+EXPORT_ITEMS_MAX_SESSIONS = 200
+EXPORT_COHORT_MAX_SESSIONS = 1000
+
+# Cabeceras de los CSV agregados (export suelto y dentro del ZIP de cohorte)
+BY_CCP_HEADER = ["ccp_code", "n", "acierto_pct", "tr_ms_avg"]
+BY_EJER_HEADER = ["ccp_code", "ejer_code", "n", "acierto_pct", "tr_ms_avg"]
+
 
 def _parse_date(s: str) -> Optional[datetime]:
     try:
@@ -66,6 +87,9 @@ def _normalize_date_to_end_of_day(val: str | None) -> str | None:
     """
     if not val:
         return val
+    # Solo fecha: parse_datetime ya la acepta (fromisoformat) como medianoche
+    if _parse_date(val.strip()):
+        return val.strip() + " 23:59:59"
     try:
         # Si parsea con hora -> ya incluye hora; no tocamos
         if dt_parse(val):
@@ -91,6 +115,20 @@ def _slug(s: str) -> str:
     return re.sub(r"[^A-Za-z0-9_.-]+", "-", s or "")
 
 
+def _encode_cursor(*values) -> str:
+    """Cursor opaco de paginación (JSON en base64 url-safe)."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(raw: str):
+    """Inverso de _encode_cursor para (fecha_ultima, sesion_id); None si no es válido."""
+    try:
+        fecha, sesion_id = json.loads(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+        return str(fecha), int(sesion_id)
+    except Exception:
+        return None
+
+
 def _json_bad_request(msg: str):
     return JsonResponse({"ok": False, "error": msg}, status=400)
 
@@ -119,6 +157,118 @@ def _has_panel_access(request):
     return False
 
 
+# -----------------------------
+# Agregados de progreso (JSON + CSV)
+# -----------------------------
+def _progress_filters(sesion_id, date_from=None, date_to=None, ccp=None, ejer=None):
+    """
+    WHERE/params sobre filas crudas de tlt_respuesta (date_to se extiende a fin
+    de día). sesion_id=None → todas las sesiones.
+    """
+    where, params = [], []
+    if sesion_id is not None:
+        where.append("sesion_id = %s")
+        params.append(sesion_id)
+    date_to = _normalize_date_to_end_of_day(date_to)
+    if date_from:
+        where.append("created_at >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("created_at <= %s")
+        params.append(date_to)
+    if ccp:
+        where.append("ccp_code = %s")
+        params.append(ccp)
+    if ejer:
+        where.append("ejer_code = %s")
+        params.append(ejer)
+    return ("WHERE " + " AND ".join(where)) if where else "", params
+
+
+def _progress_groups(sesion_id, date_from=None, date_to=None, ccp=None, ejer=None):
+    """
+    Una sola pasada agregada a granularidad (ccp, ejer): lista de
+    (ccp_code, ejer_code, n, n_ok, tr_sum, n_tr) ordenada por códigos.
+    by_ccp, by_ejer y los totales se derivan de aquí con _summarize(),
+    así JSON y CSV dan siempre los mismos números.
+    Las fechas son días completos (YYYY-MM-DD, ya validadas).
+    """
+    if rollup.available():
+        where = ["sesion_id = %s"]
+        params = [sesion_id]
+        if ccp:
+            where.append("ccp_code = %s")
+            params.append(ccp)
+        if ejer:
+            where.append("ejer_code = %s")
+            params.append(ejer)
+        rollup.add_day_filters(where, params, day_from=date_from, day_to=date_to)
+        sql = f"""
+            SELECT COALESCE(NULLIF(ccp_code, ''), 'UNK'),
+                   COALESCE(NULLIF(ejer_code, ''), 'UNK'),
+                   SUM(n), SUM(n_ok), SUM(tr_sum), SUM(n_tr)
+            FROM {rollup.ROLLUP_TABLE}
+            WHERE {" AND ".join(where)}
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """
+    else:
+        where_sql, params = _progress_filters(sesion_id, date_from, date_to, ccp, ejer)
+        sql = f"""
+            SELECT COALESCE(NULLIF(ccp_code, ''), 'UNK'), COALESCE(NULLIF(ejer_code, ''), 'UNK'),
+                   COUNT(*),
+                   SUM(correcta),
+                   SUM(tr_ms), COUNT(tr_ms)
+            FROM tlt_respuesta
+            {where_sql}
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """
+    with connection.cursor() as cur:
+        cur.execute(sql, params)
+        return [(c, e, int(n), int(ok or 0), tr or 0, int(ntr or 0)) for c, e, n, ok, tr, ntr in cur.fetchall()]
+
+
+def _metrics(n, n_ok, tr_sum, n_tr) -> dict:
+    return {
+        "n": n,
+        "acierto_pct": 100.0 * n_ok / n if n else None,
+        "tr_ms_avg": float(tr_sum) / n_tr if n_tr else None,
+    }
+
+
+def _summarize(groups, by_ejer=False) -> list:
+    """by_ccp (o by_ejer si by_ejer=True) a partir de _progress_groups()."""
+    acc = {}
+    for ccp_code, ejer_code, n, n_ok, tr_sum, n_tr in groups:
+        key = (ccp_code, ejer_code) if by_ejer else (ccp_code,)
+        tot = acc.setdefault(key, [0, 0, 0, 0])
+        tot[0] += n
+        tot[1] += n_ok
+        tot[2] += tr_sum
+        tot[3] += n_tr
+    out = []
+    for key, tot in acc.items():  # groups ya viene ordenado
+        row = {"ccp_code": key[0]}
+        if by_ejer:
+            row["ejer_code"] = key[1]
+        row.update(_metrics(*tot))
+        out.append(row)
+    return out
+
+
+def _totals(groups) -> dict:
+    return _metrics(*(sum(g[i] for g in groups) for i in range(2, 6)))
+
+
+def _csv_metrics(row) -> list:
+    return [
+        row["n"],
+        "" if row["acierto_pct"] is None else f"{row['acierto_pct']:.1f}",
+        "" if row["tr_ms_avg"] is None else f"{row['tr_ms_avg']:.0f}",
+    ]
+
+
 # -----------------------------
 # Vistas
 # -----------------------------
@@ -130,8 +280,59 @@ def orientador_panel(request):
     return render(request, "orientador.html", {})
 
 
+def _sessions_by_ccp(sesion_ids, day_from=None, day_to=None) -> dict:
+    """
+    {sesion_id: {ccp_code: n}} de las sesiones de una página, con la misma
+    ventana que api_sessions: resumen por CCP (sin fechas), rollup diario o
+    filas crudas. Una consulta acotada a los sesion_ids dados.
+    """
+    if not sesion_ids:
+        return {}
+    marks = ", ".join(["%s"] * len(sesion_ids))
+    if not (day_from or day_to) and rollup.summary_ccp_available():
+        sql = f"""
+            SELECT sesion_id, COALESCE(NULLIF(ccp_code, ''), 'UNK'), n
+            FROM {rollup.SUMMARY_CCP_TABLE}
+            WHERE sesion_id IN ({marks})
+        """
+        params = list(sesion_ids)
+    elif rollup.available():
+        where, params = [f"sesion_id IN ({marks})"], list(sesion_ids)
+        rollup.add_day_filters(where, params, day_from=day_from, day_to=day_to)
+        sql = f"""
+            SELECT sesion_id, COALESCE(NULLIF(ccp_code, ''), 'UNK'), SUM(n)
+            FROM {rollup.ROLLUP_TABLE}
+            WHERE {" AND ".join(where)}
+            GROUP BY 1, 2
+        """
+    else:
+        where_sql, params = _progress_filters(None, day_from, day_to)
+        where_sql = (where_sql + " AND " if where_sql else "WHERE ") + f"sesion_id IN ({marks})"
+        params += list(sesion_ids)
+        sql = f"""
+            SELECT sesion_id, COALESCE(NULLIF(ccp_code, ''), 'UNK'), COUNT(*)
+            FROM tlt_respuesta
+            {where_sql}
+            GROUP BY 1, 2
+        """
+    out = {}
+    with connection.cursor() as cur:
+        cur.execute(sql + " ORDER BY 1, 2", params)
+        for sesion_id, ccp_code, n in cur.fetchall():
+            out.setdefault(sesion_id, {})[ccp_code] = n
+    return out
+
+
 @require_GET
+@panel_cache.cached_response(_has_panel_access)
 def api_sessions(request):
+    """
+    Sesiones con respuestas, de la más reciente a la más antigua, por páginas.
+    Query: date_from/date_to, limit (def. SESSIONS_PAGE_DEFAULT, máx. SESSIONS_PAGE_MAX),
+    cursor (next_cursor de la página anterior), q (prefijo de sesion_id),
+    total=1 (añade el nº total de sesiones; cuesta una pasada extra).
+    Cada sesión lleva by_ccp ({ccp_code: n}) en la misma ventana de fechas.
+    """
     if not _has_panel_access(request):
         return _json_forbidden()
 
@@ -142,39 +343,98 @@ def api_sessions(request):
     date_from = df_raw
     date_to = _normalize_date_to_end_of_day(dt_raw)
 
-    where = []
-    params = []
-    if date_from:
-        where.append("r.created_at >= %s")
-        params.append(date_from)
-    if date_to:
-        where.append("r.created_at <= %s")
-        params.append(date_to)
-
-    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    try:
+        limit = max(1, min(int(request.GET.get("limit") or SESSIONS_PAGE_DEFAULT), SESSIONS_PAGE_MAX))
+    except ValueError:
+        return _json_bad_request("limit inválido")
+    cursor = None
+    if request.GET.get("cursor"):
+        cursor = _decode_cursor(request.GET["cursor"])
+        if cursor is None:
+            return _json_bad_request("cursor inválido")
+    q = (request.GET.get("q") or "").strip()
+    if q and not q.isdigit():
+        return _json_bad_request("q debe ser un prefijo numérico de sesion_id")
+
+    # Origen: resumen por sesión (sin fechas: índice por last_ts, sin agregar),
+    # rollup diario (fechas = días completos) o filas crudas
+    if not (date_from or date_to) and rollup.summary_available():
+        source = f"""
+            SELECT sesion_id, n_respuestas AS n, last_ts AS last_key
+            FROM {rollup.SUMMARY_TABLE}
+            {"WHERE CAST(sesion_id AS TEXT) LIKE %s" if q else ""}
+        """
+        params = [q + "%"] if q else []
+    elif rollup.available():
+        where, params = [], []
+        rollup.add_day_filters(where, params, day_from=df_raw, day_to=dt_raw)
+        if q:
+            where.append("CAST(sesion_id AS TEXT) LIKE %s")
+            params.append(q + "%")
+        source = f"""
+            SELECT sesion_id, SUM(n) AS n, MAX(COALESCE(last_ts, '')) AS last_key
+            FROM {rollup.ROLLUP_TABLE}
+            {("WHERE " + " AND ".join(where)) if where else ""}
+            GROUP BY sesion_id
+        """
+    else:
+        where, params = [], []
+        if date_from:
+            where.append("created_at >= %s")
+            params.append(date_from)
+        if date_to:
+            where.append("created_at <= %s")
+            params.append(date_to)
+        if q:
+            where.append("CAST(sesion_id AS TEXT) LIKE %s")
+            params.append(q + "%")
+        source = f"""
+            SELECT sesion_id, COUNT(*) AS n, COALESCE(MAX(created_at), '') AS last_key
+            FROM tlt_respuesta
+            {("WHERE " + " AND ".join(where)) if where else ""}
+            GROUP BY sesion_id
+        """
+
+    # Keyset sobre (fecha_ultima, sesion_id) descendente: cada página cuesta lo mismo
+    page_params = list(params)
+    keyset_sql = ""
+    if cursor:
+        keyset_sql = "WHERE (last_key, sesion_id) < (%s, %s)"
+        page_params += list(cursor)
 
     sql = f"""
-        SELECT
-          r.sesion_id       AS sesion_id,
-          COUNT(*)          AS n_respuestas,
-          MAX(r.created_at) AS fecha_ultima
-        FROM tlt_respuesta r
-        {where_sql}
-        GROUP BY r.sesion_id
-        ORDER BY MAX(r.created_at) DESC
+        SELECT sesion_id, n, NULLIF(last_key, '') AS fecha_ultima
+        FROM ({source}) s
+        {keyset_sql}
+        ORDER BY last_key DESC, sesion_id DESC
+        LIMIT %s
     """
     with connection.cursor() as cur:
-        cur.execute(sql, params)
+        cur.execute(sql, page_params + [limit + 1])
         rows = cur.fetchall()
 
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    by_ccp = _sessions_by_ccp([row[0] for row in rows], df_raw, dt_raw)
     sessions = [
-        {"sesion_id": row[0], "n_respuestas": row[1], "fecha_ultima": row[2]}
+        {"sesion_id": row[0], "n_respuestas": row[1], "fecha_ultima": row[2], "by_ccp": by_ccp.get(row[0], {})}
         for row in rows
     ]
-    return JsonResponse({"ok": True, "sessions": sessions})
+    payload = {
+        "ok": True,
+        "sessions": sessions,
+        "limit": limit,
+        "next_cursor": _encode_cursor(rows[-1][2] or "", rows[-1][0]) if has_more else None,
+    }
+    if request.GET.get("total") in ("1", "true"):
+        with connection.cursor() as cur:
+            cur.execute(f"SELECT COUNT(*) FROM ({source}) s", params)
+            payload["total"] = cur.fetchone()[0]
+    return JsonResponse(payload)
 
 
 @require_GET
+@panel_cache.cached_response(_has_panel_access)
 def api_progress(request):
     # Seguridad: login O token
     if not _has_panel_access(request):
@@ -186,86 +446,19 @@ def api_progress(request):
     except Exception:
         return _json_bad_request("sesion_id requerido")
 
-    # Validación y normalización de fechas
+    # Validación de fechas
     df_raw, dt_raw, err = parse_date_range(request)
     if err:
         return err
-    date_from = df_raw
-    date_to = _normalize_date_to_end_of_day(dt_raw)
 
     # Filtros opcionales
     ccp = request.GET.get("ccp")
     ejer = request.GET.get("ejer")
 
-    where = ["sesion_id = %s"]
-    params = [sesion_id]
-
-    if date_from:
-        where.append("created_at >= %s")
-        params.append(date_from)
-    if date_to:
-        where.append("created_at <= %s")
-        params.append(date_to)
-    if ccp:
-        where.append("ccp_code = %s")
-        params.append(ccp)
-    if ejer:
-        where.append("ejer_code = %s")
-        params.append(ejer)
-
-    where_sql = "WHERE " + " AND ".join(where)
-
-    # Aggregates by_ccp / by_ejer con los mismos filtros
-    sql_by_ccp = f"""
-        SELECT
-          COALESCE(ccp_code, 'UNK') AS ccp_code,
-          COUNT(*)                  AS n,
-          AVG(CASE WHEN correcta IN (1,'1','t','true','TRUE') THEN 1.0 ELSE 0.0 END)*100.0 AS acierto_pct,
-          AVG(tr_ms)                AS tr_ms_avg
-        FROM tlt_respuesta
-        {where_sql}
-        GROUP BY COALESCE(ccp_code, 'UNK')
-        ORDER BY ccp_code
-    """
-
-    sql_by_ejer = f"""
-        SELECT
-          COALESCE(ccp_code, 'UNK')  AS ccp_code,
-          COALESCE(ejer_code, 'UNK') AS ejer_code,
-          COUNT(*)                   AS n,
-          AVG(CASE WHEN correcta IN (1,'1','t','true','TRUE') THEN 1.0 ELSE 0.0 END)*100.0 AS acierto_pct,
-          AVG(tr_ms)                 AS tr_ms_avg
-        FROM tlt_respuesta
-        {where_sql}
-        GROUP BY COALESCE(ccp_code, 'UNK'), COALESCE(ejer_code, 'UNK')
-        ORDER BY ccp_code, ejer_code
-    """
-
-    with connection.cursor() as cur:
-        cur.execute(sql_by_ccp, params)
-        rows_ccp = cur.fetchall()
-        cur.execute(sql_by_ejer, params)
-        rows_ejer = cur.fetchall()
-
-    by_ccp = [
-        {
-            "ccp_code": r[0],
-            "n": r[1],
-            "acierto_pct": float(r[2]) if r[2] is not None else None,
-            "tr_ms_avg": float(r[3]) if r[3] is not None else None,
-        }
-        for r in rows_ccp
-    ]
-    by_ejer = [
-        {
-            "ccp_code": r[0],
-            "ejer_code": r[1],
-            "n": r[2],
-            "acierto_pct": float(r[3]) if r[3] is not None else None,
-            "tr_ms_avg": float(r[4]) if r[4] is not None else None,
-        }
-        for r in rows_ejer
-    ]
+    # Una pasada (ccp, ejer); by_ccp y totales se derivan de las mismas filas
+    groups = _progress_groups(sesion_id, df_raw, dt_raw, ccp, ejer)
+    by_ccp = _summarize(groups)
+    by_ejer = _summarize(groups, by_ejer=True)
 
     payload = {
         "sesion_id": sesion_id,
@@ -279,6 +472,7 @@ def api_progress(request):
         "kpis": by_ccp,  # alias compat
         "by_ccp": by_ccp,
         "by_ejer": by_ejer,
+        "totals": _totals(groups),
     }
 
     # last_n opcional, respetando los filtros anteriores
@@ -286,10 +480,9 @@ def api_progress(request):
     if last_n:
         try:
             last_n_int = max(1, min(int(last_n), 500))
+            where_sql, params = _progress_filters(sesion_id, df_raw, dt_raw, ccp, ejer)
             sql_last = f"""
-                SELECT created_at, ccp_code, ejer_code,
-                       CASE WHEN correcta IN (1,'1','t','true','TRUE') THEN 1 ELSE 0 END AS correcta,
-                       tr_ms
+                SELECT created_at, ccp_code, ejer_code, correcta, tr_ms
                 FROM tlt_respuesta
                 {where_sql}
                 ORDER BY created_at DESC
@@ -315,32 +508,17 @@ def api_progress(request):
 
 
 @require_http_methods(["GET", "HEAD"])
+@panel_cache.cached_response(_has_panel_access)
 def api_export_by_ccp(request, sesion_id: int):
     if not _has_panel_access(request):
         return _json_forbidden()
 
-    # Validación y normalización de fechas
+    # Validación de fechas
     df_raw, dt_raw, err = parse_date_range(request)
     if err:
         return err
-    date_from = df_raw
-    date_to = _normalize_date_to_end_of_day(dt_raw)
     ccp = request.GET.get("ccp")
 
-    # WHERE + params
-    where = ["sesion_id = %s"]
-    params = [sesion_id]
-    if date_from:
-        where.append("created_at >= %s")
-        params.append(date_from)
-    if date_to:
-        where.append("created_at <= %s")
-        params.append(date_to)
-    if ccp:
-        where.append("(ccp_code = %s)")
-        params.append(ccp)
-    where_sql = "WHERE " + " AND ".join(where)
-
     # Construye filename con los valores crudos del querystring
     suffix = []
     if ccp:
@@ -355,73 +533,33 @@ def api_export_by_ccp(request, sesion_id: int):
     # HEAD: solo cabeceras
     if request.method == "HEAD":
         resp = HttpResponse("", content_type="text/csv; charset=utf-8")
-        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+        resp["Content-Disposition"] = content_disposition_header(True, filename)
         return resp
 
-    # GET: query + CSV
-    sql = f"""
-        SELECT
-          COALESCE(ccp_code, 'UNK') AS ccp_code,
-          COUNT(*)                  AS n,
-          AVG(CASE WHEN correcta IN (1,'1','t','true','TRUE') THEN 1.0 ELSE 0.0 END)*100.0 AS acierto_pct,
-          AVG(tr_ms)                AS tr_ms_avg
-        FROM tlt_respuesta
-        {where_sql}
-        GROUP BY COALESCE(ccp_code, 'UNK')
-        ORDER BY ccp_code
-    """
-    with connection.cursor() as cur:
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-
-    buf = io.StringIO(newline="")
-    writer = csv.writer(buf)
-    writer.writerow(["ccp_code", "n", "acierto_pct", "tr_ms_avg"])
-    for ccp_code, n, acc, tr in rows:
-        writer.writerow([
-            "" if ccp_code is None else str(ccp_code),
-            int(n) if n is not None else "",
-            "" if acc is None else f"{float(acc):.1f}",
-            "" if tr is None else f"{float(tr):.0f}",
-        ])
+    # GET: misma agregación que /api/progress
+    rows = _summarize(_progress_groups(sesion_id, df_raw, dt_raw, ccp))
 
-    resp = HttpResponse(buf.getvalue(), content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+    return csv_stream.csv_response(
+        request,
+        BY_CCP_HEADER,
+        ([row["ccp_code"], *_csv_metrics(row)] for row in rows),
+        filename=filename,
+    )
 
 
 @require_http_methods(["GET", "HEAD"])
+@panel_cache.cached_response(_has_panel_access)
 def api_export_by_ejer(request, sesion_id: int):
     if not _has_panel_access(request):
         return _json_forbidden()
 
-    # Validación y normalización de fechas
+    # Validación de fechas
     df_raw, dt_raw, err = parse_date_range(request)
     if err:
         return err
-    date_from = df_raw
-    date_to = _normalize_date_to_end_of_day(dt_raw)
     ccp = request.GET.get("ccp")
     ejer = request.GET.get("ejer")
 
-    # WHERE y parámetros
-    where = ["sesion_id = %s"]
-    params = [sesion_id]
-    if date_from:
-        where.append("created_at >= %s")
-        params.append(date_from)
-    if date_to:
-        where.append("created_at <= %s")
-        params.append(date_to)
-    if ccp:
-        where.append("(ccp_code = %s)")
-        params.append(ccp)
-    if ejer:
-        where.append("(ejer_code = %s)")
-        params.append(ejer)
-
-    where_sql = "WHERE " + " AND ".join(where)
-
     # Nombre de fichero con valores crudos
     suffix = []
     if ccp:
@@ -438,51 +576,273 @@ def api_export_by_ejer(request, sesion_id: int):
     # HEAD: solo cabeceras
     if request.method == "HEAD":
         resp = HttpResponse("", content_type="text/csv; charset=utf-8")
-        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+        resp["Content-Disposition"] = content_disposition_header(True, filename)
         return resp
 
-    # SQL agregado por ejercicio
-    sql = f"""
-        SELECT
-          COALESCE(ccp_code, 'UNK')  AS ccp_code,
-          COALESCE(ejer_code, 'UNK') AS ejer_code,
-          COUNT(*)                   AS n,
-          AVG(CASE WHEN correcta IN (1,'1','t','true','TRUE') THEN 1.0 ELSE 0.0 END)*100.0 AS acierto_pct,
-          AVG(tr_ms)                 AS tr_ms_avg
-        FROM tlt_respuesta
-        {where_sql}
-        GROUP BY COALESCE(ccp_code, 'UNK'), COALESCE(ejer_code, 'UNK')
-        ORDER BY ccp_code, ejer_code
+    # Misma agregación que /api/progress
+    rows = _summarize(_progress_groups(sesion_id, df_raw, dt_raw, ccp, ejer), by_ejer=True)
+
+    return csv_stream.csv_response(
+        request,
+        BY_EJER_HEADER,
+        ([row["ccp_code"], row["ejer_code"], *_csv_metrics(row)] for row in rows),
+        filename=filename,
+    )
+
+
+def _parse_sesion_ids(request, max_sessions):
+    """sesion_id=1,2 o repetido → (lista ordenada sin duplicados, error_response)."""
+    raw = [part.strip() for value in request.GET.getlist("sesion_id") for part in value.split(",") if part.strip()]
+    if not all(part.isdigit() for part in raw):
+        return None, _json_bad_request("sesion_id debe ser una lista de enteros")
+    sesion_ids = sorted({int(part) for part in raw})
+    if len(sesion_ids) > max_sessions:
+        return None, _json_bad_request(f"máximo {max_sessions} sesiones por export")
+    return sesion_ids, None
+
+
+def _iter_items(sesion_ids, after_id, date_from=None, date_to=None, ccp=None, ejer=None):
+    """
+    Filas de tlt_respuesta (ITEMS_COLUMNS) con id > after_id, en orden de id.
+    Cada sesión se lee por el índice (sesion_id, id) y, si hay varias, se mezclan
+    en orden; sin sesiones, un único recorrido por id. Nada se carga entero.
     """
+    def query(sesion_id):
+        where_sql, params = _progress_filters(sesion_id, date_from, date_to, ccp, ejer)
+        where_sql = (where_sql + " AND " if where_sql else "WHERE ") + "id > %s"
+        sql = f"""
+            SELECT id, sesion_id, ccp_code, ejer_code, item_id, respuesta, correcta, tr_ms,
+                   CAST(created_at AS TEXT) AS created_at
+            FROM tlt_respuesta
+            {where_sql}
+            ORDER BY id
+        """
+        return csv_stream.iter_query(sql, params + [after_id])
+
+    if not sesion_ids:
+        return query(None)
+    if len(sesion_ids) == 1:
+        return query(sesion_ids[0])
+    return heapq.merge(*(query(sid) for sid in sesion_ids), key=lambda row: row[0])
+
+
+def _items_response(request, sesion_ids, name):
+    """CSV (por defecto) o NDJSON de _iter_items; after_id=<último id recibido> reanuda."""
+    df_raw, dt_raw, err = parse_date_range(request)
+    if err:
+        return err
+    fmt = (request.GET.get("format") or "csv").lower()
+    if fmt not in ("csv", "ndjson"):
+        return _json_bad_request("format debe ser csv|ndjson")
+    try:
+        after_id = int(request.GET.get("after_id") or 0)
+    except ValueError:
+        return _json_bad_request("after_id inválido")
+
+    rows = _iter_items(sesion_ids, after_id, df_raw, dt_raw, request.GET.get("ccp"), request.GET.get("ejer"))
+    if fmt == "ndjson":
+        return csv_stream.ndjson_response(request, ITEMS_COLUMNS, rows, filename=f"{name}.ndjson")
+    return csv_stream.csv_response(request, ITEMS_COLUMNS, rows, filename=f"{name}.csv")
+
+
+@require_GET
+def api_export_items(request, sesion_id: int):
+    """
+    Todas las respuestas de una sesión, una fila por ítem, en orden de id.
+    Query: format=csv|ndjson, after_id, date_from/date_to, ccp, ejer.
+    """
+    if not _has_panel_access(request):
+        return _json_forbidden()
+    return _items_response(request, [sesion_id], f"sesion_{smart_str(sesion_id)}_items")
+
+
+@require_GET
+def api_export_items_multi(request):
+    """
+    Igual que api_export_items para varias sesiones (sesion_id=1,2 o repetido,
+    máx. EXPORT_ITEMS_MAX_SESSIONS) o para todas si no se indica ninguna.
+    """
+    if not _has_panel_access(request):
+        return _json_forbidden()
+    sesion_ids, err = _parse_sesion_ids(request, EXPORT_ITEMS_MAX_SESSIONS)
+    if err:
+        return err
+    return _items_response(request, sesion_ids, "items")
 
-    with connection.cursor() as cur:
-        cur.execute(sql, params)
-        rows = cur.fetchall()
 
-    # Construcción CSV
-    buf = io.StringIO(newline="")
-    writer = csv.writer(buf)
-    writer.writerow(["ccp_code", "ejer_code", "n", "acierto_pct", "tr_ms_avg"])
-    for ccp_code, ejer_code, n, acc, tr in rows:
-        writer.writerow([
-            "" if ccp_code is None else str(ccp_code),
-            "" if ejer_code is None else str(ejer_code),
-            int(n) if n is not None else "",
-            "" if acc is None else f"{float(acc):.1f}",
-            "" if tr is None else f"{float(tr):.0f}",
-        ])
+def _prefetch(fn, items, workers):
+    """
+    (item, fn(item)) en el orden de items, con hasta 2*workers llamadas en vuelo
+    en un pool de hilos (cada hilo abre y cierra su propia conexión).
+    workers=0 → secuencial en el hilo actual.
+    """
+    if workers <= 0:
+        for item in items:
+            yield item, fn(item)
+        return
+
+    def job(item):
+        try:
+            return fn(item)
+        finally:
+            connection.close()
 
-    resp = HttpResponse(buf.getvalue(), content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="talento-export")
+    try:
+        pending = deque()
+        for item in items:
+            pending.append((item, pool.submit(job, item)))
+            if len(pending) >= 2 * workers:
+                head, future = pending.popleft()
+                yield head, future.result()
+        while pending:
+            head, future = pending.popleft()
+            yield head, future.result()
+    finally:
+        # Descarga cortada: lo que no ha empezado no se ejecuta
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _cohort_entries(sesion_ids, date_from, date_to, ccp, ejer):
+    """
+    Entradas (nombre, bytes por bloques) del ZIP de cohorte: por sesión
+    by_ccp.csv, by_ejer.csv e items.csv; al final manifest.json. Los agregados
+    se adelantan en el pool mientras se envían los ítems de la sesión en curso.
+    """
+    def aggregates(sesion_id):
+        groups = _progress_groups(sesion_id, date_from, date_to, ccp, ejer)
+        return _summarize(groups), _summarize(groups, by_ejer=True)
+
+    def counted(rows, counter):
+        for row in rows:
+            counter[0] += 1
+            yield row
+
+    sessions = []
+    workers = int(getattr(settings, "TALENTO_EXPORT_WORKERS", 4))
+    for sesion_id, (by_ccp, by_ejer) in _prefetch(aggregates, sesion_ids, workers):
+        base = f"sesion_{sesion_id}"
+        yield f"{base}/by_ccp.csv", csv_stream.iter_csv(
+            BY_CCP_HEADER, ([r["ccp_code"], *_csv_metrics(r)] for r in by_ccp))
+        yield f"{base}/by_ejer.csv", csv_stream.iter_csv(
+            BY_EJER_HEADER, ([r["ccp_code"], r["ejer_code"], *_csv_metrics(r)] for r in by_ejer))
+        n_items = [0]
+        items = _iter_items([sesion_id], 0, date_from, date_to, ccp, ejer)
+        yield f"{base}/items.csv", csv_stream.iter_csv(ITEMS_COLUMNS, counted(items, n_items))
+        sessions.append({
+            "sesion_id": sesion_id,
+            "files": [f"{base}/by_ccp.csv", f"{base}/by_ejer.csv", f"{base}/items.csv"],
+            "n_ccp": len(by_ccp),
+            "n_ejer": len(by_ejer),
+            "n_items": n_items[0],
+        })
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "filters": {"date_from": date_from, "date_to": date_to, "ccp": ccp, "ejer": ejer},
+        "columns": {"by_ccp.csv": BY_CCP_HEADER, "by_ejer.csv": BY_EJER_HEADER, "items.csv": ITEMS_COLUMNS},
+        "sessions": sessions,
+    }
+    yield "manifest.json", [json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")]
+
+
+@require_GET
+def api_export_cohort(request):
+    """
+    ZIP en streaming con los CSV por sesión (by_ccp, by_ejer, items) y un
+    manifest.json. Sesiones: sesion_id=1,2 (o repetido) y/o las que tengan
+    respuestas en date_from/date_to (máx. EXPORT_COHORT_MAX_SESSIONS).
+    Las fechas, ccp y ejer filtran también el contenido de cada CSV.
+    """
+    if not _has_panel_access(request):
+        return _json_forbidden()
+    df_raw, dt_raw, err = parse_date_range(request)
+    if err:
+        return err
+    sesion_ids, err = _parse_sesion_ids(request, EXPORT_COHORT_MAX_SESSIONS)
+    if err:
+        return err
+    ccp, ejer = request.GET.get("ccp"), request.GET.get("ejer")
+
+    if not sesion_ids:
+        if not (df_raw or dt_raw):
+            return _json_bad_request("indica sesion_id o un rango date_from/date_to")
+        where_sql, params = _progress_filters(None, df_raw, dt_raw, ccp, ejer)
+        with connection.cursor() as cur:
+            cur.execute(
+                f"SELECT DISTINCT sesion_id FROM tlt_respuesta {where_sql} ORDER BY sesion_id LIMIT %s",
+                params + [EXPORT_COHORT_MAX_SESSIONS + 1],
+            )
+            sesion_ids = [r[0] for r in cur.fetchall()]
+        if len(sesion_ids) > EXPORT_COHORT_MAX_SESSIONS:
+            return _json_bad_request(f"máximo {EXPORT_COHORT_MAX_SESSIONS} sesiones por export; acota las fechas")
+
+    suffix = f"_{_slug(df_raw or '') or '…'}_{_slug(dt_raw or '') or '…'}" if (df_raw or dt_raw) else ""
+    return csv_stream.zip_response(
+        _cohort_entries(sesion_ids, df_raw, dt_raw, ccp, ejer),
+        filename=f"cohorte_{len(sesion_ids)}_sesiones{suffix}.zip",
+    )
 
 
 @require_POST
 def api_backfill(request):
+    """
+    Encola un backfill legacy → tlt_respuesta y responde al momento (202) con el job_id.
+    Body JSON opcional: {"sesion_id": 1, "reset": false}. Sin sesion_id → todas las sesiones.
+    Si ya hay un backfill vivo para el mismo ámbito, se devuelve ese job (coalesced=true).
+    Estado/progreso: GET /api/backfill/jobs/<job_id>.
+    """
     if not _has_panel_access(request):
         return _json_forbidden()
-    # Placeholder de backfill
-    return JsonResponse({"ok": True, "stats": {"inserted": 0, "before": 33, "after": 33}})
+    try:
+        payload = json.loads(request.body.decode("utf-8") or "{}")
+    except Exception:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+
+    sesion_id = payload.get("sesion_id")
+    if sesion_id is not None:
+        try:
+            sesion_id = int(sesion_id)
+        except (TypeError, ValueError):
+            return JsonResponse({"ok": False, "error": "invalid sesion_id"}, status=400)
+    reset = bool(payload.get("reset", False))
+
+    job_id, coalesced = core_jobs.enqueue(
+        "backfill",
+        lambda progress: _backfill_legacy_to_tlt(sesion_id, reset=reset, progress=progress),
+        params={"sesion_id": sesion_id, "reset": reset},
+        dedupe_key=f"backfill:{_backfill_scope(sesion_id)}",
+    )
+    return JsonResponse(
+        {"ok": True, "job_id": job_id, "coalesced": coalesced,
+         "status_url": f"/api/backfill/jobs/{job_id}"},
+        status=202,
+    )
+
+
+@require_GET
+def api_backfill_job(request, job_id: str):
+    """Estado y progreso de un job de backfill (para polling desde el panel)."""
+    if not _has_panel_access(request):
+        return _json_forbidden()
+    job = core_jobs.get(job_id)
+    if job is None:
+        return JsonResponse({"ok": False, "error": "job not found"}, status=404)
+    return JsonResponse({"ok": True, "job": job})
+
+
+@require_GET
+def api_backfill_jobs(request):
+    """Últimos jobs de backfill (?limit=, máx. 100)."""
+    if not _has_panel_access(request):
+        return _json_forbidden()
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 20)), 100))
+    except ValueError:
+        limit = 20
+    return JsonResponse({"ok": True, "jobs": core_jobs.recent("backfill", limit)})
 
 
 @require_GET
@@ -3,4 +3,13 @@ from django.apps import AppConfig
 class TalentoCoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "talento_core"
-    verbose_name = "Talento Core"
\ No newline at end of file
+    verbose_name = "Talento Core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from . import core_schema
+
+        # Esquema garantizado una vez por proceso; la caché se invalida tras migrar
+        connection_created.connect(core_schema.on_connection_created, dispatch_uid="talento_core_schema_ensure")
+        post_migrate.connect(core_schema.on_post_migrate, dispatch_uid="talento_core_schema_invalidate")
\ No newline at end of file
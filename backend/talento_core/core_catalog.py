@@ -0,0 +1,128 @@
+# talento_core/core_catalog.py
+"""
+Índice en memoria id_item → (ccp_code, ejer_code) para el modelo legacy.
+
+Sustituye al JOIN item / ref_ccp / ref_submodalidad que resolvía los códigos
+en cada create_respuesta y en el backfill legacy → tlt_respuesta.
+
+- Se carga entero una vez por proceso (una consulta).
+- Cada TALENTO_CATALOG_TTL_S segundos se compara una firma barata de los
+  catálogos (COUNT/MAX de item; contenido de ref_ccp/ref_submodalidad, que
+  son pequeñas); si cambió, se recarga.
+- Un id desconocido dispara una consulta puntual (item recién creado).
+- core_schema.invalidate() (post_migrate, /api/debug-db?refresh=1) fuerza recarga.
+"""
+
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import core_schema
+
+UNKNOWN = ("UNK", "UNK")
+
+_SELECT = """
+    SELECT i.id_item, COALESCE(c.codigo,'UNK'), COALESCE(s.codigo,'UNK')
+    FROM item i
+    LEFT JOIN ref_ccp          c ON c.id_ccp    = i.id_ccp
+    LEFT JOIN ref_submodalidad s ON s.id_submod = i.id_submod
+"""
+
+_SIGNATURE = """
+    SELECT (SELECT COUNT(*) FROM item), (SELECT MAX(rowid) FROM item),
+           (SELECT group_concat(id_ccp || ':' || COALESCE(codigo, ''), ',') FROM ref_ccp),
+           (SELECT group_concat(id_submod || ':' || COALESCE(codigo, ''), ',') FROM ref_submodalidad)
+"""
+
+
+class ItemCatalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._map = None          # id_item -> (ccp_code, ejer_code)
+        self._signature = None
+        self._generation = None   # core_schema.registry.generation al cargar
+        self._checked_at = 0.0
+
+    def _ttl(self) -> float:
+        return float(getattr(settings, "TALENTO_CATALOG_TTL_S", 30))
+
+    @staticmethod
+    def _available() -> bool:
+        return all(core_schema.table_exists(t) for t in ("item", "ref_ccp", "ref_submodalidad"))
+
+    def _read_signature(self, cur):
+        cur.execute(_SIGNATURE)
+        return tuple(cur.fetchone())
+
+    def _load(self):
+        mapping, signature = {}, None
+        if self._available():
+            with connection.cursor() as cur:
+                signature = self._read_signature(cur)
+                cur.execute(_SELECT)
+                for id_item, ccp, ejer in cur.fetchall():
+                    # Los códigos se repiten mucho: intern() comparte las cadenas
+                    mapping[int(id_item)] = (sys.intern(str(ccp)), sys.intern(str(ejer)))
+        self._map = mapping
+        self._signature = signature
+        self._generation = core_schema.registry.generation
+        self._checked_at = time.monotonic()
+
+    def _fresh(self):
+        if self._map is None or self._generation != core_schema.registry.generation:
+            self._load()
+            return
+        if time.monotonic() - self._checked_at < self._ttl():
+            return
+        self._checked_at = time.monotonic()
+        if self._available():
+            with connection.cursor() as cur:
+                if self._read_signature(cur) != self._signature:
+                    self._load()
+
+    def _lookup_one(self, id_item: int):
+        if not self._available():
+            return None
+        with connection.cursor() as cur:
+            cur.execute(_SELECT + " WHERE i.id_item = %s", [id_item])
+            row = cur.fetchone()
+        return (str(row[1]), str(row[2])) if row else None
+
+    def codes(self, id_item: int) -> tuple:
+        """(ccp_code, ejer_code) de un item; ('UNK', 'UNK') si no se puede resolver."""
+        try:
+            id_item = int(id_item)
+            with self._lock:
+                self._fresh()
+                hit = self._map.get(id_item)
+                if hit is None:
+                    hit = self._lookup_one(id_item)
+                    if hit is not None:
+                        self._map[id_item] = hit
+            return hit or UNKNOWN
+        except Exception:
+            return UNKNOWN
+
+    def mapping(self) -> dict:
+        """Copia del índice completo (para procesos en bloque como el backfill)."""
+        try:
+            with self._lock:
+                self._fresh()
+                return dict(self._map)
+        except Exception:
+            return {}
+
+    def invalidate(self):
+        with self._lock:
+            self._map = None
+
+    def snapshot(self) -> dict:
+        return {"loaded": self._map is not None, "items": len(self._map or ())}
+
+
+catalog = ItemCatalog()
+
+item_codes = catalog.codes
@@ -0,0 +1,109 @@
+# talento_core/core_ingest.py
+"""
+Ingesta de respuestas hacia tlt_respuesta: validación y escritura en bloque.
+
+Lo usan /api/answer (una fila) y /api/answers/batch (N filas por petición).
+"""
+
+from django.db import connection
+
+from .correcta import coerce_correcta
+
+# Orden de columnas de las filas normalizadas que devuelve parse_answer()
+TLT_COLUMNS = ("sesion_id", "ccp_code", "ejer_code", "item_id", "respuesta", "correcta", "tr_ms")
+
+# Filas por sentencia INSERT multi-fila de tlt_respuesta (7 parámetros/fila → < 999 variables SQLite)
+INSERT_CHUNK_ROWS = 100
+
+
+class AnswerError(ValueError):
+    """Respuesta inválida (el mensaje se devuelve tal cual al cliente)."""
+
+
+def parse_answer(data, default_sesion_id=1) -> tuple:
+    """
+    Valida y normaliza una respuesta JSON al orden de TLT_COLUMNS.
+    Lanza AnswerError si falta un campo obligatorio o un valor no es convertible.
+    """
+    if not isinstance(data, dict):
+        raise AnswerError("se esperaba un objeto JSON")
+    try:
+        return (
+            int(data.get("sesion_id", default_sesion_id)),
+            str(data.get("ccp_code", "VPM")),
+            str(data["ejer_code"]),
+            str(data["item_id"]),
+            str(data.get("respuesta", "CLICK")),
+            coerce_correcta(data.get("correcta", 0)),
+            int(data.get("tr_ms", 0)),
+        )
+    except KeyError as e:
+        raise AnswerError(f"Falta campo obligatorio: {e}")
+    except (TypeError, ValueError) as e:
+        raise AnswerError(f"Valor inválido: {e}")
+
+
+def existing_sesion_ids(sesion_ids) -> set:
+    """Subconjunto de sesion_ids presentes en tlt_sesion (una sola consulta)."""
+    ids = sorted(set(sesion_ids))
+    if not ids:
+        return set()
+    marks = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT id FROM tlt_sesion WHERE id IN ({marks})", ids)
+        return {row[0] for row in cur.fetchall()}
+
+
+def insert_rows(table: str, columns, rows) -> int:
+    """
+    Inserta filas (tuplas en el orden de columns) con INSERT multi-fila.
+    No abre transacción: el llamador decide (transaction.atomic) el alcance del commit.
+    """
+    rows = list(rows)
+    cols = ", ".join(columns)
+    row_marks = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    chunk_rows = max(1, INSERT_CHUNK_ROWS * len(TLT_COLUMNS) // len(columns))
+    with connection.cursor() as cur:
+        for i in range(0, len(rows), chunk_rows):
+            chunk = rows[i:i + chunk_rows]
+            values = ", ".join([row_marks] * len(chunk))
+            params = [v for row in chunk for v in row]
+            cur.execute(f"INSERT INTO {table} ({cols}) VALUES {values}", params)
+    return len(rows)
+
+
+def insert_tlt_rows(rows) -> int:
+    """Inserta filas normalizadas (orden TLT_COLUMNS) en tlt_respuesta."""
+    return insert_rows("tlt_respuesta", TLT_COLUMNS, rows)
+
+
+# Clave del índice único idx_tlt_resp_unique (scripts/ingest_jsonl_to_sqlite.py)
+_UNIQUE_KEY = ("sesion_id", "ejer_code", "item_id")
+
+
+def insert_tlt_rows_skip_duplicates(rows) -> list:
+    """
+    Como insert_tlt_rows, pero una fila que ya existe (o se repite en el lote)
+    no aborta la sentencia: ON CONFLICT DO NOTHING. Devuelve, en el orden de
+    rows, True si la fila se insertó y False si era duplicada.
+    """
+    rows = list(rows)
+    key_pos = [TLT_COLUMNS.index(c) for c in _UNIQUE_KEY]
+    cols = ", ".join(TLT_COLUMNS)
+    row_marks = "(" + ", ".join(["%s"] * len(TLT_COLUMNS)) + ")"
+    inserted = [False] * len(rows)
+    with connection.cursor() as cur:
+        for i in range(0, len(rows), INSERT_CHUNK_ROWS):
+            chunk = rows[i:i + INSERT_CHUNK_ROWS]
+            # RETURNING no garantiza orden: se casa por clave, primera aparición primero
+            pending = {}
+            for j, row in enumerate(chunk, i):
+                pending.setdefault(tuple(row[p] for p in key_pos), []).append(j)
+            cur.execute(
+                f"INSERT INTO tlt_respuesta ({cols}) VALUES {', '.join([row_marks] * len(chunk))} "
+                f"ON CONFLICT DO NOTHING RETURNING {', '.join(_UNIQUE_KEY)}",
+                [v for row in chunk for v in row],
+            )
+            for key in cur.fetchall():
+                inserted[pending[tuple(key)].pop(0)] = True
+    return inserted
@@ -0,0 +1,228 @@
+# talento_core/core_jobs.py
+"""
+Jobs de mantenimiento en segundo plano (p. ej. backfill legacy → tlt).
+
+El estado vive en la tabla tlt_job (no en memoria) para que cualquier worker
+WSGI pueda responder al polling; la ejecución es un hilo del proceso que
+encoló el job. Un mismo dedupe_key (p. ej. "backfill:all") no se lanza dos
+veces: un índice UNIQUE parcial sobre los jobs vivos lo garantiza también
+entre peticiones concurrentes, y se devuelve el job vivo (coalesced).
+
+Mientras corre, un hilo de latido refresca updated_at cada tercio de
+TALENTO_JOB_STALE_S, aunque un chunk tarde más. Un job sin latido durante
+TALENTO_JOB_STALE_S se da por muerto (su worker cayó): al consultarlo pasa a
+status "error". Los cambios de estado del job solo se aplican si sigue en el
+estado esperado: un job ya expirado no pisa el estado después.
+
+Con TALENTO_JOBS_INLINE=True el job se ejecuta en el hilo que lo encola
+(tests / depuración).
+"""
+
+import json
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+JOB_DDL = """
+    CREATE TABLE IF NOT EXISTS tlt_job (
+        id          TEXT PRIMARY KEY,
+        kind        TEXT NOT NULL,
+        dedupe_key  TEXT,
+        status      TEXT NOT NULL,
+        params      TEXT,
+        progress    TEXT,
+        result      TEXT,
+        error       TEXT,
+        created_at  DATETIME DEFAULT CURRENT_TIMESTAMP,
+        started_at  DATETIME,
+        finished_at DATETIME,
+        updated_at  DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+ACTIVE = ("queued", "running")
+_ACTIVE_SQL = "status IN ('queued', 'running')"
+
+# Un solo job vivo por dedupe_key, también entre workers y peticiones concurrentes
+ACTIVE_UNIQUE_DDL = f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_tlt_job_active_dedupe
+    ON tlt_job(dedupe_key) WHERE dedupe_key IS NOT NULL AND {_ACTIVE_SQL}
+"""
+
+_COLUMNS = ("id", "kind", "dedupe_key", "status", "params", "progress", "result", "error",
+            "created_at", "started_at", "finished_at", "updated_at")
+_JSON_COLUMNS = ("params", "progress", "result")
+
+_ensure_lock = threading.Lock()
+
+
+def _ensure_table():
+    # DDL idempotente: solo se ejecuta al encolar/consultar jobs (no es ruta caliente)
+    with _ensure_lock:
+        with connection.cursor() as cur:
+            cur.execute(JOB_DDL)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_tlt_job_dedupe ON tlt_job(dedupe_key, status)")
+            try:
+                cur.execute(ACTIVE_UNIQUE_DDL)
+            except IntegrityError:
+                # Tablas previas al índice: se quedan los jobs vivos más recientes
+                cur.execute(
+                    f"""
+                    UPDATE tlt_job SET status='error', error='duplicado', finished_at=CURRENT_TIMESTAMP
+                    WHERE {_ACTIVE_SQL} AND dedupe_key IS NOT NULL AND rowid NOT IN (
+                        SELECT MAX(rowid) FROM tlt_job
+                        WHERE {_ACTIVE_SQL} AND dedupe_key IS NOT NULL GROUP BY dedupe_key
+                    )
+                    """
+                )
+                cur.execute(ACTIVE_UNIQUE_DDL)
+
+
+def _stale_s() -> int:
+    return int(getattr(settings, "TALENTO_JOB_STALE_S", 300))
+
+
+def _row_to_dict(row) -> dict:
+    job = dict(zip(_COLUMNS, row))
+    for key in _JSON_COLUMNS:
+        if job[key]:
+            job[key] = json.loads(job[key])
+    return job
+
+
+def _expire_stale(cur, where="", params=()):
+    # El hilo murió con su worker (reinicio, OOM...): nadie marcará el final
+    cur.execute(
+        f"""
+        UPDATE tlt_job
+        SET status='error', error=%s, finished_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP
+        WHERE status IN ({", ".join(["%s"] * len(ACTIVE))})
+          AND COALESCE(updated_at, started_at) < datetime('now', %s) {where}
+        """,
+        [f"sin latido en {_stale_s()} s (worker caído)", *ACTIVE, f"-{_stale_s()} seconds", *params],
+    )
+
+
+def get(job_id: str) -> dict | None:
+    _ensure_table()
+    with connection.cursor() as cur:
+        _expire_stale(cur, "AND id=%s", [job_id])
+        cur.execute(f"SELECT {', '.join(_COLUMNS)} FROM tlt_job WHERE id=%s", [job_id])
+        row = cur.fetchone()
+    return _row_to_dict(row) if row else None
+
+
+def recent(kind: str | None = None, limit: int = 20) -> list:
+    _ensure_table()
+    sql = f"SELECT {', '.join(_COLUMNS)} FROM tlt_job"
+    params = []
+    if kind:
+        sql += " WHERE kind=%s"
+        params.append(kind)
+    sql += " ORDER BY created_at DESC, rowid DESC LIMIT %s"
+    params.append(int(limit))
+    with connection.cursor() as cur:
+        _expire_stale(cur)
+        cur.execute(sql, params)
+        return [_row_to_dict(r) for r in cur.fetchall()]
+
+
+def _update(job_id, expect, stamp=None, **fields) -> bool:
+    """
+    Actualiza el job solo si sigue en el estado expect (p. ej. "running"); False
+    si no (lo expiró _expire_stale). stamp: columna de fecha (started_at /
+    finished_at) a marcar con CURRENT_TIMESTAMP.
+    """
+    sets = "".join(f"{k}=%s, " for k in fields)
+    if stamp:
+        sets += f"{stamp}=CURRENT_TIMESTAMP, "
+    values = [json.dumps(v) if k in _JSON_COLUMNS and v is not None else v for k, v in fields.items()]
+    with connection.cursor() as cur:
+        cur.execute(f"UPDATE tlt_job SET {sets}updated_at=CURRENT_TIMESTAMP WHERE id=%s AND status=%s",
+                    [*values, job_id, expect])
+        return cur.rowcount > 0
+
+
+def _active_for(cur, dedupe_key):
+    cur.execute(
+        f"SELECT id FROM tlt_job WHERE dedupe_key=%s AND {_ACTIVE_SQL} ORDER BY created_at DESC LIMIT 1",
+        [dedupe_key],
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def enqueue(kind: str, fn, params: dict | None = None, dedupe_key: str | None = None):
+    """
+    Registra el job y lo arranca en un hilo: fn(progress) → result (dict),
+    donde progress(dict) guarda el avance. Devuelve (job_id, coalesced).
+    """
+    _ensure_table()
+    job_id = uuid.uuid4().hex
+    try:
+        with transaction.atomic(), connection.cursor() as cur:
+            if dedupe_key:
+                _expire_stale(cur, "AND dedupe_key=%s", [dedupe_key])
+                active = _active_for(cur, dedupe_key)
+                if active:
+                    return active, True
+            # Si otra petición insertó entre medias, salta el índice UNIQUE parcial
+            cur.execute(
+                "INSERT INTO tlt_job (id, kind, dedupe_key, status, params) VALUES (%s, %s, %s, 'queued', %s)",
+                [job_id, kind, dedupe_key, json.dumps(params or {})],
+            )
+    except IntegrityError:
+        with connection.cursor() as cur:
+            active = _active_for(cur, dedupe_key)
+        if active:
+            return active, True
+        raise
+
+    if getattr(settings, "TALENTO_JOBS_INLINE", False):
+        _run(job_id, fn, own_connection=False)
+    else:
+        # El hilo arranca tras el commit del INSERT (por si se encola dentro de una transacción)
+        thread = threading.Thread(target=_run, args=(job_id, fn), name=f"talento-job-{job_id[:8]}", daemon=True)
+        transaction.on_commit(thread.start)
+    return job_id, False
+
+
+def _heartbeat(job_id, stop):
+    # Latido propio (no depende del avance por chunks); conexión de este hilo
+    try:
+        while not stop.wait(max(_stale_s() / 3.0, 1.0)):
+            with connection.cursor() as cur:
+                cur.execute("UPDATE tlt_job SET updated_at=CURRENT_TIMESTAMP WHERE id=%s AND status='running'",
+                            [job_id])
+    except Exception:
+        logger.exception("job %s: falló el latido", job_id)
+    finally:
+        connection.close()
+
+
+def _run(job_id, fn, own_connection=True):
+    stop = threading.Event()
+    try:
+        if not _update(job_id, "queued", stamp="started_at", status="running"):
+            logger.warning("job %s ya no está en cola; no se ejecuta", job_id)
+            return
+        threading.Thread(target=_heartbeat, args=(job_id, stop), name=f"talento-job-hb-{job_id[:8]}",
+                         daemon=True).start()
+        result = fn(lambda progress: _update(job_id, "running", progress=progress))
+        if not _update(job_id, "running", stamp="finished_at", status="done", result=result):
+            logger.warning("job %s terminó, pero ya constaba como %s", job_id, (get(job_id) or {}).get("status"))
+    except Exception as e:
+        logger.exception("job %s falló", job_id)
+        try:
+            _update(job_id, "running", stamp="finished_at", status="error", error=str(e))
+        except Exception:
+            logger.exception("job %s: no se pudo registrar el error", job_id)
+    finally:
+        stop.set()
+        if own_connection:
+            connection.close()
@@ -0,0 +1,118 @@
+# talento_core/core_schema.py
+"""
+Registro de esquema por proceso.
+
+Evita el CREATE TABLE IF NOT EXISTS y las consultas a sqlite_master/PRAGMA
+en cada petición: la existencia de tablas/vistas y sus columnas se lee una
+vez y se cachea hasta que una migración (post_migrate) o una acción de
+administración (p. ej. /api/debug-db?refresh=1) llama a invalidate().
+"""
+
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connection
+
+TLT_RESPUESTA_DDL = """
+    CREATE TABLE IF NOT EXISTS tlt_respuesta (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sesion_id INTEGER NOT NULL,
+        ccp_code TEXT,
+        ejer_code TEXT,
+        item_id TEXT,
+        respuesta TEXT,
+        correcta INTEGER NOT NULL DEFAULT 0 CHECK (correcta IN (0, 1)),
+        tr_ms INTEGER,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class SchemaRegistry:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tables = None   # set de nombres (minúsculas) de tablas y vistas
+        self._columns = {}    # nombre (minúsculas) -> lista de columnas
+        self._ensured = False
+        self.generation = 0   # sube en cada invalidate(); otras cachés lo usan como señal
+
+    # ---- catálogo ----
+    def _names(self) -> set:
+        names = self._tables
+        if names is None:
+            with self._lock:
+                if self._tables is None:
+                    with connection.cursor() as cur:
+                        found = connection.introspection.table_names(cur, include_views=True)
+                    self._tables = {n.lower() for n in found}
+                names = self._tables
+        return names
+
+    def table_exists(self, name: str) -> bool:
+        """True si existe una tabla o vista con ese nombre (sin distinguir mayúsculas)."""
+        return name.lower() in self._names()
+
+    def table_columns(self, name: str) -> list:
+        """Lista de columnas de una tabla/vista ([] si no existe)."""
+        key = name.lower()
+        cols = self._columns.get(key)
+        if cols is None:
+            cols = []
+            if self.table_exists(name):
+                try:
+                    with connection.cursor() as cur:
+                        desc = connection.introspection.get_table_description(cur, name)
+                    cols = [d.name for d in desc]
+                except Exception:
+                    cols = []
+            with self._lock:
+                self._columns[key] = cols
+        return list(cols)
+
+    # ---- DDL mínimo ----
+    def ensure_schema(self):
+        """Crea tlt_respuesta si falta. Solo ejecuta DDL la primera vez por proceso."""
+        if self._ensured:
+            return
+        with self._lock:
+            if self._ensured:
+                return
+            if not self.table_exists("tlt_respuesta"):
+                with connection.cursor() as cur:
+                    cur.execute(TLT_RESPUESTA_DDL)
+                self._tables = None
+            self._ensured = True
+
+    def invalidate(self):
+        """Olvida todo lo cacheado (tras migraciones o cambios de esquema fuera de banda)."""
+        with self._lock:
+            self._tables = None
+            self._columns = {}
+            self._ensured = False
+            self.generation += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "loaded": self._tables is not None,
+            "ensured": self._ensured,
+            "generation": self.generation,
+            "tables": sorted(self._tables or ()),
+        }
+
+
+registry = SchemaRegistry()
+
+table_exists = registry.table_exists
+table_columns = registry.table_columns
+ensure_schema = registry.ensure_schema
+invalidate = registry.invalidate
+
+
+# ---- Señales (conectadas en TalentoCoreConfig.ready) ----
+def on_connection_created(sender, connection, **kwargs):
+    # Primera conexión del proceso: garantizamos el esquema una sola vez
+    if connection.alias == DEFAULT_DB_ALIAS and not registry._ensured:
+        registry.ensure_schema()
+
+
+def on_post_migrate(sender, **kwargs):
+    registry.invalidate()
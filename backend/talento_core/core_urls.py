@@ -14,6 +14,7 @@ urlpatterns = [
     path("api/respuesta", views.create_respuesta, name="create_respuesta"),
     path("api/next-vpm-item", views.api_next_vpm_item, name="api_next_vpm_item"),
     path("api/answer", views.api_answer, name="api_answer"),
+    path("api/answers/batch", views.api_submit_answers_batch, name="api_answers_batch"),
 
     # Debug (vive en core_views)
     path("api/debug-db", core_views.api_debug_db, name="api_debug_db"),
@@ -3,7 +3,7 @@
 from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
-from django.db import connection
+from django.db import connection, transaction
 from django.views.decorators.http import require_http_methods, require_GET
 from django.middleware.csrf import get_token
 
@@ -13,30 +13,29 @@ import random
 
 from typing import Optional
 
+from . import core_catalog, core_schema, core_writebehind, csv_stream
+from .core_ingest import (
+    TLT_COLUMNS, AnswerError, existing_sesion_ids, insert_tlt_rows,
+    insert_tlt_rows_skip_duplicates, parse_answer,
+)
+from .correcta import coerce_correcta, correcta_sql
+
+# Tamaño máximo aceptado por /api/answers/batch
+ANSWERS_BATCH_MAX = 5000
+
 
 # ----------------------------
 # Helpers SQLite sencillos
 # ----------------------------
 
 def _table_exists(name: str) -> bool:
-    """True si existe una tabla o vista con ese nombre."""
-    with connection.cursor() as cur:
-        cur.execute(
-            "SELECT 1 FROM sqlite_master WHERE (type='table' OR type='view') AND name=%s",
-            [name],
-        )
-        return cur.fetchone() is not None
+    """True si existe una tabla o vista con ese nombre (cacheado en core_schema)."""
+    return core_schema.table_exists(name)
 
 
 def _table_columns(name: str):
-    """Devuelve lista de nombres de columna de una tabla/vista sqlite."""
-    try:
-        with connection.cursor() as cur:
-            # Nota: aquí no usamos %s por ser PRAGMA con identificador
-            cur.execute(f"PRAGMA table_info({name});")
-            return [row[1] for row in cur.fetchall()]
-    except Exception:
-        return []
+    """Devuelve lista de nombres de columna de una tabla/vista (cacheado en core_schema)."""
+    return core_schema.table_columns(name)
 
 
 def _q(sql: str, params=None):
@@ -52,20 +51,8 @@ def _q(sql: str, params=None):
     return [dict(zip(cols, r)) for r in rows]
 
 def _ensure_tlt_respuesta_table():
-    with connection.cursor() as cur:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS tlt_respuesta (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sesion_id INTEGER NOT NULL,
-                ccp_code TEXT,
-                ejer_code TEXT,
-                item_id TEXT,
-                respuesta TEXT,
-                correcta INTEGER,
-                tr_ms INTEGER,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+    # DDL solo la primera vez por proceso (ver core_schema.ensure_schema)
+    core_schema.ensure_schema()
 
 def _ensure_perf_indexes():
     with connection.cursor() as cur:
@@ -108,10 +95,11 @@ def play_ui(request):
 # Agregado de progreso
 # ----------------------------
 
-def _rows_union_for_session(sesion_id: int):
+def _groups_for_session(sesion_id: int):
     """
-    Devuelve filas normalizadas:
-      ccp_code, ejer_code, correcta (0/1), tr_ms
+    Agregado por (ccp_code, ejer_code) de la sesión, calculado en SQL:
+    lista de dicts {ccp_code, ejer_code, n, ok, tr_sum}. Solo cruzan a Python
+    los grupos, no las respuestas.
     Une tlt_respuesta (nuevo) + respuesta join item/ref_ccp (legado).
     """
     parts = []
@@ -120,11 +108,7 @@ def _rows_union_for_session(sesion_id: int):
     # Fuente nueva
     if _table_exists("tlt_respuesta"):
         parts.append("""
-            SELECT
-              COALESCE(ccp_code, 'UNK')  AS ccp_code,
-              COALESCE(ejer_code,'UNK')  AS ejer_code,
-              COALESCE(correcta,0)       AS correcta,
-              COALESCE(tr_ms,0)          AS tr_ms
+            SELECT ccp_code, ejer_code, correcta, tr_ms
             FROM tlt_respuesta
             WHERE sesion_id = %s
         """)
@@ -133,11 +117,7 @@ def _rows_union_for_session(sesion_id: int):
     # Legado: respuesta -> item -> ref_ccp (para obtener ccp_code). ejer_code no está en el legado, lo marcamos UNK.
     if _table_exists("respuesta") and _table_exists("item") and _table_exists("ref_ccp"):
         parts.append("""
-            SELECT
-              COALESCE(c.codigo,'UNK')     AS ccp_code,
-              'UNK'                      AS ejer_code,
-              COALESCE(r.correcta,0)     AS correcta,
-              COALESCE(r.rt_ms,0)        AS tr_ms
+            SELECT c.codigo AS ccp_code, 'UNK' AS ejer_code, r.correcta, r.rt_ms AS tr_ms
             FROM respuesta r
             JOIN item    i ON i.id_item = r.id_item
             JOIN ref_ccp c ON c.id_ccp  = i.id_ccp
@@ -145,44 +125,45 @@ def _rows_union_for_session(sesion_id: int):
         """)
         params.append(sesion_id)
 
-    if parts:
-        sql = "\nUNION ALL\n".join(parts)
-        return _q(sql, params)
-
     # Último fallback si solo existiera 'respuesta' sin catálogos
-    if _table_exists("respuesta"):
-        return _q("""
-            SELECT 'UNK' as ccp_code, 'UNK' as ejer_code,
-                   COALESCE(correcta,0) as correcta,
-                   COALESCE(rt_ms,0)    as tr_ms
+    if not parts and _table_exists("respuesta"):
+        parts.append("""
+            SELECT 'UNK' AS ccp_code, 'UNK' AS ejer_code, correcta, rt_ms AS tr_ms
             FROM respuesta
             WHERE id_sesion = %s
-        """, [sesion_id])
+        """)
+        params.append(sesion_id)
 
-    return []
+    if not parts:
+        return []
 
-def _aggregate(rows):
-    if not rows:
+    # Mismas reglas que el antiguo bucle en Python: código vacío → UNK,
+    # acierto solo si correcta es 1/'1', tr_ms truncado a entero (NULL → 0)
+    union_sql = "\nUNION ALL\n".join(parts)
+    return _q(f"""
+        SELECT COALESCE(NULLIF(ccp_code, ''), 'UNK')  AS ccp_code,
+               COALESCE(NULLIF(ejer_code, ''), 'UNK') AS ejer_code,
+               COUNT(*)                                AS n,
+               SUM(CASE WHEN correcta IN (1, '1') THEN 1 ELSE 0 END) AS ok,
+               SUM(COALESCE(CAST(tr_ms AS INTEGER), 0)) AS tr_sum
+        FROM ({union_sql}) u
+        GROUP BY 1, 2
+    """, params)
+
+def _aggregate(groups):
+    if not groups:
         return {"kpis": [], "by_ccp": [], "by_ejer": []}
 
     from collections import defaultdict
     by_ccp = defaultdict(lambda: {"n": 0, "ok": 0, "tr_sum": 0})
-    by_ejer = defaultdict(lambda: {"n": 0, "ok": 0, "tr_sum": 0})
-
-    for r in rows:
-        ccp = r.get("ccp_code") or "UNK"
-        ejer = r.get("ejer_code") or "UNK"
-        ok = 1 if (r.get("correcta") in (1, True, "1")) else 0
-        tr = int(r.get("tr_ms") or 0)
+    by_ejer = {}
 
-        by_ccp[ccp]["n"] += 1
-        by_ccp[ccp]["ok"] += ok
-        by_ccp[ccp]["tr_sum"] += tr
-
-        key_ejer = (ccp, ejer)
-        by_ejer[key_ejer]["n"] += 1
-        by_ejer[key_ejer]["ok"] += ok
-        by_ejer[key_ejer]["tr_sum"] += tr
+    for g in groups:
+        n, ok, tr_sum = int(g["n"]), int(g["ok"] or 0), int(g["tr_sum"] or 0)
+        by_ccp[g["ccp_code"]]["n"] += n
+        by_ccp[g["ccp_code"]]["ok"] += ok
+        by_ccp[g["ccp_code"]]["tr_sum"] += tr_sum
+        by_ejer[(g["ccp_code"], g["ejer_code"])] = {"n": n, "ok": ok, "tr_sum": tr_sum}
 
     def pack(n, ok, tr_sum, ccp=None, ejer=None):
         acierto_pct = round((ok * 100.0 / n), 1) if n else 0.0
@@ -213,10 +194,10 @@ def api_progress(request):
     except Exception:
         return HttpResponseBadRequest("sesion_id inválido")
 
-    rows = _rows_union_for_session(sesion_id)
-    aggr = _aggregate(rows)
+    groups = _groups_for_session(sesion_id)
+    aggr = _aggregate(groups)
     payload = {"sesion_id": sesion_id, **aggr}
-    if not rows:
+    if not groups:
         payload["note"] = "Sin datos. ¿Existen tlt_respuesta/v_respuesta_basic/respuesta?"
     return JsonResponse(payload, status=200)
 
@@ -229,31 +210,32 @@ def api_export_session(request, sesion_id: int):
 
     fmt = (request.GET.get("format") or "json").lower().strip()
 
-    rows = _rows_union_for_session(sesion_id)
-    aggr = _aggregate(rows)
+    groups = _groups_for_session(sesion_id)
+    aggr = _aggregate(groups)
     payload = {"sesion_id": sesion_id, **aggr}
-    if not rows:
+    if not groups:
         payload["note"] = "Export agregado (fallback): no hay tabla per-ítem disponible."
 
     if fmt == "json":
         return JsonResponse(payload, status=200)
 
     if fmt == "csv":
-        import csv, io
-        buf = io.StringIO()
-        w = csv.writer(buf)
-        w.writerow(["sesion_id", "ccp_code", "ejer_code", "n", "acierto_pct", "tr_ms_avg"])
-        for r in payload.get("by_ejer", []):
-            w.writerow([
-                sesion_id,
-                r.get("ccp_code"),
-                r.get("ejer_code"),
-                r.get("n"),
-                r.get("acierto_pct"),
-                r.get("tr_ms_avg"),
-            ])
-        data = buf.getvalue()
-        return HttpResponse(data, content_type="text/csv")
+        return csv_stream.csv_response(
+            request,
+            ["sesion_id", "ccp_code", "ejer_code", "n", "acierto_pct", "tr_ms_avg"],
+            (
+                [
+                    sesion_id,
+                    r.get("ccp_code"),
+                    r.get("ejer_code"),
+                    r.get("n"),
+                    r.get("acierto_pct"),
+                    r.get("tr_ms_avg"),
+                ]
+                for r in payload.get("by_ejer", [])
+            ),
+            content_type="text/csv",
+        )
 
     return HttpResponseBadRequest("format debe ser json|csv")
 
@@ -317,15 +299,10 @@ def api_submit_answer(request):
 
     # 2) Extracción y defaults
     try:
-        sesion_id = int(data.get("sesion_id", 1))
-        ccp_code  = str(data.get("ccp_code", "VPM"))
-        ejer_code = str(data["ejer_code"])
-        item_id   = str(data["item_id"])
-        respuesta = str(data.get("respuesta", "CLICK"))
-        correcta  = int(bool(data.get("correcta", 0)))
-        tr_ms     = int(data.get("tr_ms", 0))
-    except KeyError as e:
-        return HttpResponseBadRequest(f"Falta campo obligatorio: {e}")
+        row = parse_answer(data)
+    except AnswerError as e:
+        return HttpResponseBadRequest(str(e))
+    sesion_id = row[0]
 
     # 3) Validación de sesión si existe tlt_sesion
     if _table_exists("tlt_sesion"):
@@ -333,30 +310,127 @@ def api_submit_answer(request):
             return JsonResponse({"ok": False, "error": f"sesion_id {sesion_id} no existe"}, status=400)
 
     # 4) Garantiza que exista tlt_respuesta
-    with connection.cursor() as cur:
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS tlt_respuesta (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sesion_id INTEGER NOT NULL,
-                ccp_code TEXT,
-                ejer_code TEXT,
-                item_id TEXT,
-                respuesta TEXT,
-                correcta INTEGER,
-                tr_ms INTEGER,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        # 5) INSERT simple (usa lo que vino en el JSON)
-        cur.execute("""
-            INSERT INTO tlt_respuesta
-                (sesion_id, ccp_code, ejer_code, item_id, respuesta, correcta, tr_ms)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, [sesion_id, ccp_code, ejer_code, item_id, respuesta, correcta, tr_ms])
+    _ensure_tlt_respuesta_table()
+
+    # 5) Write-behind (si está activo) o INSERT simple (usa lo que vino en el JSON)
+    buf = core_writebehind.get_buffer()
+    if buf is not None:
+        return _write_behind_ack(buf, buf.submit(("tlt_respuesta", TLT_COLUMNS, [row])), {"ok": True})
+    insert_tlt_rows([row])
 
     return JsonResponse({"ok": True})
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_submit_answers_batch(request):
+    """
+    POST /api/answers/batch
+    Registra N respuestas (de una o varias sesiones) en una sola transacción.
+    Body JSON: [{...}, ...] o {"sesion_id": 1, "answers": [{...}, ...]}
+    (sesion_id a nivel raíz es el valor por defecto de las filas que no lo traen).
+    Devuelve un resultado por fila: {"index", "ok"[, "error"]}; una fila que ya
+    existe (índice único sesion_id, ejer_code, item_id) no se inserta y se marca
+    con error "duplicate" (y cuenta en "duplicates").
+    """
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+    except Exception as e:
+        return HttpResponseBadRequest(f"JSON inválido: {e}")
+
+    default_sesion_id = 1
+    if isinstance(data, dict):
+        answers = data.get("answers")
+        try:
+            default_sesion_id = int(data.get("sesion_id", 1))
+        except (TypeError, ValueError):
+            return HttpResponseBadRequest("sesion_id inválido")
+    else:
+        answers = data
+    if not isinstance(answers, list):
+        return HttpResponseBadRequest("Se esperaba una lista 'answers'")
+    if len(answers) > ANSWERS_BATCH_MAX:
+        return JsonResponse(
+            {"ok": False, "error": f"máximo {ANSWERS_BATCH_MAX} respuestas por lote"}, status=413
+        )
+
+    # 1) Validación de todas las filas en una pasada
+    results = []
+    valid = []  # (index, row)
+    for idx, item in enumerate(answers):
+        try:
+            valid.append((idx, parse_answer(item, default_sesion_id)))
+            results.append({"index": idx, "ok": True})
+        except AnswerError as e:
+            results.append({"index": idx, "ok": False, "error": str(e)})
+
+    # 2) Validación de sesiones con una sola consulta (si existe tlt_sesion)
+    if valid and _table_exists("tlt_sesion"):
+        known = existing_sesion_ids(row[0] for _, row in valid)
+        kept = []
+        for idx, row in valid:
+            if row[0] in known:
+                kept.append((idx, row))
+            else:
+                results[idx] = {"index": idx, "ok": False, "error": f"sesion_id {row[0]} no existe"}
+        valid = kept
+
+    rejected = len(answers) - len(valid)
+    payload = {
+        "ok": rejected == 0,
+        "inserted": len(valid),
+        "rejected": rejected,
+        "results": results,
+    }
+
+    # 3) INSERT multi-fila dentro de una única transacción (o commit agrupado write-behind)
+    if valid:
+        _ensure_tlt_respuesta_table()
+        buf = core_writebehind.get_buffer()
+        if buf is not None:
+            ticket = buf.submit(("tlt_respuesta", TLT_COLUMNS, [row for _, row in valid]))
+            return _write_behind_ack(buf, ticket, payload)
+        with transaction.atomic():
+            flags = insert_tlt_rows_skip_duplicates(row for _, row in valid)
+        duplicates = [idx for (idx, _), ok in zip(valid, flags) if not ok]
+        for idx in duplicates:
+            results[idx] = {"index": idx, "ok": False, "error": "duplicate"}
+        payload.update({
+            "ok": rejected == 0 and not duplicates,
+            "inserted": len(valid) - len(duplicates),
+            "duplicates": len(duplicates),
+        })
+
+    return JsonResponse(payload)
+
+
+def _write_behind_ack(buf, ticket, payload: dict):
+    """
+    Respuesta para filas entregadas al buffer write-behind.
+    async → 202 al encolar (con el ticket para consultar un posible rechazo);
+    sync → 200 tras el commit (503 si falla o expira la espera).
+    """
+    if not buf.sync:
+        return JsonResponse({**payload, "queued": True, "ticket": ticket.id}, status=202)
+    if not ticket.wait(core_writebehind.ack_timeout()):
+        return JsonResponse({"ok": False, "error": "timeout esperando el commit"}, status=503)
+    if ticket.error is not None:
+        return JsonResponse({"ok": False, "error": f"commit fallido: {ticket.error}"}, status=503)
+    return JsonResponse(payload)
+
+
+@require_GET
+def api_answers_ticket(request, ticket: str):
+    """
+    Estado de un envío write-behind async: "ok" (commit hecho), "failed" (con el
+    error; las filas quedan en tlt_writebehind_failed) o "pending" (aún en el
+    buffer). 404 si no consta: en cola en otro worker o perdido.
+    """
+    status = core_writebehind.ticket_status(ticket)
+    if status is None:
+        return JsonResponse({"ok": False, "error": "ticket not found"}, status=404)
+    return JsonResponse({"ok": True, **status})
+
 
 # Alias para compatibilidad con core_urls.py
 @csrf_exempt
@@ -368,6 +442,14 @@ def api_answer(request, *args, **kwargs):
 # Ingesta legacy (tabla 'respuesta')
 # ----------------------------
 
+LEGACY_COLUMNS = ("id_sesion", "id_item", "correcta", "rt_ms")
+
+
+def _legacy_item_codes(id_item: int):
+    """(ccp_code, ejer_code) de un item legacy (índice en memoria core_catalog); ('UNK', 'UNK') si no se resuelve."""
+    return core_catalog.item_codes(id_item)
+
+
 @csrf_exempt
 def create_respuesta(request):
     """
@@ -381,7 +463,7 @@ def create_respuesta(request):
         p = json.loads(request.body.decode("utf-8"))
         id_sesion = int(p.get("id_sesion", p.get("sesion_id", 1)))
         id_item   = int(p.get("id_item",   p.get("item_id", 0)))
-        correcta  = 1 if int(p.get("correcta", 0)) else 0
+        correcta  = coerce_correcta(p.get("correcta", 0))
         rt_ms     = int(p.get("rt_ms", p.get("tr_ms", 0)))
     except Exception as e:
         return HttpResponseBadRequest(f"JSON inválido: {e}")
@@ -398,6 +480,19 @@ def create_respuesta(request):
             )
             """
         )
+        core_schema.invalidate()
+
+    # Write-behind: legacy + duplicado en tlt_respuesta van en el mismo commit agrupado
+    buf = core_writebehind.get_buffer()
+    if buf is not None:
+        _ensure_tlt_respuesta_table()
+        ccp_code, ejer_code = _legacy_item_codes(id_item)
+        ticket = buf.submit(
+            ("respuesta", LEGACY_COLUMNS, [(id_sesion, id_item, correcta, rt_ms)]),
+            ("tlt_respuesta", TLT_COLUMNS,
+             [(id_sesion, ccp_code, ejer_code, str(id_item), "LEGACY", correcta, rt_ms)]),
+        )
+        return _write_behind_ack(buf, ticket, {"ok": True, "persisted": buf.sync})
 
     _q(
         """
@@ -407,54 +502,11 @@ def create_respuesta(request):
         [id_sesion, id_item, correcta, rt_ms],
     )
 
-    # --- duplicar automáticamente en tlt_respuesta (siempre creando tabla si no existe) ---
+    # --- duplicar automáticamente en tlt_respuesta (creando la tabla si no existe) ---
     try:
-        with connection.cursor() as cur:
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tlt_respuesta (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sesion_id INTEGER NOT NULL,
-                    ccp_code TEXT,
-                    ejer_code TEXT,
-                    item_id TEXT,
-                    respuesta TEXT,
-                    correcta INTEGER,
-                    tr_ms INTEGER,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                """
-            )
-            cur.execute(
-                """
-                INSERT INTO tlt_respuesta (
-        sesion_id, ccp_code, ejer_code, item_id, respuesta, correcta, tr_ms, created_at
-    )
-    -- caso ideal: mapeamos por catálogos
-    SELECT
-        %s,
-        COALESCE(c.codigo,'UNK'),
-        COALESCE(s.codigo,'UNK'),
-        CAST(i.id_item AS TEXT),
-        'LEGACY',
-        %s,
-        %s,
-        CURRENT_TIMESTAMP
-    FROM item i
-    LEFT JOIN ref_ccp          c ON c.id_ccp  = i.id_ccp
-    LEFT JOIN ref_submodalidad s ON s.id_submod = i.id_submod
-    WHERE i.id_item = %s
-
-    UNION ALL
-
-    -- fallback: si no existe el item, insertamos igualmente con UNK
-    SELECT
-        %s, 'UNK','UNK', CAST(%s AS TEXT), 'LEGACY', %s, %s, CURRENT_TIMESTAMP
-    WHERE NOT EXISTS (SELECT 1 FROM item WHERE id_item = %s)
-    """,
-    [id_sesion, correcta, rt_ms, id_item,
-     id_sesion, id_item,  correcta, rt_ms, id_item],
-            )
+        _ensure_tlt_respuesta_table()
+        ccp_code, ejer_code = _legacy_item_codes(id_item)
+        insert_tlt_rows([(id_sesion, ccp_code, ejer_code, str(id_item), "LEGACY", correcta, rt_ms)])
     except Exception:
         # tolerante a fallos de duplicación
         pass
@@ -468,6 +520,11 @@ def create_respuesta(request):
 
 def api_debug_db(request):
     out = {}
+    # ?refresh=1 → invalida la caché de esquema (p. ej. tras tocar la DB a mano)
+    if request.GET.get("refresh") in ("1", "true"):
+        core_schema.invalidate()
+    out["schema_cache"] = core_schema.registry.snapshot()
+    out["item_catalog"] = core_catalog.catalog.snapshot()
     with connection.cursor() as cur:
         # ruta del fichero sqlite (si aplica)
         try:
@@ -540,99 +597,154 @@ def qa_final(request):
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
 
-def _backfill_legacy_to_tlt(sesion_id: int | None = None) -> dict:
+# Backfill legacy → tlt: filas de 'respuesta' por chunk (cada chunk es una transacción corta)
+BACKFILL_CHUNK_ROWS = 2000
+
+BACKFILL_STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS tlt_backfill_state (
+        scope      TEXT PRIMARY KEY,
+        last_id    INTEGER NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _backfill_scope(sesion_id) -> str:
+    return "all" if sesion_id is None else f"sesion:{sesion_id}"
+
+
+def _backfill_watermark(scope: str) -> int:
+    # Operación de administración (no de petición caliente): el DDL idempotente no cuesta
+    _q(BACKFILL_STATE_DDL)
+    rows = _q("SELECT last_id FROM tlt_backfill_state WHERE scope=%s", [scope])
+    return rows[0]["last_id"] if rows else 0
+
+
+def _backfill_legacy_to_tlt(sesion_id: int | None = None, chunk_rows: int = BACKFILL_CHUNK_ROWS,
+                            reset: bool = False, progress=None) -> dict:
     """
     Copia filas desde 'respuesta' (legacy) hacia 'tlt_respuesta',
-    mapeando ccp/ejer por catálogos. Evita duplicados y respeta FK a tlt_sesion.
+    mapeando ccp/ejer con el índice de catálogos (core_catalog). Evita duplicados y respeta FK a tlt_sesion.
     Si sesion_id es None, procesa todas las sesiones existentes en tlt_sesion (si aplica).
+
+    Recorre 'respuesta' por chunks de id_respuesta (keyset) desde la marca de agua
+    guardada en tlt_backfill_state para el ámbito ("all" o "sesion:<id>"), así que
+    una segunda ejecución solo toca filas legacy nuevas. Cada chunk (inserción +
+    avance de la marca) es una transacción propia: el lock de escritura se libera
+    entre chunks. reset=True vuelve a recorrer desde el principio.
+    Las filas saltadas por el FK (sesión aún sin tlt_sesion) retienen la marca
+    justo antes de la primera de ellas: la siguiente ejecución las vuelve a
+    intentar y el filtro anti-duplicados evita copiar dos veces el resto.
+    progress(dict), si se pasa, recibe el avance tras cada chunk (lo usa core_jobs).
     """
     if not _table_exists("respuesta"):
-        return {"inserted": 0, "before": 0, "after": 0, "note": "No existe 'respuesta'."}
+        return {"inserted": 0, "scanned": 0, "chunks": 0, "note": "No existe 'respuesta'."}
 
     _ensure_tlt_respuesta_table()
     _ensure_perf_indexes()
 
-    # Contador previo para estimar insertados
-    before = _q(
-        f"SELECT COUNT(*) AS n FROM tlt_respuesta {'WHERE sesion_id=%s' if sesion_id is not None else ''}",
-        [sesion_id] if sesion_id is not None else []
-    )
-    before_n = before[0]["n"] if before else 0
+    scope = _backfill_scope(sesion_id)
+    last_id = _backfill_watermark(scope)
+    if reset:
+        last_id = 0
 
-    # Armamos filtros dinámicos para el WHERE
-    filters = []
+    # Filtros del tramo (id_respuesta en (lo, hi])
+    filters = ["r.id_respuesta > %s", "r.id_respuesta <= %s"]
     params = []
-
     if sesion_id is not None:
         filters.append("r.id_sesion = %s")
         params.append(sesion_id)
 
     # Si existe tlt_sesion, respetamos el FK: solo insertar sesiones válidas
-    if _table_exists("tlt_sesion"):
-        filters.append("EXISTS (SELECT 1 FROM tlt_sesion s WHERE s.id = r.id_sesion)")
+    check_fk = _table_exists("tlt_sesion")
+    fk_sql = "EXISTS (SELECT 1 FROM tlt_sesion s WHERE s.id = r.id_sesion)"
+    if check_fk:
+        filters.append(fk_sql)
+    # Filas del tramo saltadas por el FK: primera id por sesión ausente
+    missing_sql = f"""
+        SELECT r.id_sesion, MIN(r.id_respuesta)
+        FROM respuesta r
+        WHERE {" AND ".join(filters[:2 + (sesion_id is not None)])} AND NOT {fk_sql}
+        GROUP BY r.id_sesion
+    """
 
-    # Filtro anti-duplicados (mismo criterio que antes)
-    nx = """
+    # Filtro anti-duplicados (mismo criterio que antes), acotado a las filas del chunk
+    filters.append(f"""
         NOT EXISTS (
           SELECT 1 FROM tlt_respuesta t
           WHERE t.sesion_id = r.id_sesion
             AND t.item_id   = CAST(r.id_item AS TEXT)
             AND t.tr_ms     = COALESCE(r.rt_ms,0)
-            AND t.correcta  = COALESCE(r.correcta,0)
+            AND t.correcta  = {correcta_sql('r.correcta')}
             AND t.respuesta = 'LEGACY'
         )
+    """)
+    select_sql = f"""
+        SELECT r.id_sesion, r.id_item,
+               {correcta_sql('r.correcta')},
+               COALESCE(r.rt_ms, 0)
+        FROM respuesta r
+        WHERE {" AND ".join(filters)}
+        ORDER BY r.id_respuesta
     """
-    filters.append(nx)
-
-    where_clause = ("WHERE " + " AND ".join(filters)) if filters else ""
-
-    sql = f"""
-        INSERT INTO tlt_respuesta (
-          sesion_id, ccp_code, ejer_code, item_id, respuesta, correcta, tr_ms, created_at
+    bound_sql = f"""
+        SELECT MAX(id_respuesta), COUNT(*) FROM (
+            SELECT id_respuesta FROM respuesta
+            WHERE id_respuesta > %s {"AND id_sesion = %s" if sesion_id is not None else ""}
+            ORDER BY id_respuesta
+            LIMIT %s
         )
-        SELECT
-          r.id_sesion,
-          COALESCE(c.codigo, 'UNK')        AS ccp_code,
-          COALESCE(s.codigo, 'UNK')        AS ejer_code,
-          CAST(r.id_item AS TEXT)          AS item_id,
-          'LEGACY'                         AS respuesta,
-          COALESCE(r.correcta, 0)          AS correcta,
-          COALESCE(r.rt_ms, 0)             AS tr_ms,
-          CURRENT_TIMESTAMP
-        FROM respuesta r
-        LEFT JOIN item i              ON i.id_item   = r.id_item
-        LEFT JOIN ref_ccp c           ON c.id_ccp    = i.id_ccp
-        LEFT JOIN ref_submodalidad s  ON s.id_submod = i.id_submod
-        {where_clause}
     """
 
-    with connection.cursor() as cur:
-        cur.execute(sql, params)
-
-    after = _q(
-        f"SELECT COUNT(*) AS n FROM tlt_respuesta {'WHERE sesion_id=%s' if sesion_id is not None else ''}",
-        [sesion_id] if sesion_id is not None else []
-    )
-    after_n = after[0]["n"] if after else 0
-
-    # Métrica opcional: cuántas sesiones legacy no existen en tlt_sesion (si aplica)
-    missing = []
-    if _table_exists("tlt_sesion"):
-        q_missing = """
-            SELECT DISTINCT r.id_sesion AS sesion_id
-            FROM respuesta r
-            LEFT JOIN tlt_sesion s ON s.id = r.id_sesion
-            WHERE s.id IS NULL
-        """
-        mp = []
-        if sesion_id is not None:
-            q_missing += " AND r.id_sesion = %s"
-            mp.append(sesion_id)
-        missing = [row["sesion_id"] for row in _q(q_missing, mp)]
-
-    out = {"inserted": max(0, after_n - before_n), "before": before_n, "after": after_n}
+    # ccp/ejer se resuelven con el índice en memoria (sin JOIN a catálogos)
+    codes = core_catalog.catalog.mapping()
+    inserted = scanned = chunks = 0
+    start_id = last_id
+    missing = {}    # sesion_id → primera id_respuesta saltada por el FK
+    watermark = last_id
+    target_id = _q("SELECT COALESCE(MAX(id_respuesta), 0) AS m FROM respuesta")[0]["m"] if progress else 0
+    while True:
+        with transaction.atomic():
+            with connection.cursor() as cur:
+                cur.execute(bound_sql, [last_id, *params, chunk_rows])
+                hi, n = cur.fetchone()
+                if not n:
+                    break
+                cur.execute(select_sql, [last_id, hi, *params])
+                legacy = cur.fetchall()
+                inserted += insert_tlt_rows(
+                    (id_sesion, *(codes.get(id_item) or _legacy_item_codes(id_item)),
+                     str(id_item), "LEGACY", correcta, rt_ms)
+                    for id_sesion, id_item, correcta, rt_ms in legacy
+                )
+                if check_fk:
+                    cur.execute(missing_sql, [last_id, hi, *params])
+                    for id_sesion, first_id in cur.fetchall():
+                        missing.setdefault(id_sesion, first_id)
+                watermark = min(missing.values()) - 1 if missing else hi
+                cur.execute(
+                    """
+                    INSERT INTO tlt_backfill_state (scope, last_id, updated_at)
+                    VALUES (%s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT(scope) DO UPDATE SET last_id=excluded.last_id, updated_at=excluded.updated_at
+                    """,
+                    [scope, watermark],
+                )
+        scanned += n
+        chunks += 1
+        last_id = hi
+        if progress:
+            span = max(target_id - start_id, 1)
+            progress({
+                "inserted": inserted, "scanned": scanned, "chunks": chunks, "watermark": last_id,
+                "target_id": target_id, "pct": round(min(100.0, (last_id - start_id) * 100.0 / span), 1),
+            })
+
+    out = {"inserted": inserted, "scanned": scanned, "chunks": chunks, "watermark": watermark, "scope": scope}
+
+    # Sesiones legacy de los tramos recorridos que no existen en tlt_sesion
     if missing:
-        out["skipped_sessions_missing_in_tlt_sesion"] = missing
+        out["skipped_sessions_missing_in_tlt_sesion"] = sorted(missing)
     return out
 
 @csrf_exempt
@@ -642,6 +754,7 @@ def api_backfill_legacy_to_tlt(request):
     POST /api/backfill
     Body JSON opcional: {"sesion_id": 1} -> limita a esa sesión
     Sin body o sin sesion_id -> procesa todas.
+    {"reset": true} -> ignora la marca de agua y recorre 'respuesta' desde el principio.
     """
     # 1) Parseo del body (tolerante a vacío / inválido)
     try:
@@ -657,14 +770,13 @@ def api_backfill_legacy_to_tlt(request):
         except Exception:
             return HttpResponseBadRequest("sesion_id inválido")
 
-    # 3) Ejecuta backfill
-    stats = _backfill_legacy_to_tlt(sesion_id)
+    # 3) Ejecuta backfill (incremental desde la marca de agua del ámbito)
+    stats = _backfill_legacy_to_tlt(sesion_id, reset=bool(payload.get("reset")))
 
     # 4) Hook de vista previa: si viene sesion_id, devolvemos agregado
     preview = None
     if sesion_id is not None:
-        rows = _rows_union_for_session(sesion_id)
-        aggr = _aggregate(rows)
+        aggr = _aggregate(_groups_for_session(sesion_id))
         preview = {"sesion_id": sesion_id, **aggr}
 
     # 5) Respuesta
@@ -0,0 +1,300 @@
+# talento_core/core_writebehind.py
+"""
+Buffer write-behind (opcional) para la ingesta de respuestas.
+
+Las vistas de ingesta entregan filas ya validadas; un hilo de fondo las
+escribe en commits agrupados, acotados por tamaño (TALENTO_WRITE_BEHIND_MAX_ROWS)
+y por antigüedad (TALENTO_WRITE_BEHIND_MAX_AGE_MS).
+
+Modos (settings.TALENTO_WRITE_BEHIND):
+  - "off"   → sin buffer: cada petición escribe en su propia transacción.
+  - "async" → se responde al encolar (menor latencia; se pierde lo encolado si el proceso muere).
+  - "sync"  → se responde tras el commit del grupo que contiene la fila ("ack after flush").
+
+Al terminar el proceso (atexit) se vacía el buffer antes de salir.
+
+Si el commit agrupado falla (p. ej. una fila viola un índice o un CHECK), se
+reintenta envío a envío: solo falla el envío culpable. Su error llega a su
+ticket (modo sync → respuesta de error) y queda en tlt_writebehind_failed con
+sus filas.
+
+En modo async el cliente recibe el id de ticket y consulta su estado con
+ticket_status() (GET /api/answers/tickets/<ticket>): "ok" solo si el commit
+quedó anotado en tlt_writebehind_ticket (misma transacción que las filas),
+"failed", "pending" si sigue en el buffer de este proceso, o None si no consta
+(en cola en otro worker, o perdido si el proceso murió antes de vaciarse).
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .core_ingest import insert_rows
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "async", "sync")
+
+FAILED_DDL = """
+    CREATE TABLE IF NOT EXISTS tlt_writebehind_failed (
+        ticket     TEXT PRIMARY KEY,
+        error      TEXT,
+        parts      TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+TICKET_DDL = """
+    CREATE TABLE IF NOT EXISTS tlt_writebehind_ticket (
+        ticket     TEXT PRIMARY KEY,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Los tickets confirmados se conservan un día (se purgan desde el hilo escritor)
+TICKET_KEEP = "-1 day"
+TICKET_PRUNE_S = 3600
+
+
+class FlushTicket:
+    """Resguardo de un envío: permite esperar al commit y conocer el error, si lo hubo."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self._done = threading.Event()
+        self.error = None
+
+    def _resolve(self, error=None):
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+
+class WriteBehindBuffer:
+    def __init__(self, max_rows=200, max_age_ms=50, sync=False):
+        self.max_rows = max(1, int(max_rows))
+        self.max_age = max(1, int(max_age_ms)) / 1000.0
+        self.sync = sync
+        self._cond = threading.Condition()
+        self._pending = []      # [([(table, columns, rows), ...], ticket)]
+        self._n_pending = 0
+        self._oldest = None     # monotonic del primer envío pendiente
+        self._unresolved = set()  # ids de ticket encolados o en escritura
+        self._ready = False     # TICKET_DDL ya ejecutado por el hilo escritor
+        self._pruned_at = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="talento-write-behind", daemon=True)
+        self._thread.start()
+
+    def submit(self, *parts) -> FlushTicket:
+        """
+        Encola una o varias partes (tabla, columnas, filas).
+        Todas las partes de un mismo envío van en el mismo commit.
+        """
+        ticket = FlushTicket()
+        parts = [(table, tuple(columns), list(rows)) for table, columns, rows in parts]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind buffer cerrado")
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            self._pending.append((parts, ticket))
+            self._unresolved.add(ticket.id)
+            self._n_pending += sum(len(rows) for _, _, rows in parts)
+            # Despertamos al escritor al abrir un grupo (arranca el reloj) o al llenarlo
+            if first or self._n_pending >= self.max_rows:
+                self._cond.notify()
+        return ticket
+
+    def is_pending(self, ticket_id) -> bool:
+        with self._cond:
+            return ticket_id in self._unresolved
+
+    def flush(self, timeout=None) -> bool:
+        """Fuerza el vaciado de lo pendiente y espera a su commit."""
+        with self._cond:
+            if not self._pending:
+                return True
+            ticket = self._pending[-1][1]
+            self._oldest = 0.0
+            self._cond.notify()
+        return ticket.wait(timeout)
+
+    def close(self, timeout=10.0):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    # ---- hilo de escritura ----
+    def _take_batch(self):
+        with self._cond:
+            while True:
+                if self._pending:
+                    age = time.monotonic() - self._oldest
+                    if self._closed or self._n_pending >= self.max_rows or age >= self.max_age:
+                        break
+                    self._cond.wait(self.max_age - age)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+            batch, self._pending, self._n_pending = self._pending, [], 0
+            return batch
+
+    def _run(self):
+        try:
+            while True:
+                batch = self._take_batch()
+                if batch is None:
+                    return
+                try:
+                    self._write(batch)
+                finally:
+                    with self._cond:
+                        self._unresolved.difference_update(t.id for _, t in batch)
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        # Agrupamos por (tabla, columnas) para minimizar sentencias dentro de un único commit
+        grouped = {}
+        for parts, _ in batch:
+            for table, columns, rows in parts:
+                grouped.setdefault((table, columns), []).extend(rows)
+        try:
+            with transaction.atomic():
+                for (table, columns), rows in grouped.items():
+                    insert_rows(table, columns, rows)
+                self._commit_tickets([ticket for _, ticket in batch])
+        except Exception:
+            # Un envío malo no arrastra a los demás: reintento envío a envío
+            logger.warning("write-behind: falló el commit agrupado de %s envíos; reintento uno a uno",
+                           len(batch), exc_info=True)
+            for parts, ticket in batch:
+                self._write_one(parts, ticket)
+            return
+        for _, ticket in batch:
+            ticket._resolve()
+
+    def _write_one(self, parts, ticket):
+        try:
+            with transaction.atomic():
+                for table, columns, rows in parts:
+                    insert_rows(table, columns, rows)
+                self._commit_tickets([ticket])
+        except Exception as e:
+            logger.exception("write-behind: envío %s rechazado", ticket.id)
+            _record_failure(ticket.id, e, parts)
+            ticket._resolve(e)
+        else:
+            ticket._resolve()
+
+    def _commit_tickets(self, tickets):
+        # Dentro de la transacción de las filas: "ok" solo si el commit se hizo
+        with connection.cursor() as cur:
+            if not self._ready:
+                cur.execute(TICKET_DDL)
+                self._ready = True
+            cur.executemany(
+                "INSERT OR IGNORE INTO tlt_writebehind_ticket (ticket) VALUES (%s)",
+                [[t.id] for t in tickets],
+            )
+            now = time.monotonic()
+            if now - self._pruned_at >= TICKET_PRUNE_S:
+                self._pruned_at = now
+                cur.execute("DELETE FROM tlt_writebehind_ticket WHERE created_at < datetime('now', %s)",
+                            [TICKET_KEEP])
+
+
+def _record_failure(ticket_id, error, parts):
+    """Guarda el envío rechazado (filas incluidas) para que no se pierda en modo async."""
+    try:
+        with connection.cursor() as cur:
+            cur.execute(FAILED_DDL)
+            cur.execute(
+                "INSERT OR REPLACE INTO tlt_writebehind_failed (ticket, error, parts) VALUES (%s, %s, %s)",
+                [ticket_id, str(error), json.dumps(
+                    [{"table": t, "columns": list(c), "rows": r} for t, c, r in parts], default=str)],
+            )
+    except Exception:
+        logger.exception("write-behind: no se pudo registrar el fallo del envío %s", ticket_id)
+
+
+def failure(ticket_id: str) -> dict | None:
+    """{ticket, error, created_at} si el envío fue rechazado; None si no consta fallo."""
+    with connection.cursor() as cur:
+        cur.execute(FAILED_DDL)
+        cur.execute(
+            "SELECT ticket, error, created_at FROM tlt_writebehind_failed WHERE ticket = %s", [ticket_id]
+        )
+        row = cur.fetchone()
+    return {"ticket": row[0], "error": row[1], "created_at": str(row[2])} if row else None
+
+
+def ticket_status(ticket_id: str) -> dict | None:
+    """
+    {"status": "ok" | "failed" | "pending", ...} de un envío, o None si este
+    proceso no lo conoce (en cola en otro worker, o perdido).
+    """
+    failed = failure(ticket_id)
+    if failed is not None:
+        return {"status": "failed", **failed}
+    with connection.cursor() as cur:
+        cur.execute(TICKET_DDL)
+        cur.execute("SELECT created_at FROM tlt_writebehind_ticket WHERE ticket = %s", [ticket_id])
+        row = cur.fetchone()
+    if row:
+        return {"status": "ok", "ticket": ticket_id, "created_at": str(row[0])}
+    if _buffer is not None and _buffer.is_pending(ticket_id):
+        return {"status": "pending", "ticket": ticket_id}
+    return None
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Buffer del proceso según settings, o None si TALENTO_WRITE_BEHIND='off'."""
+    global _buffer
+    mode = getattr(settings, "TALENTO_WRITE_BEHIND", "off")
+    if mode not in MODES or mode == "off":
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = WriteBehindBuffer(
+                    max_rows=getattr(settings, "TALENTO_WRITE_BEHIND_MAX_ROWS", 200),
+                    max_age_ms=getattr(settings, "TALENTO_WRITE_BEHIND_MAX_AGE_MS", 50),
+                    sync=(mode == "sync"),
+                )
+    return _buffer
+
+
+def shutdown():
+    """Vacía y detiene el buffer (idempotente)."""
+    global _buffer
+    with _buffer_lock:
+        buf, _buffer = _buffer, None
+    if buf is not None:
+        buf.close()
+
+
+atexit.register(shutdown)
+
+
+def ack_timeout() -> float:
+    return getattr(settings, "TALENTO_WRITE_BEHIND_ACK_TIMEOUT_MS", 5000) / 1000.0
@@ -0,0 +1,37 @@
+# talento_core/correcta.py
+"""
+Regla única de correcta → 0/1 (tlt_respuesta.correcta tiene CHECK 0/1).
+
+Sin dependencias de Django: la importan la API (core_ingest), el backfill
+legacy (en SQL, correcta_sql) y scripts/ingest_jsonl_to_sqlite.py, y a través
+de este el modo directo de play-ui. Así una respuesta se guarda igual entre
+por donde entre.
+"""
+
+CORRECTA_TRUE = frozenset({"1", "t", "true", "y", "yes", "s", "si", "sí"})
+CORRECTA_FALSE = frozenset({"", "0", "f", "false", "n", "no"})
+
+
+def coerce_correcta(value) -> int:
+    """Normaliza correcta a 0/1. ValueError si el valor no se puede interpretar."""
+    if value is None:
+        return 0
+    if isinstance(value, (bool, int, float)):
+        return 1 if value else 0
+    text = str(value).strip().lower()
+    if text in CORRECTA_TRUE:
+        return 1
+    if text in CORRECTA_FALSE:
+        return 0
+    raise ValueError(f"correcta no válida: {value!r}")
+
+
+def correcta_sql(expr: str) -> str:
+    """
+    El mismo criterio en SQL, para columnas con tipos mezclados (tabla legacy).
+    SQL no puede rechazar: lo que no se reconoce cuenta como 0. LOWER de SQLite
+    solo baja ASCII, de ahí la variante 'sÍ'.
+    """
+    trues = ", ".join(f"'{v}'" for v in sorted(CORRECTA_TRUE | {"sÍ"}))
+    return (f"CASE WHEN typeof({expr}) IN ('integer', 'real') THEN ({expr} != 0) "
+            f"WHEN LOWER(TRIM({expr})) IN ({trues}) THEN 1 ELSE 0 END")
@@ -0,0 +1,161 @@
+# talento_core/csv_stream.py
+"""
+Exportaciones CSV (y NDJSON) en streaming, compartidas por las vistas del panel y del core.
+
+- Lectura por bloques (fetchmany) sobre connection.chunked_cursor(): cursor de
+  servidor en PostgreSQL; en SQLite el propio cursor ya avanza paso a paso.
+- csv.writer / json escriben en un buffer pequeño que se vacía y reutiliza cada
+  FLUSH_BYTES: la memoria por export no depende del tamaño del resultado.
+- La cabecera CSV sale antes de ejecutar la consulta (primer byte inmediato).
+- Gzip si el cliente lo acepta (Accept-Encoding), sin middleware.
+- ZIP en streaming (zip_response): cada entrada se comprime a medida que
+  llegan sus bytes; ni el archivo ni sus entradas se guardan enteros.
+"""
+
+import csv
+import io
+import json
+import re
+import zipfile
+import zlib
+
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header
+
+FETCH_SIZE = 1000
+FLUSH_BYTES = 64 * 1024
+
+_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+def accepts_gzip(request) -> bool:
+    return bool(_ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")))
+
+
+def iter_query(sql, params=None, size=FETCH_SIZE):
+    """Filas (tuplas) de una consulta, leídas de size en size."""
+    with connection.chunked_cursor() as cur:
+        cur.execute(sql, params or [])
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
+
+
+def iter_csv(header, rows, flush_bytes=FLUSH_BYTES):
+    """Bytes UTF-8 del CSV: la cabecera sola y después bloques de ~flush_bytes."""
+    buf = io.StringIO(newline="")
+    writer = csv.writer(buf)
+
+    def drain():
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate(0)
+        return data
+
+    if header:
+        writer.writerow(header)
+        yield drain()
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= flush_bytes:
+            yield drain()
+    if buf.tell():
+        yield drain()
+
+
+def iter_ndjson(columns, rows, flush_bytes=FLUSH_BYTES):
+    """Bytes UTF-8 de un objeto JSON por línea ({columna: valor}), por bloques."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+        buf.write("\n")
+        if buf.tell() >= flush_bytes:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _gzip(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    first = True
+    for chunk in chunks:
+        # El primer bloque (cabecera) se fuerza a salir: no esperar al compresor
+        data = z.compress(chunk) + (z.flush(zlib.Z_SYNC_FLUSH) if first else b"")
+        first = False
+        if data:
+            yield data
+    yield z.flush()
+
+
+def _response(request, chunks, content_type, filename):
+    gzip = accepts_gzip(request)
+    resp = StreamingHttpResponse(_gzip(chunks) if gzip else chunks, content_type=content_type)
+    if gzip:
+        resp["Content-Encoding"] = "gzip"
+    patch_vary_headers(resp, ("Accept-Encoding",))
+    if filename:
+        resp["Content-Disposition"] = content_disposition_header(True, filename)
+    return resp
+
+
+def csv_response(request, header, rows, filename=None, content_type="text/csv; charset=utf-8"):
+    """
+    StreamingHttpResponse con el CSV de rows (iterable de secuencias; puede ser
+    perezoso, p. ej. iter_query). Con filename → Content-Disposition attachment
+    (filename*=utf-8'' si el nombre no es ASCII).
+    """
+    return _response(request, iter_csv(header, rows), content_type, filename)
+
+
+def ndjson_response(request, columns, rows, filename=None):
+    """Igual que csv_response, pero una línea JSON por fila."""
+    return _response(request, iter_ndjson(columns, rows), "application/x-ndjson; charset=utf-8", filename)
+
+
+class _ZipSink:
+    """Destino sin seek para ZipFile: guarda lo escrito hasta que se recoge."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries):
+    """
+    Bytes de un ZIP (deflate) con entries: iterable de (nombre, iterable de bytes).
+    Sin seek, ZipFile escribe tamaños y CRC en un descriptor tras cada entrada.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        for name, chunks in entries:
+            with zf.open(name, "w", force_zip64=True) as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()  # directorio central
+
+
+def zip_response(entries, filename):
+    resp = StreamingHttpResponse(iter_zip(entries), content_type="application/zip")
+    resp["Content-Disposition"] = content_disposition_header(True, filename)
+    return resp
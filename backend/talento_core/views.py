@@ -23,6 +23,7 @@ for _name in [
     "api_export_session",
     "api_next_vpm_item",
     "api_submit_answer",
+    "api_submit_answers_batch",
     "create_respuesta",
     "play_ui",
     "api_debug_db",
@@ -62,6 +63,7 @@ __all__ = [
     "api_export_session",
     "api_next_vpm_item",
     "api_submit_answer",
+    "api_submit_answers_batch",
     "create_respuesta",
     "play_ui",
     "api_debug_db",
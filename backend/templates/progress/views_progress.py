@@ -1,8 +1,9 @@
 # progress/views.py
-from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, Http404
+from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.http import require_GET
 from django.db import connection
-from django.utils.encoding import smart_str
+
+from talento_core import core_schema, csv_stream
 
 # ------------- helpers -------------
 def dictfetchall(cursor):
@@ -10,19 +11,8 @@ def dictfetchall(cursor):
     return [dict(zip(cols, row)) for row in cursor.fetchall()]
 
 def _table_exists(name: str) -> bool:
-    # funciona en SQLite y Postgres
-    with connection.cursor() as c:
-        try:
-            c.execute("""
-                SELECT 1 FROM (
-                    SELECT table_name AS name FROM information_schema.tables
-                    UNION ALL
-                    SELECT name FROM sqlite_master WHERE type IN ('table','view')
-                ) t WHERE lower(t.name)=lower(%s) LIMIT 1
-            """, [name])
-            return c.fetchone() is not None
-        except Exception:
-            return False
+    # funciona en SQLite y Postgres (introspección de Django, cacheada por proceso)
+    return core_schema.table_exists(name)
 
 def _pick_source():
     # si hay vista v_respuesta_basic la usamos; si no, tabla respuesta
@@ -129,7 +119,7 @@ def api_export_session(request, sesion_id: str):
     fmt = request.GET.get("format", "json").lower()
     src = _pick_source()
 
-    # Cargamos todo lo de la sesión
+    # Filas de la sesión (orden cronológico)
     sql = f"""
         SELECT sesion_id, item_id, ccp_code,
                CASE WHEN correcta IN (1, '1', 't', 'true') THEN 1 ELSE 0 END AS correcta,
@@ -146,29 +136,17 @@ def api_export_session(request, sesion_id: str):
         ORDER BY COALESCE(ts, '1970-01-01') ASC, item_id ASC
     """
 
-    with connection.cursor() as c:
-        c.execute(sql, [sesion_id])
-        rows = dictfetchall(c)
-
     if fmt == "json":
+        with connection.cursor() as c:
+            c.execute(sql, [sesion_id])
+            rows = dictfetchall(c)
         return JsonResponse({"sesion_id": int(sesion_id), "rows": rows},
                             json_dumps_params={"ensure_ascii": False})
 
-    # CSV streaming
-    def row_iter():
-        header = ["sesion_id", "item_id", "ccp_code", "correcta", "tr_ms", "ts"]
-        yield ",".join(header) + "\n"
-        for r in rows:
-            vals = [
-                str(r.get("sesion_id") or ""),
-                smart_str(r.get("item_id") or ""),
-                smart_str(r.get("ccp_code") or ""),
-                str(1 if (r.get("correcta") in (1, "1", True)) else 0),
-                str(r.get("tr_ms") or ""),
-                smart_str(r.get("ts") or ""),
-            ]
-            yield ",".join(v.replace(",", "␟") for v in vals) + "\n"
-
-    resp = StreamingHttpResponse(row_iter(), content_type="text/csv; charset=utf-8")
-    resp["Content-Disposition"] = f'attachment; filename="talento_session_{sesion_id}.csv"'
-    return resp
+    # CSV streaming: filas por bloques, sin cargar la sesión entera
+    return csv_stream.csv_response(
+        request,
+        ["sesion_id", "item_id", "ccp_code", "correcta", "tr_ms", "ts"],
+        csv_stream.iter_query(sql, [sesion_id]),
+        filename=f"talento_session_{sesion_id}.csv",
+    )
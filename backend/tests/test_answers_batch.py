@@ -0,0 +1,65 @@
+import json
+import pytest
+from django.db import connection
+
+pytestmark = pytest.mark.django_db
+
+
+def _count(sesion_id, item_prefix):
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM tlt_respuesta WHERE sesion_id=%s AND item_id LIKE %s",
+            [sesion_id, item_prefix + "%"],
+        )
+        return cur.fetchone()[0]
+
+
+def _post(client, body):
+    return client.post("/api/answers/batch", data=json.dumps(body), content_type="application/json")
+
+
+def test_batch_inserts_valid_rows_and_reports_each(client):
+    answers = [
+        {"ejer_code": "VPM_CFANT_S", "item_id": f"batch_ok_{i}", "correcta": i % 2, "tr_ms": 400 + i}
+        for i in range(3)
+    ]
+    answers.insert(1, {"ejer_code": "VPM_CFANT_S"})  # sin item_id
+    r = _post(client, {"sesion_id": 2, "answers": answers})
+    assert r.status_code == 200
+    js = r.json()
+    assert js["inserted"] == 3 and js["rejected"] == 1 and js["ok"] is False
+    assert [x["ok"] for x in js["results"]] == [True, False, True, True]
+    assert "item_id" in js["results"][1]["error"]
+    assert _count(2, "batch_ok_") == 3
+
+
+def test_batch_accepts_bare_list(client):
+    r = _post(client, [{"sesion_id": 2, "ejer_code": "E", "item_id": "batch_list_1"}])
+    assert r.status_code == 200
+    assert r.json()["ok"] is True
+    assert _count(2, "batch_list_") == 1
+
+
+def test_batch_rejects_non_list(client):
+    r = _post(client, {"answers": "nope"})
+    assert r.status_code == 400
+
+
+def test_batch_marks_duplicates_instead_of_failing(client):
+    # Índice único acotado a esta sesión (la BD de pruebas trae duplicados históricos)
+    with connection.cursor() as cur:
+        cur.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_test_batch_unique "
+            "ON tlt_respuesta (sesion_id, ejer_code, item_id) WHERE sesion_id = 2 AND item_id LIKE 'batch_dup_%'"
+        )
+    first = _post(client, {"sesion_id": 2, "answers": [{"ejer_code": "E", "item_id": "batch_dup_1"}]})
+    assert first.json()["inserted"] == 1
+
+    answers = [{"ejer_code": "E", "item_id": f"batch_dup_{i}"} for i in (1, 2, 2, 3)]
+    r = _post(client, {"sesion_id": 2, "answers": answers})
+    assert r.status_code == 200
+    js = r.json()
+    assert js["inserted"] == 2 and js["duplicates"] == 2 and js["ok"] is False
+    assert [x["ok"] for x in js["results"]] == [False, True, False, True]
+    assert js["results"][0]["error"] == "duplicate"
+    assert _count(2, "batch_dup_") == 3
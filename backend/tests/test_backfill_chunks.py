@@ -0,0 +1,52 @@
+import pytest
+from django.db import connection
+
+from talento_core.core_views import _backfill_legacy_to_tlt
+
+pytestmark = pytest.mark.django_db
+
+
+def _legacy(sesion_id, n, rt_base):
+    with connection.cursor() as cur:
+        for i in range(n):
+            cur.execute(
+                "INSERT INTO respuesta (id_sesion, id_item, correcta, rt_ms) VALUES (%s, %s, %s, %s)",
+                [sesion_id, 1 + i % 5, i % 2, rt_base + i],
+            )
+
+
+def test_backfill_runs_in_chunks_and_resumes_from_watermark():
+    _backfill_legacy_to_tlt(1)  # alinea la marca de agua con lo ya existente
+    _legacy(1, 7, 90000)
+    out = _backfill_legacy_to_tlt(1, chunk_rows=3)
+    assert out["inserted"] == 7
+    assert out["scanned"] == 7 and out["chunks"] == 3
+
+    # Segunda pasada: nada nuevo por encima de la marca
+    again = _backfill_legacy_to_tlt(1, chunk_rows=3)
+    assert again == {**again, "inserted": 0, "scanned": 0, "chunks": 0}
+
+    _legacy(1, 2, 95000)
+    assert _backfill_legacy_to_tlt(1, chunk_rows=3)["inserted"] == 2
+
+
+def test_reset_rescans_without_duplicating():
+    _legacy(2, 4, 80000)
+    first = _backfill_legacy_to_tlt(2, reset=True)
+    assert first["inserted"] >= 4
+    out = _backfill_legacy_to_tlt(2, reset=True)
+    assert out["inserted"] == 0 and out["scanned"] > 0
+
+
+def test_watermark_holds_at_rows_skipped_by_fk():
+    _legacy(9701, 3, 70000)
+    out = _backfill_legacy_to_tlt(9701, chunk_rows=2)
+    assert out["inserted"] == 0 and out["scanned"] == 3
+    assert out["skipped_sessions_missing_in_tlt_sesion"] == [9701]
+
+    # La sesión aparece después: la siguiente pasada recoge las filas saltadas
+    with connection.cursor() as cur:
+        cur.execute("INSERT INTO tlt_sesion (id) VALUES (9701)")
+    again = _backfill_legacy_to_tlt(9701, chunk_rows=2)
+    assert again["inserted"] == 3 and "skipped_sessions_missing_in_tlt_sesion" not in again
+    assert _backfill_legacy_to_tlt(9701)["scanned"] == 0
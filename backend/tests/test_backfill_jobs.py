@@ -0,0 +1,82 @@
+import json
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+AUTH = {"HTTP_X_PANEL_TOKEN": "mi-token-local"}
+
+
+def _post(client, body):
+    return client.post("/api/backfill", data=json.dumps(body), content_type="application/json", **AUTH)
+
+
+def test_backfill_returns_job_and_reports_progress(client):
+    r = _post(client, {"sesion_id": 1})
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+
+    st = client.get(f"/api/backfill/jobs/{job_id}", **AUTH)
+    assert st.status_code == 200
+    job = st.json()["job"]
+    assert job["status"] == "done"
+    assert job["params"] == {"sesion_id": 1, "reset": False}
+    assert "inserted" in job["result"] and job["result"]["scope"] == "sesion:1"
+
+    listing = client.get("/api/backfill/jobs", **AUTH).json()["jobs"]
+    assert job_id in [j["id"] for j in listing]
+
+
+def test_backfill_job_requires_access_and_known_id(client):
+    assert client.get("/api/backfill/jobs/nope", **AUTH).status_code == 404
+    assert client.get("/api/backfill/jobs/nope").status_code == 403
+    assert _post(client, {"sesion_id": "x"}).status_code == 400
+
+
+def test_stale_running_job_is_reported_as_error(client):
+    from django.db import connection
+
+    from talento_core import core_jobs
+
+    core_jobs._ensure_table()
+    with connection.cursor() as cur:
+        cur.execute(
+            "INSERT INTO tlt_job (id, kind, status, started_at, updated_at) VALUES "
+            "('stale1', 'backfill', 'running', datetime('now', '-2 hours'), datetime('now', '-2 hours')), "
+            "('alive1', 'backfill', 'running', datetime('now'), datetime('now'))"
+        )
+    job = client.get("/api/backfill/jobs/stale1", **AUTH).json()["job"]
+    assert job["status"] == "error" and "latido" in job["error"] and job["finished_at"]
+    assert core_jobs.get("alive1")["status"] == "running"
+
+
+def test_concurrent_enqueue_coalesces_on_unique_index(monkeypatch):
+    from django.db import connection
+
+    from talento_core import core_jobs
+
+    core_jobs._ensure_table()
+    with connection.cursor() as cur:
+        cur.execute("INSERT INTO tlt_job (id, kind, dedupe_key, status) VALUES ('first1', 't', 'race:1', 'running')")
+    # La otra petición no vio el job vivo (SELECT antes de su INSERT): salta el índice
+    misses = iter([None])
+    real = core_jobs._active_for
+    monkeypatch.setattr(core_jobs, "_active_for", lambda cur, key: next(misses, None) or real(cur, key))
+    ran = []
+    assert core_jobs.enqueue("t", lambda progress: ran.append(1), dedupe_key="race:1") == ("first1", True)
+    assert not ran
+
+
+def test_expired_job_is_not_overwritten_when_it_finishes():
+    from django.db import connection
+
+    from talento_core import core_jobs
+
+    def fn(progress):
+        # Mientras corre, otro worker lo da por muerto
+        with connection.cursor() as cur:
+            cur.execute("UPDATE tlt_job SET status='error', error='sin latido' WHERE kind='slow' AND status='running'")
+        return {"rows": 1}
+
+    job_id, _ = core_jobs.enqueue("slow", fn, dedupe_key="slow:1")
+    job = core_jobs.get(job_id)
+    assert job["status"] == "error" and job["result"] is None
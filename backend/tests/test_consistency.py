@@ -14,7 +14,7 @@ def test_export_by_ccp_matches_sql(client):
     url = "/api/export/session/2/by_ccp?date_from=2025-10-01&date_to=2025-10-31"
     r = client.get(url, HTTP_X_PANEL_TOKEN=settings.PANEL_ORIENTADOR_TOKEN)
     assert r.status_code == 200
-    csv_rows = _parse_csv(r.content)
+    csv_rows = _parse_csv(r.getvalue())
     with connection.cursor() as cur:
         cur.execute("""
         SELECT v.ccp_code,
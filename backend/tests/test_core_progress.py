@@ -0,0 +1,68 @@
+from collections import defaultdict
+
+import pytest
+from django.db import connection
+
+from talento_core import core_views
+
+pytestmark = pytest.mark.django_db
+
+
+def _reference(sesion_id, with_catalog=True):
+    """Plegado fila a fila (el cálculo previo en Python) sobre las mismas fuentes."""
+    sql = ["SELECT ccp_code, ejer_code, correcta, tr_ms FROM tlt_respuesta WHERE sesion_id = %s"]
+    if with_catalog:
+        sql.append("""SELECT c.codigo, 'UNK', r.correcta, r.rt_ms FROM respuesta r
+                      JOIN item i ON i.id_item = r.id_item JOIN ref_ccp c ON c.id_ccp = i.id_ccp
+                      WHERE r.id_sesion = %s""")
+    rows = []
+    with connection.cursor() as cur:
+        for part in sql:
+            cur.execute(part, [sesion_id])
+            rows += cur.fetchall()
+    groups = defaultdict(lambda: [0, 0, 0])
+    for ccp, ejer, correcta, tr_ms in rows:
+        g = groups[(ccp or "UNK", ejer or "UNK")]
+        g[0] += 1
+        g[1] += 1 if correcta in (1, True, "1") else 0
+        g[2] += int(tr_ms or 0)
+    return {k: tuple(v) for k, v in groups.items()}
+
+
+def _as_dict(groups):
+    return {(g["ccp_code"], g["ejer_code"]): (g["n"], g["ok"], g["tr_sum"]) for g in groups}
+
+
+@pytest.fixture
+def edge_session():
+    with connection.cursor() as cur:
+        for ccp, ejer, ok, tr in [(None, "E1", 1, 100), ("", None, 0, None), ("MCP", "E1", 1, 250),
+                                  ("MCP", "E1", 0, 251), ("MCP", "", 1, 7)]:
+            cur.execute(
+                "INSERT INTO tlt_respuesta (sesion_id, ccp_code, ejer_code, correcta, tr_ms) VALUES (9951, %s, %s, %s, %s)",
+                [ccp, ejer, ok, tr],
+            )
+
+
+@pytest.mark.parametrize("sesion_id", [1, 2, 3, 9951, 424242])
+def test_sql_groups_match_row_by_row_fold(edge_session, sesion_id):
+    assert _as_dict(core_views._groups_for_session(sesion_id)) == _reference(sesion_id)
+
+
+def test_legacy_without_catalog_falls_back(monkeypatch):
+    tables = {"respuesta"}
+    monkeypatch.setattr(core_views, "_table_exists", lambda name: name in tables)
+    groups = core_views._groups_for_session(2)
+    with connection.cursor() as cur:
+        cur.execute("SELECT COUNT(*), SUM(correcta) FROM respuesta WHERE id_sesion = 2")
+        n, ok = cur.fetchone()
+    assert [(g["ccp_code"], g["ejer_code"], g["n"], g["ok"]) for g in groups] == [("UNK", "UNK", n, ok)]
+
+
+def test_export_session_uses_groups(client, edge_session):
+    js = client.get("/api/export/session/9951?format=json").json()
+    by_ccp = {x["ccp_code"]: x for x in js["by_ccp"]}
+    assert by_ccp["MCP"] == {"ccp_code": "MCP", "n": 3, "acierto_pct": 66.7, "tr_ms_avg": 169.3}
+    assert by_ccp["UNK"]["n"] == 2 and js["kpis"] == js["by_ccp"]
+    lines = client.get("/api/export/session/9951?format=csv").getvalue().decode().splitlines()
+    assert lines[0] == "sesion_id,ccp_code,ejer_code,n,acierto_pct,tr_ms_avg" and len(lines) == 1 + len(js["by_ejer"])
@@ -0,0 +1,93 @@
+import importlib
+import os
+import sqlite3
+import sys
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+
+from talento_core import core_schema
+from talento_core.core_ingest import AnswerError, coerce_correcta, parse_answer
+from talento_core.correcta import correcta_sql
+
+pytestmark = pytest.mark.django_db
+
+check_migration = importlib.import_module("runtime.migrations.0010_tlt_respuesta_correcta_check")
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1, 1), (0, 0), (True, 1), (False, 0), (None, 0),
+    ("1", 1), ("0", 0), ("true", 1), ("FALSE", 0), ("t", 1), ("", 0),
+])
+def test_coerce_correcta(value, expected):
+    assert coerce_correcta(value) == expected
+
+
+def test_parse_answer_rejects_unknown_correcta():
+    # Antes bool("0") contaba como acierto; ahora se valida
+    assert parse_answer({"ejer_code": "E", "item_id": "x", "correcta": "0"})[5] == 0
+    with pytest.raises(AnswerError):
+        parse_answer({"ejer_code": "E", "item_id": "x", "correcta": "quizá"})
+
+
+def test_rebuild_normalizes_and_enforces_check(monkeypatch):
+    # Tabla propia con el esquema previo (sin CHECK): tlt_respuesta ya puede tenerlo
+    table = "tlt_test_correcta"
+    monkeypatch.setattr(check_migration, "TABLE", table)
+    with connection.cursor() as cur:
+        cur.execute(f"""
+            CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id TEXT,
+                {check_migration.LOOSE_COLUMN},
+                tr_ms INTEGER
+            )
+        """)
+        cur.execute(f"CREATE INDEX idx_{table}_item ON {table} (item_id)")
+        cur.executemany(
+            f"INSERT INTO {table} (item_id, correcta, tr_ms) VALUES (%s, %s, %s)",
+            [("a", "true", 1), ("b", "0", 2), ("c", None, 3)],
+        )
+        check_migration._rebuild(cur, check_migration.STRICT_COLUMN)
+        cur.execute(f"SELECT item_id, correcta FROM {table} ORDER BY item_id")
+        assert cur.fetchall() == [("a", 1), ("b", 0), ("c", 0)]
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=%s", [f"idx_{table}_item"])
+        assert cur.fetchone()
+        with pytest.raises(IntegrityError), transaction.atomic():
+            cur.execute(f"INSERT INTO {table} (item_id, correcta) VALUES ('d', 'true')")
+    core_schema.invalidate()
+
+
+def _script():
+    scripts = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts")
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return importlib.import_module("ingest_jsonl_to_sqlite")
+
+
+@pytest.mark.parametrize("value", [1, 0, 2, 0.5, True, None, "1", "0", "true", "TRUE", " Sí ", "SÍ", "yes", "no", "quizá"])
+def test_sql_rule_matches_python(value):
+    try:
+        expected = coerce_correcta(value)
+    except ValueError:
+        expected = 0  # SQL no rechaza: lo desconocido cuenta como fallo
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE t (correcta)")
+    con.execute("INSERT INTO t VALUES (?)", (value,))
+    for sql in (correcta_sql("correcta"), check_migration.NORMALIZED):
+        assert con.execute(f"SELECT {sql} FROM t").fetchone()[0] == expected
+
+
+def test_every_path_uses_the_same_rule():
+    rollup_migration = importlib.import_module("runtime.migrations.0009_tlt_respuesta_rollup")
+    assert check_migration.NORMALIZED == correcta_sql("correcta")
+    assert rollup_migration._OK_LEGACY.format(row="r") == correcta_sql("r.correcta")
+
+    # El ingestor JSONL (y el modo directo de play-ui) descarta lo que la API rechaza
+    ingest = _script()
+    rec = {"sesion_id": 1, "ts": 2000000000,
+           "answers": [{"item_id": "a", "correcta": "sí"}, {"item_id": "b", "correcta": "quizá"}]}
+    rejected = []
+    rows = list(ingest.normalize_record(rec, rejected))
+    assert [(r[3], r[4]) for r in rows] == [("a", 1)]
+    assert rejected == [(1, ingest.DEF_EJER, "b")]
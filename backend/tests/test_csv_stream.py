@@ -0,0 +1,63 @@
+import gzip
+import importlib
+
+import pytest
+from django.conf import settings
+from django.db import connection
+
+from runtime import panel_cache
+from talento_core import core_schema, csv_stream
+
+pytestmark = pytest.mark.django_db
+
+version_migration = importlib.import_module("runtime.migrations.0011_tlt_data_version")
+
+HEADERS = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+
+
+def test_iter_csv_reuses_small_buffer():
+    rows = ([i, f"x,{i}", None] for i in range(1000))
+    chunks = list(csv_stream.iter_csv(["a", "b", "c"], rows, flush_bytes=256))
+    assert chunks[0] == b"a,b,c\r\n"                      # cabecera sola, antes de leer filas
+    assert all(len(c) < 256 + 64 for c in chunks)
+    body = b"".join(chunks).decode()
+    assert body.count("\r\n") == 1001 and '999,"x,999",\r\n' in body
+
+
+def test_iter_query_reads_in_blocks():
+    with connection.cursor() as cur:
+        for i in range(5):
+            cur.execute("INSERT INTO tlt_respuesta (sesion_id, ccp_code, correcta, tr_ms) VALUES (9701, 'MCP', 1, %s)", [i])
+    rows = csv_stream.iter_query(
+        "SELECT tr_ms FROM tlt_respuesta WHERE sesion_id = %s ORDER BY tr_ms", [9701], size=2
+    )
+    assert [r[0] for r in rows] == [0, 1, 2, 3, 4]
+
+
+def test_export_streams_and_gzips_on_request(client):
+    url = "/api/export/session/2/by_ccp"
+    plain = client.get(url, **HEADERS)
+    assert plain.streaming and "Content-Encoding" not in plain
+    zipped = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate", **HEADERS)
+    assert zipped["Content-Encoding"] == "gzip" and "Accept-Encoding" in zipped["Vary"]
+    assert gzip.decompress(zipped.getvalue()) == plain.getvalue()
+
+
+@pytest.fixture
+def with_versions():
+    with connection.cursor() as cur:
+        cur.execute(version_migration.SQL_TABLE)
+    core_schema.invalidate()
+    panel_cache.cache.clear()
+    yield
+    core_schema.invalidate()
+    panel_cache.cache.clear()
+
+
+def test_streamed_export_is_cached_after_full_send(client, with_versions):
+    url = "/api/export/session/2/by_ejer"
+    first = client.get(url, **HEADERS)
+    assert first.streaming and first["X-Panel-Cache"] == "miss"
+    body = first.getvalue()
+    again = client.get(url, **HEADERS)
+    assert again["X-Panel-Cache"] == "hit" and again.content == body
@@ -0,0 +1,94 @@
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+from talento_core.core_schema import TLT_RESPUESTA_DDL
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for _dir in ("scripts", "play-ui"):
+    if os.path.join(_ROOT, _dir) not in sys.path:
+        sys.path.insert(0, os.path.join(_ROOT, _dir))
+import app_play  # noqa: E402
+import direct_db  # noqa: E402
+import ingest_jsonl_to_sqlite as ingest  # noqa: E402
+import session_log  # noqa: E402
+
+REC = {"id": "r1", "sesion_id": 9971, "ts": 2000000000,
+       "answers": [{"ccp_code": "MCP", "ejer_code": "E1", "item_id": item, "correcta": ok, "tr_ms": 100}
+                   for item, ok in [("a", 1), ("b", 0), ("c", "true")]]}
+
+
+def _db(path, unique=True):
+    con = sqlite3.connect(path)
+    con.execute(TLT_RESPUESTA_DDL)
+    if unique:
+        ingest.migrate_unique_index(con)
+    con.commit()
+    con.close()
+    return path
+
+
+def _rows(db):
+    with sqlite3.connect(db) as con:
+        return con.execute("SELECT sesion_id, ejer_code, item_id, correcta, tr_ms FROM tlt_respuesta "
+                           "ORDER BY item_id").fetchall()
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    monkeypatch.setattr(direct_db, "_pool", None)
+
+
+def test_pool_reuses_connections(tmp_path):
+    pool = direct_db.ConnectionPool(_db(str(tmp_path / "t.db")), size=2)
+    with pool.connection() as a:
+        with pool.connection() as b:
+            assert a is not b
+    with pool.connection() as c:
+        assert c is a  # LIFO: la última devuelta
+    assert pool._idle.qsize() == 2
+
+
+def test_direct_upsert_matches_ingester_key(tmp_path):
+    db = _db(str(tmp_path / "t.db"))
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+
+    def audit(rec):
+        # El JSONL de auditoría se ingiere después sobre las mismas claves: no reescribe nada
+        with open(sess_dir / "session_9971.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+        out = ingest.run(db, str(sess_dir))
+        return out["inserted"], out["updated"], out["unchanged"]
+
+    assert direct_db.write_record(db, REC) == 3
+    assert audit(REC) == (0, 0, 3)
+    changed = {**REC, "answers": [{**REC["answers"][1], "correcta": 1}]}
+    assert direct_db.write_record(db, changed) == 1
+    assert audit(changed) == (0, 0, 1)
+    assert _rows(db) == [(9971, "E1", "a", 1, 100), (9971, "E1", "b", 1, 100), (9971, "E1", "c", 1, 100)]
+
+
+def test_missing_index_falls_back_to_jsonl_only(tmp_path, monkeypatch):
+    db = _db(str(tmp_path / "t.db"), unique=False)
+    with sqlite3.connect(db) as con:
+        con.executemany("INSERT INTO tlt_respuesta (sesion_id, ejer_code, item_id, correcta) VALUES (?, ?, ?, 0)",
+                        [(9972, "E1", "dup")] * 2)
+    sess_dir = str(tmp_path / "sessions")
+    monkeypatch.setenv("PLAY_DIRECT_DB", "1")
+    monkeypatch.setattr(app_play, "BACKEND_DB", db)
+    monkeypatch.setattr(session_log, "_writer", session_log.SessionLogWriter(sess_dir, fsync_s=0))
+
+    js = app_play.app.test_client().post("/submit", json={"sesion_id": 9972, "answers": REC["answers"]}).get_json()
+    assert js["ok"] and js["db"]["ok"] is False and ingest.UNIQUE_INDEX in js["db"]["error"]
+    with open(js["stored"], encoding="utf-8") as f:
+        assert json.loads(f.readline())["answers"] == REC["answers"]
+
+    # Ni dedupe ni índice: la petición no migra la tabla
+    with sqlite3.connect(db) as con:
+        assert not ingest.has_unique_index(con.cursor())
+        assert con.execute("SELECT COUNT(*) FROM tlt_respuesta WHERE sesion_id = 9972").fetchone() == (2,)
+    session_log._writer.close()
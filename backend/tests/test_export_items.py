@@ -0,0 +1,82 @@
+import csv
+import io
+import json
+
+import pytest
+from django.conf import settings
+from django.db import connection
+
+pytestmark = pytest.mark.django_db
+
+HEADERS = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+
+
+@pytest.fixture
+def items():
+    """Dos sesiones intercaladas; devuelve los ids insertados por sesión."""
+    ids = {9801: [], 9802: []}
+    with connection.cursor() as cur:
+        for i in range(12):
+            sid = 9801 if i % 3 else 9802
+            cur.execute(
+                "INSERT INTO tlt_respuesta (sesion_id, ccp_code, ejer_code, item_id, respuesta, correcta, tr_ms, created_at) "
+                "VALUES (%s, %s, 'E1', %s, 'a,b', %s, %s, %s)",
+                [sid, "MCP" if i % 2 else "MDT", f"it{i}", i % 2, 100 + i, f"2033-01-{1 + i:02d} 10:00:00"],
+            )
+            ids[sid].append(cur.lastrowid)
+    return ids
+
+
+def _csv(response):
+    return list(csv.DictReader(io.StringIO(response.getvalue().decode())))
+
+
+def test_session_items_csv_in_id_order_and_resume(client, items):
+    url = "/api/export/session/9801/items"
+    r = client.get(url, **HEADERS)
+    assert r.streaming and r["Content-Disposition"].endswith('sesion_9801_items.csv"')
+    rows = _csv(r)
+    assert [int(x["id"]) for x in rows] == items[9801]
+    assert rows[0]["respuesta"] == "a,b" and rows[0]["created_at"] == "2033-01-02 10:00:00"
+
+    # Reanudar tras el 3er id recibido
+    rest = _csv(client.get(url, {"after_id": rows[2]["id"]}, **HEADERS))
+    assert [int(x["id"]) for x in rest] == items[9801][3:]
+
+
+def test_session_items_ndjson_with_filters(client, items):
+    r = client.get("/api/export/session/9801/items",
+                   {"format": "ndjson", "ccp": "MCP", "date_to": "2033-01-08"}, **HEADERS)
+    assert r["Content-Type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.getvalue().decode().splitlines()]
+    assert [x["item_id"] for x in lines] == ["it1", "it5", "it7"]
+    assert all(x["ccp_code"] == "MCP" and x["correcta"] == 1 for x in lines)
+
+
+def test_multi_session_merges_in_id_order(client, items):
+    r = client.get("/api/export/items", {"sesion_id": ["9802,9801"]}, **HEADERS)
+    ids = [int(x["id"]) for x in _csv(r)]
+    assert ids == sorted(items[9801] + items[9802])
+
+    after = sorted(ids)[5]
+    r = client.get("/api/export/items", {"sesion_id": ["9801", "9802"], "after_id": after}, **HEADERS)
+    assert [int(x["id"]) for x in _csv(r)] == [i for i in ids if i > after]
+
+
+def test_all_sessions_by_date(client, items):
+    rows = _csv(client.get("/api/export/items", {"date_from": "2033-01-01"}, **HEADERS))
+    assert {int(x["sesion_id"]) for x in rows} == {9801, 9802} and len(rows) == 12
+
+
+@pytest.mark.parametrize("url", [
+    "/api/export/session/9801/items?format=xml",
+    "/api/export/session/9801/items?after_id=x",
+    "/api/export/items?sesion_id=1,a",
+    "/api/export/items?date_from=2033-13-01",
+])
+def test_bad_params(client, url):
+    assert client.get(url, **HEADERS).status_code == 400
+
+
+def test_items_forbidden_without_token(client):
+    assert client.get("/api/export/items").status_code == 403
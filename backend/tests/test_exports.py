@@ -19,7 +19,7 @@ def test_export_by_ccp_ok(client):
     assert r.status_code == 200
     disp = r.headers.get("Content-Disposition", "")
     assert re.search(r'sesion_2_by_ccp', disp)
-    head = r.content.splitlines()[0].decode()
+    head = r.getvalue().splitlines()[0].decode()
     assert head == "ccp_code,n,acierto_pct,tr_ms_avg"
 
 def test_export_by_ccp_with_filters(client):
@@ -28,7 +28,7 @@ def test_export_by_ccp_with_filters(client):
     assert r.status_code == 200
     disp = r.headers.get("Content-Disposition", "")
     assert "ccp-MDT" in disp and "2025-10-01" in disp and "2025-10-31" in disp
-    lines = r.content.decode().strip().splitlines()
+    lines = r.getvalue().decode().strip().splitlines()
     assert len(lines) >= 1  # al menos la cabecera
 def test_export_by_ejer_with_filters(client):
     url = "/api/export/session/2/by_ejer?ccp=MDT&ejer=visual&date_from=2025-10-01&date_to=2025-10-31"
@@ -36,7 +36,7 @@ def test_export_by_ejer_with_filters(client):
     assert r.status_code == 200
     disp = r.headers.get("Content-Disposition", "")
     assert all(s in disp for s in ("ccp-MDT", "ejer-visual", "2025-10-01", "2025-10-31"))
-    head = r.content.splitlines()[0].decode()
+    head = r.getvalue().splitlines()[0].decode()
     assert head == "ccp_code,ejer_code,n,acierto_pct,tr_ms_avg"
 
 def test_export_forbidden_without_token(client):
@@ -46,7 +46,7 @@ def test_export_empty_filters(client):
     url = "/api/export/session/2/by_ejer?ccp=ZZZ&ejer=falso&date_from=2025-10-01&date_to=2025-10-31"
     r = client.get(url, HTTP_X_PANEL_TOKEN=settings.PANEL_ORIENTADOR_TOKEN)
     assert r.status_code == 200
-    lines = r.content.decode().strip().splitlines()
+    lines = r.getvalue().decode().strip().splitlines()
     # Sólo cabecera (sin datos)
     assert len(lines) == 1
 
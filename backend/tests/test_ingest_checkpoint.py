@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+import sys
+
+from talento_core.core_schema import TLT_RESPUESTA_DDL
+
+_SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts")
+if _SCRIPTS not in sys.path:
+    sys.path.insert(0, _SCRIPTS)
+import ingest_jsonl_to_sqlite as ingest  # noqa: E402
+
+
+def _line(sesion_id, item, ok=1):
+    answers = [{"ccp_code": "MCP", "ejer_code": "E1", "item_id": item, "correcta": ok, "tr_ms": 100}]
+    return json.dumps({"sesion_id": sesion_id, "ts": 2000000000, "answers": answers}) + "\n"
+
+
+def _write(path, text, mode="a"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(text)
+    return str(path)
+
+
+def _db(path):
+    con = sqlite3.connect(path)
+    con.execute(TLT_RESPUESTA_DDL)
+    con.commit()
+    con.close()
+    return str(path)
+
+
+def _state(cur, sess_dir, path):
+    """Checkpoint como lo deja run(): fichero consumido entero."""
+    st = os.stat(path)
+    rel = os.path.relpath(path, sess_dir)
+    ingest.save_state(cur, rel, st.st_ino, st.st_size, st.st_mtime)
+    return ingest.load_state(cur)
+
+
+def _starts(state, sess_dir, full=False):
+    return {rel: start for _p, rel, start, *_ in ingest.pending_files(state, str(sess_dir), full=full)}
+
+
+def test_save_state_overwrites_and_loads():
+    con = sqlite3.connect(":memory:")
+    cur = con.cursor()
+    ingest.ensure_state_table(cur)
+    ingest.save_state(cur, "session_1.jsonl", 11, 100, 1.5)
+    ingest.save_state(cur, "session_1.jsonl", 12, 40, 2.5)
+    ingest.save_state(cur, "session_2.jsonl", None, 0, None)
+    assert ingest.load_state(cur) == {"session_1.jsonl": (12, 40, 2.5), "session_2.jsonl": (None, 0, None)}
+
+
+def test_pending_files_resumes_from_offset(tmp_path):
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+    path = _write(sess_dir / "session_1.jsonl", _line(1, "a"))
+    cur = sqlite3.connect(":memory:").cursor()
+    ingest.ensure_state_table(cur)
+    state = _state(cur, sess_dir, path)
+    assert _starts(state, sess_dir) == {}
+
+    size = os.path.getsize(path)
+    _write(path, _line(1, "b"))
+    assert _starts(state, sess_dir) == {"session_1.jsonl": size}
+    assert _starts(state, sess_dir, full=True) == {"session_1.jsonl": 0}
+
+
+def test_truncated_or_rotated_file_is_reread_from_zero(tmp_path):
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+    path = _write(sess_dir / "session_1.jsonl", _line(1, "a") + _line(1, "b"))
+    cur = sqlite3.connect(":memory:").cursor()
+    ingest.ensure_state_table(cur)
+    state = _state(cur, sess_dir, path)
+
+    # Truncado: el fichero encoge por debajo del offset guardado
+    _write(path, _line(1, "c"), mode="w")
+    assert _starts(state, sess_dir) == {"session_1.jsonl": 0}
+
+    # Rotación: mismo nombre, otro inode, aunque sea más grande que el offset
+    state = _state(cur, sess_dir, path)
+    tmp = _write(sess_dir / "rotated.tmp", _line(2, "a") * 3)
+    os.replace(tmp, path)
+    assert os.stat(path).st_ino != state["session_1.jsonl"][0]
+    assert _starts(state, sess_dir) == {"session_1.jsonl": 0}
+
+
+def test_partial_trailing_line_is_left_for_next_pass(tmp_path):
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+    db = _db(tmp_path / "t.db")
+    full_line = _line(1, "a")
+    partial = _line(1, "b")
+    path = _write(sess_dir / "session_1.jsonl", full_line + partial[:10])
+
+    records, end = ingest.read_new_records(path, 0)
+    assert len(records) == 1 and end == len(full_line.encode())
+
+    assert ingest.run(db, str(sess_dir))["inserted"] == 1
+    with sqlite3.connect(db) as con:
+        assert con.execute("SELECT offset FROM tlt_ingest_state WHERE path = 'session_1.jsonl'").fetchone() == (end,)
+
+    _write(path, partial[10:])
+    out = ingest.run(db, str(sess_dir))
+    assert (out["processed"], out["inserted"]) == (1, 1)
+    assert ingest.run(db, str(sess_dir))["processed"] == 0
+
+
+def test_full_rereads_everything_without_changes(tmp_path):
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+    db = _db(tmp_path / "t.db")
+    _write(sess_dir / "session_1.jsonl", _line(1, "a") + _line(1, "b"))
+    _write(sess_dir / "session_2.jsonl", _line(2, "a"))
+    assert ingest.run(db, str(sess_dir))["inserted"] == 3
+    out = ingest.run(db, str(sess_dir), full=True)
+    assert (out["processed"], out["inserted"], out["updated"], out["unchanged"]) == (3, 0, 0, 3)
+
+
+def test_discover_files_reads_manifest_from_its_offset(tmp_path):
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+    for name in ("session_1.jsonl", "session_2.jsonl", "session_3.jsonl"):
+        _write(sess_dir / name, _line(1, name))
+    manifest = _write(sess_dir / ingest.MANIFEST_NAME, json.dumps({"path": "session_1.jsonl"}) + "\n")
+    con = sqlite3.connect(":memory:")
+    cur = con.cursor()
+    ingest.ensure_state_table(cur)
+
+    state = ingest.load_state(cur)
+    assert ingest.discover_files(cur, state, str(sess_dir)) == [str(sess_dir / "session_1.jsonl")]
+    assert ingest.load_state(cur)["session_1.jsonl"] == (None, 0, None)
+
+    _write(manifest, json.dumps({"path": "session_2.jsonl"}) + "\n")
+    state = ingest.load_state(cur)
+    assert ingest.discover_files(cur, state, str(sess_dir)) == [str(sess_dir / f"session_{i}.jsonl") for i in (1, 2)]
+    assert ingest.load_state(cur)[ingest.MANIFEST_NAME][1] == os.path.getsize(manifest)
+
+    # --full ignora el manifest y vuelve al glob del directorio
+    assert len(ingest.discover_files(cur, state, str(sess_dir), full=True)) == 3
@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+from talento_core.core_schema import TLT_RESPUESTA_DDL
+
+_SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts")
+if _SCRIPTS not in sys.path:
+    sys.path.insert(0, _SCRIPTS)
+import ingest_jsonl_to_sqlite as ingest  # noqa: E402
+
+# Tres sesiones con el mismo trío repetido; la primera copia (MIN(rowid)) lleva correcta=1
+ROWS = [(sid, "E1", item, ok) for sid in (9801, 9802, 9803) for item, ok in [("a", 1), ("a", 0), ("a", 0), ("b", 0)]]
+
+
+class Interrupted(Exception):
+    pass
+
+
+class CutAfterCommits(sqlite3.Connection):
+    """Conexión que se corta (sin confirmar) al llegar al commit número `cut_at`."""
+    cut_at = None
+
+    def commit(self):
+        self.commits = getattr(self, "commits", 0) + 1
+        if self.commits == self.cut_at:
+            raise Interrupted
+        super().commit()
+
+
+class RacingCursor(sqlite3.Cursor):
+    # Otro escritor mete un duplicado justo antes de cada CREATE UNIQUE INDEX
+    def execute(self, sql, params=()):
+        if sql.startswith("CREATE UNIQUE INDEX") and self.connection.races:
+            self.connection.races -= 1
+            super().execute("INSERT INTO tlt_respuesta (sesion_id, ejer_code, item_id, correcta) "
+                            "VALUES (9801, 'E1', 'b', 1);")
+            self.connection.commit()
+        return super().execute(sql, params)
+
+
+class RacingConnection(sqlite3.Connection):
+    races = 0
+
+    def cursor(self, factory=RacingCursor):
+        return super().cursor(factory)
+
+
+def _db(path, rows=ROWS):
+    con = sqlite3.connect(path)
+    con.execute(TLT_RESPUESTA_DDL)
+    con.executemany("INSERT INTO tlt_respuesta (sesion_id, ejer_code, item_id, correcta) VALUES (?, ?, ?, ?)", rows)
+    con.commit()
+    con.close()
+    return path
+
+
+def _rows(db):
+    with sqlite3.connect(db) as con:
+        return con.execute("SELECT id, sesion_id, item_id, correcta FROM tlt_respuesta ORDER BY id").fetchall()
+
+
+def _checkpoint(db):
+    with sqlite3.connect(db) as con:
+        row = con.execute("SELECT value FROM tlt_ingest_meta WHERE key = ?", (ingest.DEDUPE_CKPT_KEY,)).fetchone()
+        return row[0] if row else None
+
+
+def test_dedupe_keeps_min_rowid(tmp_path):
+    db = _db(str(tmp_path / "t.db"))
+    before = _rows(db)
+    con = sqlite3.connect(db)
+    assert ingest.dedupe_chunked(con, chunk_sessions=2) == 6
+    con.close()
+    keep = [r for r in before if r[2] == "b" or r[3] == 1]
+    assert _rows(db) == keep and all(r[3] == 1 for r in keep if r[2] == "a")
+
+
+def test_interrupted_dedupe_resumes_from_checkpoint(tmp_path):
+    db = _db(str(tmp_path / "t.db"))
+    con = sqlite3.connect(db, factory=CutAfterCommits)
+    con.cut_at = 2
+    with pytest.raises(Interrupted):
+        ingest.dedupe_chunked(con, chunk_sessions=1)
+    con.close()  # el segundo tramo no llegó a confirmarse
+    assert _checkpoint(db) == "9801"
+    assert [r[1] for r in _rows(db)].count(9802) == 4
+
+    # Un duplicado por debajo del checkpoint no se vuelve a mirar: la pasada sigue en 9802
+    with sqlite3.connect(db) as con:
+        con.execute("INSERT INTO tlt_respuesta (sesion_id, ejer_code, item_id, correcta) VALUES (9801, 'E1', 'a', 0)")
+    con = sqlite3.connect(db)
+    assert ingest.dedupe_chunked(con, chunk_sessions=1) == 4
+    con.close()
+    assert _checkpoint(db) == "9803"
+    assert sorted(r[1] for r in _rows(db)) == [9801, 9801, 9801, 9802, 9802, 9803, 9803]
+
+
+def test_migrate_retries_full_pass_on_integrity_error(tmp_path):
+    db = _db(str(tmp_path / "t.db"))
+    con = sqlite3.connect(db, factory=RacingConnection)
+    con.races = 1
+    assert ingest.migrate_unique_index(con, chunk_sessions=2) == {"index": "created", "deleted": 7}
+    assert ingest.has_unique_index(con.cursor()) and con.races == 0
+    con.close()
+    assert _checkpoint(db) is None
+    assert len(_rows(db)) == 6
+
+
+def test_migrate_gives_up_when_duplicates_keep_coming(tmp_path):
+    db = _db(str(tmp_path / "t.db"))
+    con = sqlite3.connect(db, factory=RacingConnection)
+    con.races = 3
+    with pytest.raises(RuntimeError, match=ingest.UNIQUE_INDEX):
+        ingest.migrate_unique_index(con, attempts=3)
+    assert not ingest.has_unique_index(con.cursor())
+    con.close()
+    assert _checkpoint(db) is None
+
+
+def test_existing_index_skips_the_scan(tmp_path):
+    db = _db(str(tmp_path / "t.db"), rows=ROWS[:1])
+    con = sqlite3.connect(db)
+    assert ingest.migrate_unique_index(con) == {"index": "created", "deleted": 0}
+    statements = []
+    con.set_trace_callback(statements.append)
+    assert ingest.ensure_unique_index(con) == {"index": "exists", "deleted": 0}
+    con.close()
+    assert statements and not any("tlt_respuesta" in s or "tlt_ingest_meta" in s for s in statements)
@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from talento_core.core_schema import TLT_RESPUESTA_DDL
+
+_SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts")
+if _SCRIPTS not in sys.path:
+    sys.path.insert(0, _SCRIPTS)
+import ingest_jsonl_to_sqlite as ingest  # noqa: E402
+
+N_FILES = 10
+WORKERS = 2
+
+
+def _sessions(sess_dir):
+    sess_dir.mkdir()
+    for sid in range(9901, 9901 + N_FILES):
+        answers = [{"ccp_code": "MCP", "ejer_code": "E1", "item_id": item, "correcta": ok, "tr_ms": 100}
+                   for item, ok in [("a", 1), ("b", "no"), ("c", "quizá")]]
+        with open(sess_dir / f"session_{sid}.jsonl", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"sesion_id": sid, "ts": 2000000000, "answers": answers}) + "\n")
+    return str(sess_dir)
+
+
+def _db(path):
+    con = sqlite3.connect(path)
+    con.execute(TLT_RESPUESTA_DDL)
+    con.commit()
+    con.close()
+    return str(path)
+
+
+def _snapshot(db):
+    with sqlite3.connect(db) as con:
+        rows = con.execute("SELECT sesion_id, ccp_code, ejer_code, item_id, correcta, tr_ms, created_at "
+                           "FROM tlt_respuesta ORDER BY 1, 3, 4").fetchall()
+        state = con.execute("SELECT path, inode, offset, mtime FROM tlt_ingest_state ORDER BY 1").fetchall()
+    return rows, state
+
+
+class CountingPool(ProcessPoolExecutor):
+    """Pool real que anota cuántos ficheros hay en vuelo (enviados y aún no escritos) en cada submit."""
+    submitted = written = 0
+    peaks = []
+
+    def submit(self, fn, *args):
+        CountingPool.submitted += 1
+        CountingPool.peaks.append(CountingPool.submitted - CountingPool.written)
+        return super().submit(fn, *args)
+
+
+@pytest.fixture
+def counting(monkeypatch):
+    upsert_rows = ingest.upsert_rows
+
+    def counted(cur, rows):
+        CountingPool.written += 1
+        return upsert_rows(cur, rows)
+
+    monkeypatch.setattr(CountingPool, "submitted", 0)
+    monkeypatch.setattr(CountingPool, "written", 0)
+    monkeypatch.setattr(CountingPool, "peaks", [])
+    monkeypatch.setattr(ingest, "ProcessPoolExecutor", CountingPool)
+    monkeypatch.setattr(ingest, "upsert_rows", counted)
+
+
+def test_pipeline_matches_run_with_bounded_window(tmp_path, counting):
+    sess_dir = _sessions(tmp_path / "sessions")
+    serial = ingest.run(_db(tmp_path / "serial.db"), sess_dir)
+    CountingPool.submitted = CountingPool.written = 0
+    piped = ingest.run_pipeline(_db(tmp_path / "piped.db"), sess_dir, workers=WORKERS, batch_rows=3)
+
+    assert _snapshot(str(tmp_path / "piped.db")) == _snapshot(str(tmp_path / "serial.db"))
+    keys = ("files", "processed", "rejected", "inserted", "updated", "unchanged")
+    assert {k: piped[k] for k in keys} == {k: serial[k] for k in keys}
+    assert (piped["files"], piped["processed"], piped["rejected"]) == (N_FILES, 2 * N_FILES, N_FILES)
+    # Ventana acotada: nunca más de workers*2 ficheros parseados sin escribir
+    assert CountingPool.submitted == N_FILES and max(CountingPool.peaks) == WORKERS * 2
+
+
+def test_parse_failure_propagates_and_keeps_checkpoints_consistent(tmp_path):
+    sess_dir = _sessions(tmp_path / "sessions")
+    bad = os.path.join(sess_dir, "session_9905.jsonl")
+    with open(bad, "a", encoding="utf-8") as f:
+        f.write("{no es json\n")
+    db = _db(tmp_path / "piped.db")
+
+    with pytest.raises(json.JSONDecodeError):
+        ingest.run_pipeline(db, sess_dir, workers=WORKERS, batch_rows=1)
+    rows, state = _snapshot(db)
+    done = {path for path, *_ in state}
+    # Los resultados se escriben en orden: lo anterior al fichero roto queda confirmado
+    assert done == {f"session_{sid}.jsonl" for sid in range(9901, 9905)}
+    # Lo confirmado es coherente: cada fichero con checkpoint tiene sus filas y ninguno más
+    assert {f"session_{r[0]}.jsonl" for r in rows} == done
+
+    with open(os.path.join(sess_dir, "session_9906.jsonl"), encoding="utf-8") as f:
+        fixed = f.read().replace("9906", "9905")
+    with open(bad, "w", encoding="utf-8") as f:
+        f.write(fixed)
+    ingest.run_pipeline(db, sess_dir, workers=WORKERS, batch_rows=1)
+    ingest.run(_db(tmp_path / "serial.db"), sess_dir)
+    assert _snapshot(db) == _snapshot(str(tmp_path / "serial.db"))
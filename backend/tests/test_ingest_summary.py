@@ -0,0 +1,76 @@
+import importlib
+import json
+import os
+import sqlite3
+import sys
+
+from talento_core.core_schema import TLT_RESPUESTA_DDL
+
+_SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "scripts")
+if _SCRIPTS not in sys.path:
+    sys.path.insert(0, _SCRIPTS)
+import ingest_jsonl_to_sqlite as ingest  # noqa: E402
+
+# Triggers de las migraciones runtime que escriben en otras tablas por cada fila
+MIGRATIONS = ["0009_tlt_respuesta_rollup", "0011_tlt_data_version", "0012_tlt_sesion_summary"]
+
+
+def _migrated_db(path):
+    con = sqlite3.connect(path)
+    con.execute(TLT_RESPUESTA_DDL)
+    for name in MIGRATIONS:
+        m = importlib.import_module(f"runtime.migrations.{name}")
+        for sql in [m.SQL_TABLE, *m.SQL_TRIGGERS]:
+            con.execute(sql)
+    con.commit()
+    con.close()
+
+
+def _append(sess_dir, answers):
+    with open(os.path.join(sess_dir, "session_9991.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps({"sesion_id": 9991, "ts": 2000000000, "answers": answers}) + "\n")
+
+
+def _answers(correct_b=1):
+    return [{"ccp_code": "MCP", "ejer_code": "E1", "item_id": item, "correcta": ok, "tr_ms": 100}
+            for item, ok in [("a", 1), ("b", correct_b), ("c", 0), ("d", 1), ("e", 0)]]
+
+
+def test_summary_ignores_trigger_writes(tmp_path):
+    db, sess_dir = str(tmp_path / "t.db"), tmp_path / "sessions"
+    sess_dir.mkdir()
+    _migrated_db(db)
+
+    _append(sess_dir, _answers())
+    first = ingest.run(db, str(sess_dir))
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (5, 0, 0)
+
+    # Mismas 5 respuestas, una con otro resultado
+    _append(sess_dir, _answers(correct_b=0))
+    second = ingest.run(db, str(sess_dir))
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (0, 1, 4)
+
+    _append(sess_dir, _answers(correct_b=0))
+    third = ingest.run_pipeline(db, str(sess_dir), workers=1)
+    assert (third["inserted"], third["updated"], third["unchanged"]) == (0, 0, 5)
+
+    with sqlite3.connect(db) as con:
+        assert con.execute("SELECT n_respuestas FROM tlt_sesion_summary WHERE sesion_id = 9991").fetchone() == (5,)
+
+
+def test_summary_ignores_rows_from_other_writers(tmp_path):
+    db, sess_dir = str(tmp_path / "t.db"), tmp_path / "sessions"
+    sess_dir.mkdir()
+    _migrated_db(db)
+    _append(sess_dir, _answers())
+    with open(sess_dir / "session_9992.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"sesion_id": 9992, "ts": 2000000000, "answers": _answers()[:2]}) + "\n")
+
+    def other_writer(*_progress):
+        # p. ej. play-ui en modo directo o /api/answers/batch entre dos ficheros
+        with sqlite3.connect(db) as con:
+            con.execute("INSERT INTO tlt_respuesta (sesion_id, ejer_code, item_id, correcta) "
+                        "VALUES (9993, 'E1', ?, 0)", (f"x{_progress[0]}",))
+
+    out = ingest.run(db, str(sess_dir), progress=other_writer)
+    assert (out["inserted"], out["updated"], out["unchanged"]) == (7, 0, 0)
@@ -0,0 +1,62 @@
+import json
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from talento_core import core_catalog, core_schema
+
+pytestmark = pytest.mark.django_db
+
+
+def test_codes_loaded_once_and_new_items_resolved():
+    core_catalog.catalog.invalidate()
+    assert core_catalog.item_codes(3) == ("VPM", "VIS_S")
+    with CaptureQueriesContext(connection) as ctx:
+        assert core_catalog.item_codes(1) == ("MDT", "visual")
+    assert ctx.captured_queries == []
+
+    with connection.cursor() as cur:
+        cur.execute("INSERT INTO item (id_item, id_ccp, id_submod) VALUES (901, 3, 2)")
+    assert core_catalog.item_codes(901) == ("INH", "auditiva")  # consulta puntual
+    assert core_catalog.item_codes(999999) == core_catalog.UNKNOWN
+
+
+def test_schema_invalidate_forces_reload():
+    core_catalog.catalog.invalidate()
+    core_catalog.item_codes(1)
+    with connection.cursor() as cur:
+        cur.execute("UPDATE ref_submodalidad SET codigo='visual_v2' WHERE id_submod=1")
+    core_schema.invalidate()
+    assert core_catalog.item_codes(1) == ("MDT", "visual_v2")
+    core_catalog.catalog.invalidate()
+
+
+def test_create_respuesta_dual_write_without_catalog_join(client):
+    core_catalog.item_codes(2)  # índice ya cargado
+    with CaptureQueriesContext(connection) as ctx:
+        r = client.post(
+            "/api/respuesta",
+            data=json.dumps({"id_sesion": 2, "id_item": 2, "correcta": 1, "rt_ms": 321}),
+            content_type="application/json",
+        )
+    assert r.status_code == 200
+    assert not any("ref_submodalidad" in q["sql"] for q in ctx.captured_queries)
+    with connection.cursor() as cur:
+        cur.execute(
+            "SELECT ccp_code, ejer_code FROM tlt_respuesta WHERE sesion_id=2 AND item_id='2' AND tr_ms=321"
+        )
+        assert cur.fetchall() == [("MDT", "auditiva")]
+
+
+def test_backfill_maps_codes_from_catalog():
+    from talento_core.core_views import _backfill_legacy_to_tlt
+
+    core_catalog.catalog.invalidate()
+    with connection.cursor() as cur:
+        cur.execute("INSERT INTO respuesta (id_sesion, id_item, correcta, rt_ms) VALUES (3, 4, 1, 777)")
+    out = _backfill_legacy_to_tlt(3, reset=True)
+    assert out["inserted"] >= 1
+    with connection.cursor() as cur:
+        cur.execute("SELECT ccp_code, ejer_code FROM tlt_respuesta WHERE sesion_id=3 AND tr_ms=777")
+        assert cur.fetchall() == [("INH", "visual")]
+    assert _backfill_legacy_to_tlt(3)["inserted"] == 0
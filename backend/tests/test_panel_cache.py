@@ -0,0 +1,79 @@
+import importlib
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+from runtime import panel_cache
+from talento_core import core_schema
+
+pytestmark = pytest.mark.django_db
+
+version_migration = importlib.import_module("runtime.migrations.0011_tlt_data_version")
+
+HEADERS = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+
+
+@pytest.fixture
+def with_versions():
+    with connection.cursor() as cur:
+        for sql in [version_migration.SQL_TABLE, *version_migration.SQL_TRIGGERS]:
+            cur.execute(sql)
+    core_schema.invalidate()
+    panel_cache.cache.clear()
+    yield
+    core_schema.invalidate()
+    panel_cache.cache.clear()
+
+
+def _answer(sesion_id, tr_ms):
+    with connection.cursor() as cur:
+        cur.execute(
+            "INSERT INTO tlt_respuesta (sesion_id, ccp_code, ejer_code, correcta, tr_ms) VALUES (%s, 'MCP', 'E1', 1, %s)",
+            [sesion_id, tr_ms],
+        )
+
+
+def test_progress_hit_revalidate_and_invalidate_on_write(client, with_versions):
+    _answer(9301, 500)
+    url = "/api/progress?sesion_id=9301&ccp=MCP"
+    first = client.get(url, **HEADERS)
+    assert first.status_code == 200 and first["X-Panel-Cache"] == "miss"
+    etag = first["ETag"]
+
+    # Mismos parámetros en otro orden → misma entrada
+    again = client.get("/api/progress?ccp=MCP&sesion_id=9301", **HEADERS)
+    assert again["X-Panel-Cache"] == "hit" and again.content == first.content
+
+    not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag, **HEADERS)
+    assert not_modified.status_code == 304
+
+    # Escribir en otra sesión no invalida esta
+    _answer(9302, 100)
+    assert client.get(url, **HEADERS)["X-Panel-Cache"] == "hit"
+
+    _answer(9301, 700)
+    fresh = client.get(url, HTTP_IF_NONE_MATCH=etag, **HEADERS)
+    assert fresh.status_code == 200 and fresh["X-Panel-Cache"] == "miss"
+    assert fresh["ETag"] != etag
+    assert fresh.json()["by_ccp"][0]["n"] == 2
+
+
+def test_forbidden_is_not_cached(client, with_versions):
+    r = client.get("/api/export/session/9301/by_ccp")
+    assert r.status_code == 403 and "ETag" not in r
+    assert panel_cache.cache.snapshot()["entries"] == 0
+
+
+def test_lru_respects_entry_and_byte_caps():
+    lru = panel_cache.ResponseCache()
+    with override_settings(TALENTO_PANEL_CACHE_ENTRIES=2, TALENTO_PANEL_CACHE_MAX_BYTES=10):
+        lru.put("a", 200, [], b"1234")
+        lru.put("b", 200, [], b"1234")
+        lru.get("a")
+        lru.put("c", 200, [], b"1234")        # sale b (menos usado)
+        assert lru.get("b") is None and lru.get("a") and lru.get("c")
+        lru.put("big", 200, [], b"x" * 11)    # mayor que el tope: no se guarda
+        assert lru.get("big") is None
+    assert lru.snapshot()["bytes"] == 8
@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+from talento_core.core_schema import TLT_RESPUESTA_DDL
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for _dir in ("scripts", "panel-ui"):
+    if os.path.join(_ROOT, _dir) not in sys.path:
+        sys.path.insert(0, os.path.join(_ROOT, _dir))
+import app_panel  # noqa: E402
+import ingest_jsonl_to_sqlite as ingest  # noqa: E402
+import jobs  # noqa: E402
+
+TOKEN = {"X-Panel-Token": app_panel.PANEL_ADMIN_TOKEN}
+
+
+@pytest.fixture
+def panel(tmp_path, monkeypatch):
+    sess_dir = tmp_path / "sessions"
+    sess_dir.mkdir()
+    for sid in (9951, 9952):
+        answers = [{"ccp_code": "MCP", "ejer_code": "E1", "item_id": item, "correcta": 1, "tr_ms": 100}
+                   for item in "abc"]
+        with open(sess_dir / f"session_{sid}.jsonl", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"sesion_id": sid, "ts": 2000000000, "answers": answers}) + "\n")
+    db = str(tmp_path / "t.db")
+    with sqlite3.connect(db) as con:
+        con.execute(TLT_RESPUESTA_DDL)
+    monkeypatch.setattr(app_panel, "BACKEND_DB", db)
+    monkeypatch.setattr(app_panel, "runner", jobs.JobRunner())
+    monkeypatch.setattr(ingest, "SESS_DIR", str(sess_dir))
+    return app_panel.app.test_client()
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Detiene el job tras el primer fichero hasta que el test lo suelte."""
+    reached, release = threading.Event(), threading.Event()
+    progress = jobs.Job.progress
+
+    def gated(job, files_done, *args):
+        progress(job, files_done, *args)
+        if files_done == 1:
+            reached.set()
+            assert release.wait(10)
+
+    monkeypatch.setattr(jobs.Job, "progress", gated)
+    yield reached, release
+    release.set()
+
+
+def _wait(client, job_id):
+    for _ in range(200):
+        js = client.get(f"/admin/jobs/{job_id}", headers=TOKEN).get_json()
+        if js["status"] != "running":
+            return js
+        time.sleep(0.05)
+    raise AssertionError(f"el job {job_id} no termina")
+
+
+def test_second_ingest_joins_running_job_and_progress_is_polled(panel, gate):
+    reached, release = gate
+    first = panel.post("/admin/ingest", headers=TOKEN)
+    assert first.status_code == 202 and first.get_json()["coalesced"] is False
+    job_id = first.get_json()["job_id"]
+    assert reached.wait(10)
+
+    second = panel.post("/admin/ingest?full=1", headers=TOKEN).get_json()
+    assert (second["job_id"], second["coalesced"], second["status"]) == (job_id, True, "running")
+
+    js = panel.get(f"/admin/jobs/{job_id}", headers=TOKEN).get_json()
+    assert (js["status"], js["files_done"], js["files_total"], js["rows"]) == ("running", 1, 2, 3)
+    assert js["bytes_done"] < js["bytes_total"] and js["eta_s"] is not None
+
+    release.set()
+    js = _wait(panel, job_id)
+    assert (js["status"], js["files_done"], js["rows"], js["eta_s"], js["error"]) == ("done", 2, 6, 0, None)
+    assert (js["result"]["inserted"], js["result"]["files"]) == (6, 2)
+
+    # Terminado el job, un nuevo disparo abre otro
+    third = panel.post("/admin/ingest", headers=TOKEN).get_json()
+    assert third["coalesced"] is False and third["job_id"] != job_id
+    assert _wait(panel, third["job_id"])["result"]["processed"] == 0
+
+
+def test_failed_job_reports_its_error(panel, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_panel, "BACKEND_DB", str(tmp_path / "empty.db"))
+    job_id = panel.post("/admin/ingest", headers=TOKEN).get_json()["job_id"]
+    js = _wait(panel, job_id)
+    assert js["ok"] and js["status"] == "error" and "tlt_respuesta" in js["error"]
+    assert js["result"] is None and js["finished"] is not None
+
+
+def test_job_endpoints_require_token_and_known_id(panel):
+    assert panel.post("/admin/ingest").status_code == 401
+    assert panel.get("/admin/jobs/nope").status_code == 401
+    res = panel.get("/admin/jobs/nope", headers=TOKEN)
+    assert res.status_code == 404 and res.get_json() == {"ok": False, "error": "job no encontrado"}
@@ -29,5 +29,5 @@ def test_panel_metrics_csv(client, db):
     r = client.get(url, HTTP_X_PANEL_TOKEN="mi-token-local")
     assert r.status_code == 200
     assert r["Content-Type"].startswith("text/csv")
-    body = r.content.decode("utf-8")
+    body = r.getvalue().decode("utf-8")
     assert "sesion_id,ccp_code,n,aciertos,acierto_pct,tr_ms_avg,first_ts,last_ts" in body
@@ -0,0 +1,124 @@
+import importlib
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+from runtime import rollup
+from talento_core import core_schema
+
+pytestmark = pytest.mark.django_db
+
+rollup_migration = importlib.import_module("runtime.migrations.0009_tlt_respuesta_rollup")
+
+ROWS = [
+    (9101, "MCP", "E1", 1, 500, "2025-10-15 10:00:00"),
+    (9101, "MCP", "E1", 0, 700, "2025-10-15 11:30:00"),
+    (9101, "MCP", "E2", 1, None, "2025-10-16 09:00:00"),
+    (9101, "VPM", "E1", 1, 400, "2025-10-17 23:59:59"),
+    (9101, None, None, 0, 250, "2025-10-17 08:00:00"),
+]
+
+
+@pytest.fixture
+def with_rollup():
+    # La suite no aplica las migraciones de runtime: montamos tabla + triggers a mano
+    with connection.cursor() as cur:
+        for sql in [rollup_migration.SQL_TABLE, rollup_migration.SQL_FILL, *rollup_migration.SQL_TRIGGERS]:
+            cur.execute(sql)
+    core_schema.invalidate()
+    yield
+    core_schema.invalidate()
+
+
+def _insert(rows):
+    with connection.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO tlt_respuesta (sesion_id, ccp_code, ejer_code, correcta, tr_ms, created_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def _rounded(groups):
+    return [{k: round(v, 6) if isinstance(v, float) else v for k, v in g.items()} for g in groups]
+
+
+def _groups():
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT * FROM {rollup.ROLLUP_TABLE} ORDER BY 1, 2, 3, 4")
+        return cur.fetchall()
+
+
+def test_triggers_match_full_rebuild(with_rollup):
+    _insert(ROWS)
+    with connection.cursor() as cur:
+        cur.execute("UPDATE tlt_respuesta SET correcta=1, tr_ms=900 WHERE sesion_id=9101 AND tr_ms IS NULL")
+        cur.execute("DELETE FROM tlt_respuesta WHERE sesion_id=9101 AND tr_ms=700")
+    incremental = _groups()
+    assert rollup.rebuild() == len(incremental)
+    assert _groups() == incremental
+
+
+@pytest.mark.parametrize("query", [
+    "",
+    "&date_from=2025-10-16",
+    "&date_to=2025-10-16",
+    "&date_from=2025-10-15&date_to=2025-10-17&ccp=MCP",
+    "&ejer=E1",
+])
+def test_progress_same_with_and_without_rollup(client, with_rollup, query):
+    _insert(ROWS)
+    url = f"/api/progress?sesion_id=9101{query}"
+    headers = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+    fast = client.get(url, **headers).json()
+    with override_settings(TALENTO_PANEL_ROLLUP=False):
+        raw = client.get(url, **headers).json()
+    assert _rounded(fast["by_ccp"]) == _rounded(raw["by_ccp"])
+    assert _rounded(fast["by_ejer"]) == _rounded(raw["by_ejer"])
+
+
+def test_panel_metrics_same_with_and_without_rollup(client, with_rollup):
+    _insert(ROWS)
+    url = "/panel/metrics?sesion_id=9101&since=2025-10-15&until=2025-10-17"
+    headers = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+    fast = client.get(url, **headers).json()["sessions"]
+    with override_settings(TALENTO_PANEL_ROLLUP=False):
+        raw = client.get(url, **headers).json()["sessions"]
+    assert fast == raw and fast[0]["totals"]["n"] == 3
+
+
+def test_csv_exports_match_progress_json(client):
+    # Sin rollup: JSON y CSV salen de la misma pasada agregada (ccp, ejer)
+    _insert(ROWS)
+    headers = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+    js = client.get("/api/progress?sesion_id=9101", **headers).json()
+    assert js["totals"]["n"] == sum(g["n"] for g in js["by_ccp"]) == len(ROWS)
+
+    lines = client.get("/api/export/session/9101/by_ejer", **headers).getvalue().decode().splitlines()
+    assert len(lines) == 1 + len(js["by_ejer"])
+    for line, g in zip(lines[1:], js["by_ejer"]):
+        ccp_code, ejer_code, n, pct, _ = line.split(",")
+        assert (ccp_code, ejer_code, int(n)) == (g["ccp_code"], g["ejer_code"], g["n"])
+        assert pct == f"{g['acierto_pct']:.1f}"
+
+    lines = client.get("/api/export/session/9101/by_ccp", **headers).getvalue().decode().splitlines()
+    assert [line.split(",")[0] for line in lines[1:]] == [g["ccp_code"] for g in js["by_ccp"]]
+
+
+def test_empty_and_null_codes_are_one_unk_group(client, with_rollup):
+    # '' y NULL son el mismo código desconocido en rollup y filas crudas
+    _insert([(9102, "", "", 1, 100, "2025-10-15 10:00:00"), (9102, None, None, 0, 300, "2025-10-15 11:00:00")])
+    headers = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+    urls = ["/api/progress?sesion_id=9102", "/panel/metrics?sesion_id=9102",
+            "/api/sessions?date_from=2025-10-15&date_to=2025-10-15"]
+    fast = [client.get(url, **headers).json() for url in urls]
+    with override_settings(TALENTO_PANEL_ROLLUP=False):
+        raw = [client.get(url, **headers).json() for url in urls]
+    assert fast == raw
+    progress, metrics, sessions = fast
+    assert [(g["ccp_code"], g["n"]) for g in progress["by_ccp"]] == [("UNK", 2)]
+    assert [(g["ccp_code"], g["ejer_code"], g["n"]) for g in progress["by_ejer"]] == [("UNK", "UNK", 2)]
+    assert [(c["ccp_code"], c["n"]) for c in metrics["sessions"][0]["ccp"]] == [("UNK", 2)]
+    assert next(s for s in sessions["sessions"] if s["sesion_id"] == 9102)["by_ccp"] == {"UNK": 2}
@@ -0,0 +1,28 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from talento_core import core_schema
+
+pytestmark = pytest.mark.django_db
+
+
+def test_ensure_schema_runs_ddl_once():
+    core_schema.invalidate()
+    core_schema.ensure_schema()
+    with CaptureQueriesContext(connection) as ctx:
+        core_schema.ensure_schema()
+        assert core_schema.table_exists("tlt_respuesta")
+        assert "sesion_id" in core_schema.table_columns("tlt_respuesta")
+        assert core_schema.table_exists("TLT_RESPUESTA")
+    assert not any("CREATE TABLE" in q["sql"] for q in ctx.captured_queries)
+
+
+def test_invalidate_picks_up_new_tables():
+    assert not core_schema.table_exists("tmp_schema_probe")
+    with connection.cursor() as cur:
+        cur.execute("CREATE TABLE tmp_schema_probe (x INTEGER)")
+    assert not core_schema.table_exists("tmp_schema_probe")  # cacheado
+    core_schema.invalidate()
+    assert core_schema.table_exists("tmp_schema_probe")
+    core_schema.invalidate()
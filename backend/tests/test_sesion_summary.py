@@ -0,0 +1,123 @@
+import importlib
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+from runtime import rollup
+from talento_core import core_schema
+
+pytestmark = pytest.mark.django_db
+
+summary_migration = importlib.import_module("runtime.migrations.0012_tlt_sesion_summary")
+ccp_migration = importlib.import_module("runtime.migrations.0014_tlt_sesion_ccp_summary")
+
+HEADERS = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+
+
+@pytest.fixture
+def with_summary():
+    m, c = summary_migration, ccp_migration
+    with connection.cursor() as cur:
+        for sql in [m.SQL_TABLE, m.SQL_INDEX, m.SQL_FILL, *m.SQL_TRIGGERS,
+                    c.SQL_TABLE, c.SQL_FILL, *c.SQL_DROP_TRIGGERS, *c.SQL_TRIGGERS]:
+            cur.execute(sql)
+    core_schema.invalidate()
+    yield
+    core_schema.invalidate()
+
+
+def _exec(sql, params=()):
+    with connection.cursor() as cur:
+        cur.execute(sql, list(params))
+
+
+def _answer(sesion_id, ts, ccp="MCP"):
+    _exec(
+        "INSERT INTO tlt_respuesta (sesion_id, ccp_code, correcta, tr_ms, created_at) VALUES (%s, %s, 1, 1, %s)",
+        [sesion_id, ccp, ts],
+    )
+
+
+def _ccp_counts(sesion_id):
+    with connection.cursor() as cur:
+        cur.execute("SELECT ccp_code, n FROM tlt_sesion_ccp_summary WHERE sesion_id = %s ORDER BY 1", [sesion_id])
+        return dict(cur.fetchall())
+
+
+def test_triggers_keep_summary_in_sync(with_summary):
+    for sid, ts in [(9601, "2032-01-02 10:00:00"), (9601, "2032-01-05 10:00:00"),
+                    (9602, "2032-01-03 10:00:00"), (9602, None)]:
+        _answer(sid, ts)
+    assert rollup.summary_drift() == []
+
+    # Mover el extremo obliga a recalcular first/last
+    _exec("UPDATE tlt_respuesta SET created_at = '2032-01-01 09:00:00' "
+          "WHERE sesion_id = 9601 AND created_at = '2032-01-05 10:00:00'")
+    _exec("UPDATE tlt_respuesta SET sesion_id = 9603 WHERE sesion_id = 9602 AND created_at IS NULL")
+    assert rollup.summary_drift() == []
+
+    _exec("DELETE FROM tlt_respuesta WHERE sesion_id = 9603")
+    assert rollup.summary_drift() == []
+    with connection.cursor() as cur:
+        cur.execute("SELECT n_respuestas, CAST(first_ts AS TEXT), last_ts FROM tlt_sesion_summary WHERE sesion_id = 9601")
+        assert cur.fetchone() == (2, "2032-01-01 09:00:00", "2032-01-02 10:00:00")
+        cur.execute("SELECT COUNT(*) FROM tlt_sesion_summary WHERE sesion_id = 9603")
+        assert cur.fetchone()[0] == 0
+
+
+def test_triggers_keep_ccp_counts_in_sync(with_summary):
+    for ccp in ["MCP", "MCP", "MLP", None]:
+        _answer(9631, "2032-04-01 10:00:00", ccp)
+    assert _ccp_counts(9631) == {"": 1, "MCP": 2, "MLP": 1}
+
+    _exec("UPDATE tlt_respuesta SET ccp_code = 'MLP' WHERE sesion_id = 9631 AND ccp_code IS NULL")
+    _exec("DELETE FROM tlt_respuesta WHERE sesion_id = 9631 AND ccp_code = 'MCP'")
+    assert _ccp_counts(9631) == {"MLP": 2}
+    assert rollup.summary_drift() == []
+
+    _exec("UPDATE tlt_sesion_ccp_summary SET n = 5 WHERE sesion_id = 9631")
+    _exec("INSERT INTO tlt_sesion_ccp_summary (sesion_id, ccp_code, n) VALUES (9632, 'MCP', 1)")
+    assert rollup.summary_drift() == [9631, 9632]
+    rollup.reconcile_summary(rollup.summary_drift())
+    assert rollup.summary_drift() == []
+    assert _ccp_counts(9631) == {"MLP": 2}
+    assert _ccp_counts(9632) == {}
+
+
+def test_reconcile_repairs_drift(with_summary):
+    _answer(9611, "2032-02-01 10:00:00")
+    _exec("UPDATE tlt_sesion_summary SET n_respuestas = 99 WHERE sesion_id = 9611")
+    _exec("INSERT INTO tlt_sesion_summary (sesion_id, n_respuestas, last_ts) VALUES (9612, 1, '')")
+    assert rollup.summary_drift() == [9611, 9612]
+    assert rollup.summary_drift(9611) == [9611]
+
+    rollup.reconcile_summary(rollup.summary_drift())
+    assert rollup.summary_drift() == []
+
+
+def test_sessions_same_with_and_without_summary(client, with_summary):
+    for sid, ts, ccp in [(9621, "2032-03-02 10:00:00", "MCP"), (9622, "2032-03-02 10:00:00", None),
+                         (9623, "2032-03-01 10:00:00", "MCP"), (9623, "2032-03-04 10:00:00", "MLP")]:
+        _answer(sid, ts, ccp)
+
+    def pages(**params):
+        out, cursor = [], None
+        while True:
+            js = client.get("/api/sessions", {"limit": 2, "total": 1, **params,
+                                              **({"cursor": cursor} if cursor else {})}, **HEADERS).json()
+            out.append((js["sessions"], js["total"]))
+            cursor = js["next_cursor"]
+            if not cursor:
+                return out
+
+    for params in [{"q": "962"}, {"q": "962", "date_from": "2032-03-02"}, {}]:
+        fast = pages(**params)
+        with override_settings(TALENTO_PANEL_ROLLUP=False):
+            slow = pages(**params)
+        assert fast == slow
+
+    sessions = {s["sesion_id"]: s["by_ccp"] for page, _ in pages(q="962") for s in page}
+    assert sessions[9622] == {"UNK": 1}
+    assert sessions[9623] == {"MCP": 1, "MLP": 1}
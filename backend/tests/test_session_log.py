@@ -0,0 +1,43 @@
+import json
+import multiprocessing
+import os
+import sys
+
+_PLAY_UI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "play-ui")
+if _PLAY_UI not in sys.path:
+    sys.path.insert(0, _PLAY_UI)
+import session_log  # noqa: E402
+
+WORKERS, RECORDS = 4, 300
+
+
+def _worker(sess_dir, worker):
+    # Como un worker de gunicorn: writer propio, mismo directorio y sesión
+    writer = session_log.SessionLogWriter(sess_dir, fsync_s=0.05, segment_bytes=8 * 1024)
+    for i in range(RECORDS):
+        writer.append(9801, {"worker": worker, "i": i, "pad": "x" * (50 + i % 200)})
+    writer.close()
+
+
+def test_concurrent_processes_write_whole_lines(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_worker, args=(str(tmp_path), w)) for w in range(WORKERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    segments = sorted(n for n in os.listdir(tmp_path) if n.startswith("session_9801"))
+    seen = set()
+    for name in segments:
+        with open(tmp_path / name, encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)  # ninguna línea intercalada o partida
+                seen.add((rec["worker"], rec["i"]))
+    assert len(seen) == WORKERS * RECORDS
+    assert len(segments) > 1
+
+    with open(tmp_path / session_log.MANIFEST_NAME, encoding="utf-8") as f:
+        announced = [e["path"] for e in map(json.loads, f) if "sesion_id" in e]
+    assert sorted(announced) == segments
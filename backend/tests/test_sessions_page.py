@@ -0,0 +1,50 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+
+pytestmark = pytest.mark.django_db
+
+HEADERS = {"HTTP_X_PANEL_TOKEN": settings.PANEL_ORIENTADOR_TOKEN}
+
+# Fechas futuras para aislar estas sesiones de las del fixture
+SESSIONS = {9401: "2031-01-05 10:00:00", 9402: "2031-01-03 10:00:00", 9403: "2031-01-05 10:00:00",
+            9404: "2031-01-01 10:00:00", 9510: "2031-01-02 10:00:00"}
+
+
+@pytest.fixture
+def sessions():
+    with connection.cursor() as cur:
+        for sid, ts in SESSIONS.items():
+            cur.execute(
+                "INSERT INTO tlt_respuesta (sesion_id, ccp_code, correcta, tr_ms, created_at) VALUES (%s, 'MCP', 1, 1, %s)",
+                [sid, ts],
+            )
+
+
+def _get(client, **params):
+    params.setdefault("date_from", "2031-01-01")
+    return client.get("/api/sessions", params, **HEADERS)
+
+
+def test_keyset_pages_cover_all_sessions_in_order(client, sessions):
+    seen, cursor = [], None
+    while True:
+        js = _get(client, limit=2, **({"cursor": cursor} if cursor else {})).json()
+        assert len(js["sessions"]) <= 2 and "total" not in js
+        seen += [s["sesion_id"] for s in js["sessions"]]
+        cursor = js["next_cursor"]
+        if not cursor:
+            break
+    # fecha_ultima desc; empate → sesion_id desc
+    assert seen == [9403, 9401, 9402, 9510, 9404]
+
+
+def test_prefix_search_and_total(client, sessions):
+    js = _get(client, q="940", total=1).json()
+    assert [s["sesion_id"] for s in js["sessions"]] == [9403, 9401, 9402, 9404]
+    assert js["total"] == 4 and js["next_cursor"] is None
+
+
+@pytest.mark.parametrize("params", [{"cursor": "no-es-un-cursor"}, {"q": "9a"}, {"limit": "x"}])
+def test_bad_params_return_400(client, params):
+    assert _get(client, **params).status_code == 400
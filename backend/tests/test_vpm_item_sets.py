@@ -0,0 +1,51 @@
+import json
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ccp_vpm import cache
+from ccp_vpm.models import Item
+from ccp_vpm.signals import items_reseeded
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls("ccp_vpm.urls")]
+
+
+def _create(client):
+    return client.post("/api/v1/sessions", data=json.dumps({"vpm_mode": "VIS_I"}),
+                       content_type="application/json")
+
+
+def test_create_session_serves_cached_item_set(client):
+    cache.invalidate()
+    Item.objects.create(submodality="VIS_I", difficulty_level=2, stimulus={"base": "<s>"},
+                        options=[{}], correct_index=0)
+    first = _create(client).json()
+    assert first["items"][-1]["stimulus"] == {"base": "<s>"}
+
+    with CaptureQueriesContext(connection) as ctx:
+        second = _create(client).json()
+    assert second["items"] == first["items"]
+    assert second["session_id"] != first["session_id"]
+    assert not any("ccp_vpm_item" in q["sql"] for q in ctx.captured_queries)
+
+
+def test_item_changes_and_reseed_bump_version():
+    cache.item_set("VIS_S")
+    v = cache.version()
+    Item.objects.create(submodality="VIS_S", difficulty_level=1, stimulus={}, options=[], correct_index=0)
+    assert cache.version() > v
+    v = cache.version()
+    items_reseeded.send(sender=None)
+    assert cache.version() > v
+    assert "\\u003C" in cache.ItemSet(0, [{"x": "<"}]).script_json
+
+
+def test_correct_index_map_sees_in_place_updates(settings):
+    settings.CCP_VPM_ITEMSET_TTL_S = 0
+    cache.invalidate()
+    item = Item.objects.create(submodality="VIS_S", difficulty_level=1, stimulus={}, options=[], correct_index=0)
+    assert cache.correct_index_map([item.id]) == {item.id: 0}
+
+    # update() no emite señales: solo la firma de contenido lo detecta
+    Item.objects.filter(pk=item.pk).update(correct_index=2)
+    assert cache.correct_index_map([item.id]) == {item.id: 2}
@@ -0,0 +1,53 @@
+import json
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ccp_vpm import cache
+from ccp_vpm.models import Item, Session, Trial
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls("ccp_vpm.urls")]
+
+
+def _item(correct, lvl=1):
+    return Item.objects.create(submodality="VIS_S", difficulty_level=lvl, stimulus={},
+                               options=[{}, {}, {}], correct_index=correct)
+
+
+def _post(client, body):
+    return client.post("/api/v1/trials/batch", data=json.dumps(body), content_type="application/json")
+
+
+def test_batch_stores_trials_with_constant_queries(client):
+    sess = Session.objects.create(vpm_mode="VIS_S")
+    items = [_item(i % 3, lvl=i + 1) for i in range(6)]
+    trials = [
+        {"item_id": it.id, "started_ms": 1000, "responded_ms": 1400 + i, "chosen_index": 0}
+        for i, it in enumerate(items)
+    ]
+    cache.correct_index_map()  # caché caliente
+    with CaptureQueriesContext(connection) as ctx:
+        r = _post(client, {"session_id": sess.id, "trials": trials})
+    assert r.status_code == 200
+    js = r.json()
+    assert js["n"] == 6
+    assert [x["is_correct"] for x in js["results"]] == [True, False, False, True, False, False]
+    assert js["results"][2]["response_time_ms"] == 402
+    assert Trial.objects.filter(session=sess).count() == 6
+    # in_bulk de sesiones + bulk_create (+ savepoint/transacción), sin consultas por ensayo
+    assert len(ctx.captured_queries) <= 4
+
+
+def test_batch_rejects_unknown_ids_and_item_changes_invalidate_cache(client):
+    sess = Session.objects.create(vpm_mode="VIS_S")
+    it = _item(1)
+    r = _post(client, {"session_id": sess.id, "trials": [
+        {"item_id": 987654, "started_ms": 0, "responded_ms": 10, "chosen_index": 1}]})
+    assert r.status_code == 404 and r.json()["missing_items"] == [987654]
+    assert Trial.objects.filter(session=sess).count() == 0
+
+    it.correct_index = 2
+    it.save()
+    r = _post(client, {"session_id": sess.id, "trials": [
+        {"item_id": it.id, "started_ms": 0, "responded_ms": 10, "chosen_index": 2}]})
+    assert r.json()["results"][0]["is_correct"] is True
@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+
+from talento_core import core_writebehind
+from talento_core.core_ingest import TLT_COLUMNS
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def buf():
+    b = core_writebehind.WriteBehindBuffer(max_rows=1000, max_age_ms=60000)
+    yield b
+    b.close()
+
+
+def _submission(sesion_id, item_id):
+    parts = [("tlt_respuesta", TLT_COLUMNS, [(sesion_id, "MCP", "E1", item_id, "r", 1, 100)])]
+    return parts, core_writebehind.FlushTicket()
+
+
+def test_bad_submission_does_not_sink_the_group(buf):
+    good1, bad, good2 = _submission(9961, "a"), _submission(None, "b"), _submission(9961, "c")
+    # Escritura directa en este hilo (misma conexión/transacción que el test)
+    buf._write([good1, bad, good2])
+
+    with connection.cursor() as cur:
+        cur.execute("SELECT item_id FROM tlt_respuesta WHERE sesion_id = 9961 ORDER BY item_id")
+        assert cur.fetchall() == [("a",), ("c",)]
+    assert good1[1].error is None and good2[1].error is None
+    assert bad[1].error is not None and bad[1].wait(0)
+
+    failed = core_writebehind.failure(bad[1].id)
+    assert failed["ticket"] == bad[1].id and failed["error"]
+    assert core_writebehind.failure(good1[1].id) is None
+
+
+def test_ticket_endpoint_reports_failure(client, buf):
+    bad = _submission(None, "x")
+    buf._write([bad])
+    js = client.get(f"/api/answers/tickets/{bad[1].id}").json()
+    assert js["status"] == "failed" and js["error"]
+    assert client.get("/api/answers/tickets/desconocido").status_code == 404
+
+
+def test_ticket_is_ok_only_after_commit(client, buf, monkeypatch):
+    monkeypatch.setattr(core_writebehind, "_buffer", buf)
+    # Encolado sin vaciar (max_age 60 s): consta como pendiente
+    ticket = buf.submit(*_submission(9962, "p")[0])
+    assert client.get(f"/api/answers/tickets/{ticket.id}").json()["status"] == "pending"
+    with buf._cond:
+        batch, buf._pending, buf._n_pending = buf._pending, [], 0
+
+    # Se escribe en este hilo (misma conexión que el test) y queda confirmado
+    buf._write(batch)
+    buf._unresolved.clear()
+    js = client.get(f"/api/answers/tickets/{ticket.id}").json()
+    assert js["status"] == "ok" and ticket.error is None
@@ -1,5 +1,6 @@
 from flask import Flask, render_template, request, jsonify
-import os, sqlite3, argparse, subprocess, sys
+import os, sqlite3, argparse, sys
+from jobs import runner
 
 app = Flask(__name__, template_folder="templates")
 
@@ -10,6 +11,15 @@ BACKEND_DB = os.environ.get("BACKEND_DB", "./backend/talento_READY_2025-09-14.db
 PANEL_ADMIN_TOKEN = os.environ.get("PANEL_ADMIN_TOKEN", "pmv-local")
 
 
+def _ingestor():
+    """Módulo scripts/ingest_jsonl_to_sqlite.py (comparte lógica con el ingestor del PMV)."""
+    scripts = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    import ingest_jsonl_to_sqlite
+    return ingest_jsonl_to_sqlite
+
+
 def db_connect():
     return sqlite3.connect(BACKEND_DB)
 
@@ -45,47 +55,46 @@ def health():
 @app.post("/admin/ingest")
 def admin_ingest():
     """
-    Importa sesiones JSONL -> SQLite llamando al script del PMV.
+    Lanza la ingesta JSONL -> SQLite como job en segundo plano (en este proceso).
+    Responde 202 con {job_id}; el progreso se consulta en GET /admin/jobs/<id>.
+    Un disparo mientras hay otra ingesta en marcha devuelve el job existente.
     Protección básica con token (query ?token=... o header X-Panel-Token).
     """
     token = request.args.get("token") or request.headers.get("X-Panel-Token", "")
     if token != PANEL_ADMIN_TOKEN:
         return {"ok": False, "error": "unauthorized"}, 401
 
-    # Ejecuta el ingestor del PMV con BACKEND_DB heredado / forzado
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    env = os.environ.copy()
-    env["BACKEND_DB"] = os.environ.get("BACKEND_DB", os.path.join(root, "backend", "talento_READY_2025-09-14.db"))
+    full = request.args.get("full", "") in ("1", "true")
+    job, coalesced = runner.submit("ingest", lambda job: _ingest_job(job, full))
+    return {"ok": True, "job_id": job.id, "coalesced": coalesced, "status": job.status}, 202
 
-    cmd = [sys.executable, os.path.join(root, "scripts", "ingest_jsonl_to_sqlite.py")]
-    run = subprocess.run(cmd, cwd=root, env=env, capture_output=True, text=True)
+
+def _ingest_job(job, full=False):
+    ingest = _ingestor()
+    res = ingest.run(BACKEND_DB, ingest.SESS_DIR, full=full, progress=job.progress)
 
     # (Opcional) Afinar la DB tras ingesta
     try:
-        with sqlite3.connect(env["BACKEND_DB"]) as con:
+        with sqlite3.connect(BACKEND_DB) as con:
             con.execute("ANALYZE;")
             con.execute("PRAGMA optimize;")
     except Exception:
         pass  # no crítico
-
-    return {
-        "ok": (run.returncode == 0),
-        "stdout": run.stdout,
-        "stderr": run.stderr
-    }, (200 if run.returncode == 0 else 500)
+    return res
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--host", default="127.0.0.1")
-    parser.add_argument("--port", type=int, default=5002)
-    args = parser.parse_args()
-    app.run(host=args.host, port=args.port, debug=False)
+@app.get("/admin/jobs/<job_id>")
+def admin_job(job_id):
+    """Estado de un job: filas procesadas, ritmo (filas/s) y ETA estimada por bytes pendientes."""
+    token = request.args.get("token") or request.headers.get("X-Panel-Token", "")
+    if token != PANEL_ADMIN_TOKEN:
+        return {"ok": False, "error": "unauthorized"}, 401
+    job = runner.get(job_id)
+    if job is None:
+        return {"ok": False, "error": "job no encontrado"}, 404
+    return {"ok": True, **job.to_dict()}
 
 
-if __name__ == "__main__":
-    main()
-
 @app.post("/admin/purge")
 def admin_purge():
     """Elimina respuestas de una sesión concreta. Uso: POST /admin/purge?token=...&sesion=101"""
@@ -97,6 +106,13 @@ def admin_purge():
         return {"ok": False, "error": "sesion inválida"}, 400
     with sqlite3.connect(BACKEND_DB) as con:
         cur = con.cursor()
+        # Borrar antes las filas derivadas (rollup/resumen, si existen): así los
+        # triggers de borrado no recalculan extremos fila a fila
+        derived = {r[0] for r in cur.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' "
+            "AND name IN ('tlt_respuesta_rollup','tlt_sesion_summary','tlt_sesion_ccp_summary');")}
+        for table in sorted(derived):
+            cur.execute(f"DELETE FROM {table} WHERE sesion_id=?;", (int(sesion),))
         cur.execute("DELETE FROM tlt_respuesta WHERE sesion_id=?;", (int(sesion),))
         con.commit()
         deleted = cur.rowcount if cur.rowcount is not None else 0
@@ -109,20 +125,20 @@ def admin_reindex():
     if token != PANEL_ADMIN_TOKEN:
         return {"ok": False, "error": "unauthorized"}, 401
     with sqlite3.connect(BACKEND_DB) as con:
-        cur = con.cursor()
-        # Limpieza duplicados + índice único (igual que el ingestor)
-        cur.execute("""
-            DELETE FROM tlt_respuesta
-            WHERE rowid NOT IN (
-                SELECT MIN(rowid)
-                FROM tlt_respuesta
-                GROUP BY sesion_id, ejer_code, item_id
-            );
-        """)
-        cur.execute("""
-            CREATE UNIQUE INDEX IF NOT EXISTS idx_tlt_resp_unique
-              ON tlt_respuesta (sesion_id, ejer_code, item_id);
-        """)
+        # Dedupe por tramos (reanudable) + índice único; no-op si el índice ya existe
+        res = _ingestor().migrate_unique_index(con)
         con.execute("ANALYZE;")
         con.execute("PRAGMA optimize;")
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True, **res}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5002)
+    args = parser.parse_args()
+    app.run(host=args.host, port=args.port, debug=False)
+
+
+if __name__ == "__main__":
+    main()
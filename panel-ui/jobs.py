@@ -0,0 +1,99 @@
+# Talento · PMV Evaluador — jobs de mantenimiento en segundo plano (panel-ui)
+"""
+Runner de jobs dentro del proceso del panel.
+
+- Un único job en ejecución a la vez: un disparo mientras otro corre se
+  fusiona con él (se devuelve el mismo job_id).
+- Cada job expone progreso (filas, ficheros, bytes) y de ahí ritmo y ETA.
+- Se guarda un historial corto (MAX_HISTORY) para consultar jobs terminados.
+"""
+import time, uuid, threading
+from collections import OrderedDict
+
+MAX_HISTORY = 20
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "running"
+        self.started = time.time()
+        self.finished = None
+        self.rows = 0
+        self.files_done = self.files_total = 0
+        self.bytes_done = self.bytes_total = 0
+        self.result = None
+        self.error = None
+
+    def progress(self, files_done, files_total, rows, bytes_done, bytes_total):
+        self.files_done, self.files_total = files_done, files_total
+        self.rows = rows
+        self.bytes_done, self.bytes_total = bytes_done, bytes_total
+
+    def to_dict(self):
+        elapsed = (self.finished or time.time()) - self.started
+        rate = self.rows / elapsed if elapsed > 0 else None
+        eta = None
+        if self.status == "running" and self.bytes_done and self.bytes_total:
+            # ETA por bytes: el tamaño pendiente se conoce antes de parsear
+            eta = (self.bytes_total - self.bytes_done) * elapsed / self.bytes_done
+        elif self.status != "running":
+            eta = 0
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "started": self.started,
+            "finished": self.finished,
+            "elapsed_s": round(elapsed, 3),
+            "rows": self.rows,
+            "files_done": self.files_done,
+            "files_total": self.files_total,
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "rows_per_s": round(rate, 1) if rate is not None else None,
+            "eta_s": round(eta, 1) if eta is not None else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRunner:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._current = None
+
+    def submit(self, kind, fn):
+        """
+        Lanza fn(job) en un hilo. Si ya hay un job en marcha, no lanza otro:
+        devuelve (job_en_curso, True). fn devuelve el resultado (dict) del job.
+        """
+        with self._lock:
+            if self._current is not None and self._current.status == "running":
+                return self._current, True
+            job = Job(kind)
+            self._current = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_HISTORY:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self._run, args=(job, fn), name=f"panel-job-{job.id}", daemon=True).start()
+        return job, False
+
+    def _run(self, job, fn):
+        try:
+            job.result = fn(job)
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+runner = JobRunner()
@@ -1,6 +1,8 @@
 \
 from flask import Flask, render_template, request, jsonify
 import os, json, time, uuid, argparse
+from session_log import get_writer
+import direct_db
 
 app = Flask(__name__, template_folder="templates")
 
@@ -29,10 +31,20 @@ def submit():
         "answers": payload.get("answers", []),
         "meta": {"agent": request.headers.get("User-Agent", "")}
     }
-    out = os.path.join(SESS_DIR, f"session_{session_id}.jsonl")
-    with open(out, "a") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-    return jsonify({"ok": True, "stored": out})
+    # Writer por proceso: handles en LRU, fsync por intervalo y rotación por tamaño.
+    # El append es un único write() (el fsync va en segundo plano) y se hace antes
+    # de la DB: es el respaldo si el UPSERT directo falla
+    out = get_writer(SESS_DIR).append(session_id, rec)
+    resp = {"ok": True, "stored": out}
+    if direct_db.enabled():
+        # Modo directo: UPSERT inmediato; el JSONL queda como auditoría y respaldo
+        # (si la DB falla o le falta el índice único, la siguiente ingesta de
+        # ficheros recupera estas filas)
+        try:
+            resp["db"] = {"ok": True, "rows": direct_db.write_record(BACKEND_DB, rec)}
+        except Exception as e:
+            resp["db"] = {"ok": False, "error": str(e)}
+    return jsonify(resp)
 
 @app.get("/health")
 def health():
@@ -0,0 +1,99 @@
+# Talento · PMV Evaluador — ingesta directa a SQLite desde play-ui (opcional)
+"""
+Modo PLAY_DIRECT_DB=1: /submit escribe las respuestas directamente en
+tlt_respuesta con el mismo UPSERT (sesion_id, ejer_code, item_id) que el
+ingestor, usando un pool de conexiones SQLite (WAL + busy_timeout).
+
+El JSONL sigue escribiéndose como log de auditoría; una ingesta posterior
+de esos ficheros no reescribe nada (las filas ya están y no cambian).
+
+El UPSERT necesita el índice único idx_tlt_resp_unique. Si falta, el modo
+directo se rechaza (DirectDBUnavailable) y /submit se queda solo con el JSONL:
+la migración (dedupe de toda la tabla + índice) es de /admin/reindex o del
+ingestor, nunca de una petición de un jugador.
+"""
+import os, sys, queue, sqlite3, threading
+from contextlib import contextmanager
+
+_SCRIPTS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts"))
+if _SCRIPTS not in sys.path:
+    sys.path.insert(0, _SCRIPTS)
+import ingest_jsonl_to_sqlite as ingest  # noqa: E402  (normalize_record / upsert_rows / índice único)
+
+DEF_POOL_SIZE = int(os.environ.get("PLAY_DB_POOL", "4"))
+DEF_BUSY_TIMEOUT_MS = int(os.environ.get("PLAY_DB_BUSY_TIMEOUT_MS", "5000"))
+
+
+class DirectDBUnavailable(RuntimeError):
+    """La DB no admite el UPSERT directo (falta el índice único)."""
+
+
+def enabled():
+    return os.environ.get("PLAY_DIRECT_DB", "0").lower() in ("1", "true", "yes", "on")
+
+
+class ConnectionPool:
+    def __init__(self, db_path, size=DEF_POOL_SIZE, busy_timeout_ms=DEF_BUSY_TIMEOUT_MS):
+        self.db_path = db_path
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, int(size)))
+        con = self._connect()
+        # Solo se comprueba (consulta a sqlite_master); la migración no es de aquí
+        if not ingest.has_unique_index(con.cursor()):
+            con.close()
+            raise DirectDBUnavailable(
+                f"falta {ingest.UNIQUE_INDEX}: ejecuta /admin/reindex o el ingestor (--migrate-index)"
+            )
+        self._idle.put(con)
+
+    def _connect(self):
+        con = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000.0,
+                              check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL;")
+        con.execute("PRAGMA synchronous=NORMAL;")
+        con.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms};")
+        return con
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                con = self._idle.get_nowait()
+            except queue.Empty:
+                con = self._connect()
+            try:
+                yield con
+            except Exception:
+                con.rollback()
+                raise
+            finally:
+                self._idle.put(con)
+        finally:
+            self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(db_path):
+    """Pool del proceso; si la DB aún no tiene el índice se reintenta en la siguiente llamada."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(db_path)
+    return _pool
+
+
+def write_record(db_path, rec):
+    """UPSERT de las respuestas de un registro de sesión; devuelve el nº de filas aplicadas."""
+    rows = list(ingest.normalize_record(rec))
+    if not rows:
+        return 0
+    with get_pool(db_path).connection() as con:
+        with con:  # commit / rollback
+            ingest.upsert_rows(con.cursor(), rows)
+    return len(rows)
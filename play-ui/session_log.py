@@ -0,0 +1,214 @@
+# Talento · PMV Evaluador — writer de sesiones JSONL (play-ui)
+"""
+Escritor de logs de sesión; seguro con varios procesos (workers de gunicorn)
+escribiendo en el mismo directorio.
+
+- Mantiene abiertos los ficheros "calientes" en un LRU (PLAY_LOG_MAX_OPEN).
+- Cada registro es un único write() de la línea completa sobre un fichero en
+  O_APPEND sin buffer: las líneas de distintos procesos no se intercalan.
+  Un hilo de fondo hace fsync cada PLAY_LOG_FSYNC_S segundos (0 → fsync en
+  cada escritura).
+- Rota segmentos por tamaño real en disco (PLAY_LOG_SEGMENT_BYTES):
+      session_<id>.jsonl, session_<id>.1.jsonl, session_<id>.2.jsonl, ...
+  (todos siguen encajando en el glob session_*.jsonl del ingestor). Crear un
+  segmento y anotarlo en el manifest va bajo un flock (.manifest.lock): si
+  otro proceso ya rotó, se reutiliza su segmento.
+- Cada segmento nuevo se anota en manifest.jsonl (append + fsync), que el
+  ingestor lee de forma incremental en lugar de escanear el directorio.
+"""
+import os, json, time, atexit, logging, threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock (un solo proceso)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+LOCK_NAME = ".manifest.lock"
+
+DEF_MAX_OPEN = int(os.environ.get("PLAY_LOG_MAX_OPEN", "64"))
+DEF_FSYNC_S = float(os.environ.get("PLAY_LOG_FSYNC_S", "1.0"))
+DEF_SEGMENT_BYTES = int(os.environ.get("PLAY_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+
+def segment_name(session_id, seq):
+    return f"session_{session_id}.jsonl" if seq == 0 else f"session_{session_id}.{seq}.jsonl"
+
+
+class _Segment:
+    __slots__ = ("path", "seq", "size", "fh", "dirty")
+
+    def __init__(self, path, seq, size, fh):
+        self.path, self.seq, self.size, self.fh = path, seq, size, fh
+        self.dirty = False
+
+
+class SessionLogWriter:
+    def __init__(self, sess_dir, max_open=DEF_MAX_OPEN, fsync_s=DEF_FSYNC_S,
+                 segment_bytes=DEF_SEGMENT_BYTES):
+        self.sess_dir = sess_dir
+        self.max_open = max(1, int(max_open))
+        self.fsync_s = max(0.0, float(fsync_s))
+        self.segment_bytes = max(1, int(segment_bytes))
+        self.manifest_path = os.path.join(sess_dir, MANIFEST_NAME)
+        self.lock_path = os.path.join(sess_dir, LOCK_NAME)
+        self._lock = threading.Lock()
+        self._open = OrderedDict()   # session_id -> _Segment (LRU)
+        self._seq = {}               # session_id -> último segmento conocido
+        self._closed = False
+        os.makedirs(sess_dir, exist_ok=True)
+        with self._dir_lock():
+            self._load_manifest()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.fsync_s > 0:
+            self._thread = threading.Thread(target=self._run, name="play-session-log", daemon=True)
+            self._thread.start()
+
+    @contextmanager
+    def _dir_lock(self):
+        """Exclusión entre procesos para crear segmentos y escribir el manifest (no reentrante)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    # ---- manifest ----
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            # Arranque inicial: registramos una vez los ficheros previos al manifest
+            entries = []
+            for name in sorted(os.listdir(self.sess_dir)):
+                if name.startswith("session_") and name.endswith(".jsonl"):
+                    entries.append({"path": name, "ts": time.time()})
+            self._append_manifest(entries)
+            return
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue  # línea a medio escribir tras un corte
+                if "sesion_id" in e:
+                    sid = str(e["sesion_id"])
+                    self._seq[sid] = max(self._seq.get(sid, 0), int(e.get("seq", 0)))
+
+    def _append_manifest(self, entries):
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            for e in entries:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # ---- segmentos ----
+    def _open_segment(self, sid, seq):
+        path = os.path.join(self.sess_dir, segment_name(sid, seq))
+        # Binario sin buffer: cada write() es un os.write() en O_APPEND
+        if os.path.exists(path):
+            fh = open(path, "ab", buffering=0)
+        else:
+            # Crear y anunciar bajo el lock: un solo proceso lo anota en el manifest
+            with self._dir_lock():
+                is_new = not os.path.exists(path)
+                fh = open(path, "ab", buffering=0)
+                if is_new:
+                    self._append_manifest([{"path": os.path.basename(path), "sesion_id": sid, "seq": seq,
+                                            "ts": time.time()}])
+        seg = _Segment(path, seq, os.fstat(fh.fileno()).st_size, fh)
+        self._open[sid] = seg
+        self._seq[sid] = seq
+        return seg
+
+    def _sync(self, seg):
+        if seg.dirty:
+            os.fsync(seg.fh.fileno())
+            seg.dirty = False
+
+    def _close_segment(self, sid):
+        seg = self._open.pop(sid)
+        self._sync(seg)
+        seg.fh.close()
+
+    def _segment_for(self, sid, nbytes):
+        seg = self._open.get(sid)
+        if seg is None:
+            seg = self._open_segment(sid, self._seq.get(sid, 0))
+            while len(self._open) > self.max_open:
+                self._close_segment(next(iter(self._open)))
+        else:
+            self._open.move_to_end(sid)
+            # Tamaño real: otros procesos también añaden a este segmento
+            seg.size = os.fstat(seg.fh.fileno()).st_size
+        # Si otro proceso ya rotó, se sigue en su segmento mientras quepa
+        while seg.size and seg.size + nbytes > self.segment_bytes:
+            seq = seg.seq + 1
+            self._close_segment(sid)
+            seg = self._open_segment(sid, seq)
+        return seg
+
+    # ---- API ----
+    def append(self, session_id, rec):
+        """Añade un registro a la sesión; devuelve la ruta del segmento usado."""
+        sid = str(session_id)
+        data = (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8")
+        nbytes = len(data)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("session log cerrado")
+            seg = self._segment_for(sid, nbytes)
+            seg.fh.write(data)
+            seg.size += nbytes
+            seg.dirty = True
+            if self.fsync_s == 0:
+                self._sync(seg)
+            return seg.path
+
+    def flush(self):
+        with self._lock:
+            for seg in self._open.values():
+                self._sync(seg)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for sid in list(self._open):
+                self._close_segment(sid)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.fsync_s):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("session log: fsync falló (se reintenta en %.1f s)", self.fsync_s)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(sess_dir):
+    """Writer único del proceso (se vacía al salir); cada worker tiene el suyo."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SessionLogWriter(sess_dir)
+                atexit.register(_writer.close)
+    return _writer
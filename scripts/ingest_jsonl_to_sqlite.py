@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 # Talento · PMV Evaluador — JSONL → SQLite
-# v1.1-idempotent (UPSERT + dedupe + índice único)
-import os, sys, json, glob, sqlite3, time
+# v1.4 (UPSERT + índice único con dedupe reanudable + checkpoint por fichero + parseo en paralelo)
+import os, sys, json, glob, sqlite3, time, argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if os.path.join(ROOT, "backend") not in sys.path:
+    sys.path.insert(0, os.path.join(ROOT, "backend"))
+# Misma regla de correcta que la API (módulo sin dependencias de Django)
+from talento_core.correcta import coerce_correcta  # noqa: E402
+
 SESS_DIR = os.path.join(ROOT, "data", "sessions")
 DB_PATH  = os.environ.get("BACKEND_DB", os.path.join(ROOT, "backend", "talento_READY_2025-09-14.db"))
 
@@ -11,67 +18,436 @@ DB_PATH  = os.environ.get("BACKEND_DB", os.path.join(ROOT, "backend", "talento_R
 DEF_CCP  = "VPM"
 DEF_EJER = "VPM_CFANT_S"
 
-def iter_records():
-    for path in sorted(glob.glob(os.path.join(SESS_DIR, "session_*.jsonl"))):
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    yield json.loads(line)
+# Modo pipeline: filas por transacción del escritor
+PIPELINE_BATCH_ROWS = 50000
 
-def ensure_unique_index(cur):
-    # Limpia duplicados antiguos y crea índice único (sesion_id, ejer_code, item_id)
-    cur.execute("""
-        DELETE FROM tlt_respuesta
-        WHERE rowid NOT IN (
-            SELECT MIN(rowid)
-            FROM tlt_respuesta
-            GROUP BY sesion_id, ejer_code, item_id
-        );
-    """)
+# Checkpoint por fichero: hasta qué byte se consumió (y de qué inode/mtime)
+STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS tlt_ingest_state (
+        path       TEXT PRIMARY KEY,
+        inode      INTEGER,
+        offset     INTEGER NOT NULL DEFAULT 0,
+        mtime      REAL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+def ensure_state_table(cur):
+    cur.execute(STATE_DDL)
+
+def load_state(cur):
+    cur.execute("SELECT path, inode, offset, mtime FROM tlt_ingest_state;")
+    return {p: (ino, off, mt) for p, ino, off, mt in cur.fetchall()}
+
+def save_state(cur, rel, inode, offset, mtime):
     cur.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS idx_tlt_resp_unique
-            ON tlt_respuesta (sesion_id, ejer_code, item_id);
-    """)
+        INSERT INTO tlt_ingest_state (path, inode, offset, mtime, updated_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(path) DO UPDATE SET
+            inode=excluded.inode, offset=excluded.offset,
+            mtime=excluded.mtime, updated_at=excluded.updated_at;
+    """, (rel, inode, offset, mtime))
+
+# Manifest de segmentos que escribe play-ui (session_log.py)
+MANIFEST_NAME = "manifest.jsonl"
+
+def discover_files(cur, state, sess_dir=SESS_DIR, full=False):
+    """
+    Ficheros a revisar. Con manifest: los ya conocidos (tlt_ingest_state) más los
+    segmentos anotados desde el último offset del manifest, sin escanear el directorio.
+    Sin manifest (o con --full): glob de session_*.jsonl.
+    Los segmentos nuevos se registran con offset 0 junto con el offset del manifest.
+    """
+    manifest = os.path.join(sess_dir, MANIFEST_NAME)
+    if full or not os.path.exists(manifest):
+        return sorted(glob.glob(os.path.join(sess_dir, "session_*.jsonl")))
+
+    st = os.stat(manifest)
+    prev = state.get(MANIFEST_NAME)
+    start = prev[1] if prev and prev[0] == st.st_ino and st.st_size >= prev[1] else 0
+    entries, end = read_new_records(manifest, start)
+    for e in entries:
+        rel = e.get("path")
+        if rel and rel not in state:
+            state[rel] = (None, 0, None)
+            save_state(cur, rel, None, 0, None)
+    save_state(cur, MANIFEST_NAME, st.st_ino, end, st.st_mtime)
+    cur.connection.commit()
+    return sorted(os.path.join(sess_dir, rel) for rel in state if rel != MANIFEST_NAME)
+
+def pending_files(state, sess_dir=SESS_DIR, full=False, paths=None):
+    """
+    Ficheros con bytes nuevos: [(path, rel, start_offset, inode, mtime, size)].
+    Si cambia el inode o el fichero encoge (rotación/truncado) se relee desde 0.
+    """
+    out = []
+    if paths is None:
+        paths = sorted(glob.glob(os.path.join(sess_dir, "session_*.jsonl")))
+    for path in paths:
+        rel = os.path.relpath(path, sess_dir)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue  # segmento retirado/archivado
+        start = 0
+        prev = None if full else state.get(rel)
+        if prev:
+            inode, offset, mtime = prev
+            if inode == st.st_ino and st.st_size >= offset:
+                if st.st_size == offset and mtime == st.st_mtime:
+                    continue  # sin cambios
+                start = offset
+        if st.st_size > start:
+            out.append((path, rel, start, st.st_ino, st.st_mtime, st.st_size))
+    return out
+
+def read_new_records(path, start):
+    """
+    Lee desde `start` solo líneas completas (terminadas en '\\n').
+    Devuelve (records, end_offset); una línea a medio escribir se deja para la siguiente pasada.
+    """
+    records = []
+    end = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            end += len(raw)
+            line = raw.decode("utf-8").strip()
+            if line:
+                records.append(json.loads(line))
+    return records, end
+
+def iter_records(sess_dir=SESS_DIR):
+    # Lectura completa (sin checkpoint); se mantiene para scripts/diagnóstico
+    for path in sorted(glob.glob(os.path.join(sess_dir, "session_*.jsonl"))):
+        yield from read_new_records(path, 0)[0]
+
+def normalize_record(rec, rejected=None):
+    """
+    Filas (sesion_id, ccp, ejer, item, correcta, tr_ms, created_at) de un registro de sesión.
+    Una respuesta con correcta no reconocible se descarta (como la rechaza la API);
+    si se pasa la lista rejected, se anota en ella.
+    """
+    sesion_id = int(rec.get("sesion_id") or 0)
+    ts = float(rec.get("ts") or time.time())
+    created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+    for a in rec.get("answers", []):
+        ccp  = a.get("ccp_code", DEF_CCP)
+        ejer = a.get("ejer_code", DEF_EJER)
+        item = a.get("item_id", "demo_item_001")
+        try:
+            correcta = coerce_correcta(a.get("correcta", 0))
+        except ValueError:
+            if rejected is not None:
+                rejected.append((sesion_id, ejer, item))
+            continue
+        tr_ms = int(a.get("tr_ms", 0))
+        yield (sesion_id, ccp, ejer, item, correcta, tr_ms, created_at)
+
+UNIQUE_INDEX = "idx_tlt_resp_unique"
+
+# Dedupe de una sola vez: sesiones por transacción y clave de checkpoint en tlt_ingest_meta
+DEDUPE_CHUNK_SESSIONS = 200
+DEDUPE_CKPT_KEY = "dedupe_last_sesion_id"
+
+META_DDL = """
+    CREATE TABLE IF NOT EXISTS tlt_ingest_meta (
+        key   TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+
+def has_unique_index(cur):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=?;", (UNIQUE_INDEX,))
+    return cur.fetchone() is not None
+
+def _meta_get(cur, key):
+    cur.execute("SELECT value FROM tlt_ingest_meta WHERE key=?;", (key,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def _meta_set(cur, key, value):
+    if value is None:
+        cur.execute("DELETE FROM tlt_ingest_meta WHERE key=?;", (key,))
+    else:
+        cur.execute("INSERT OR REPLACE INTO tlt_ingest_meta (key, value) VALUES (?, ?);", (key, str(value)))
+
+def dedupe_chunked(con, chunk_sessions=DEDUPE_CHUNK_SESSIONS):
+    """
+    Elimina duplicados (sesion_id, ejer_code, item_id) conservando el MIN(rowid),
+    por tramos de sesion_id y con checkpoint: si se corta, la siguiente llamada
+    continúa donde se quedó. Devuelve las filas borradas.
+    """
+    cur = con.cursor()
+    cur.execute(META_DDL)
+    last = _meta_get(cur, DEDUPE_CKPT_KEY)
+    last = int(last) if last is not None else None
+    deleted = 0
+    while True:
+        if last is None:
+            cur.execute("SELECT DISTINCT sesion_id FROM tlt_respuesta ORDER BY sesion_id LIMIT ?;",
+                        (chunk_sessions,))
+        else:
+            cur.execute("SELECT DISTINCT sesion_id FROM tlt_respuesta WHERE sesion_id > ? "
+                        "ORDER BY sesion_id LIMIT ?;", (last, chunk_sessions))
+        ids = [r[0] for r in cur.fetchall()]
+        if not ids:
+            break
+        lo, hi = ids[0], ids[-1]
+        cur.execute("""
+            DELETE FROM tlt_respuesta
+             WHERE sesion_id BETWEEN ? AND ?
+               AND rowid NOT IN (
+                    SELECT MIN(rowid)
+                      FROM tlt_respuesta
+                     WHERE sesion_id BETWEEN ? AND ?
+                  GROUP BY sesion_id, ejer_code, item_id
+               );
+        """, (lo, hi, lo, hi))
+        deleted += max(cur.rowcount, 0)
+        last = hi
+        _meta_set(cur, DEDUPE_CKPT_KEY, last)
+        con.commit()
+    return deleted
+
+def migrate_unique_index(con, chunk_sessions=DEDUPE_CHUNK_SESSIONS, attempts=3):
+    """
+    Migración única: dedupe por tramos + CREATE UNIQUE INDEX.
+    Si el índice ya existe no hace nada (ni escanea la tabla).
+    Si entre el dedupe y la creación llegan duplicados nuevos, repite la pasada.
+    """
+    cur = con.cursor()
+    if has_unique_index(cur):
+        return {"index": "exists", "deleted": 0}
+    deleted = 0
+    for _ in range(attempts):
+        deleted += dedupe_chunked(con, chunk_sessions)
+        try:
+            cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_INDEX} "
+                        "ON tlt_respuesta (sesion_id, ejer_code, item_id);")
+            _meta_set(cur, DEDUPE_CKPT_KEY, None)
+            con.commit()
+            return {"index": "created", "deleted": deleted}
+        except sqlite3.IntegrityError:
+            con.rollback()
+            _meta_set(cur, DEDUPE_CKPT_KEY, None)  # nueva pasada completa
+            con.commit()
+    raise RuntimeError(f"no se pudo crear {UNIQUE_INDEX}: siguen entrando duplicados")
+
+def ensure_unique_index(con):
+    # Con el índice ya creado esto es una consulta a sqlite_master (no depende del tamaño de la tabla)
+    return migrate_unique_index(con)
+
+# Idempotente: inserta o actualiza el trío único (sesion_id, ejer_code, item_id).
+# Si los valores no cambian, el UPDATE no se aplica (sin escritura, mismo id/rowid).
+UPSERT_SQL = """
+    INSERT INTO tlt_respuesta
+        (sesion_id, ccp_code, ejer_code, item_id, correcta, tr_ms, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(sesion_id, ejer_code, item_id) DO UPDATE SET
+        ccp_code   = excluded.ccp_code,
+        correcta   = excluded.correcta,
+        tr_ms      = excluded.tr_ms,
+        created_at = excluded.created_at
+    WHERE tlt_respuesta.ccp_code   IS NOT excluded.ccp_code
+       OR tlt_respuesta.correcta   IS NOT excluded.correcta
+       OR tlt_respuesta.tr_ms      IS NOT excluded.tr_ms
+       OR tlt_respuesta.created_at IS NOT excluded.created_at;
+"""
+
+# Primera pasada del lote: solo las claves nuevas (rowcount = filas insertadas)
+INSERT_NEW_SQL = """
+    INSERT INTO tlt_respuesta
+        (sesion_id, ccp_code, ejer_code, item_id, correcta, tr_ms, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(sesion_id, ejer_code, item_id) DO NOTHING;
+"""
 
 def upsert_answer(cur, sesion_id, ccp, ejer, item, correcta, tr_ms, created_at):
-    # Idempotente: inserta o actualiza el trío único (sesion_id, ejer_code, item_id)
-    cur.execute("""
-        INSERT OR REPLACE INTO tlt_respuesta
-            (sesion_id, ccp_code, ejer_code, item_id, correcta, tr_ms, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?);
-    """, (sesion_id, ccp, ejer, item, correcta, tr_ms, created_at))
+    cur.execute(UPSERT_SQL, (sesion_id, ccp, ejer, item, correcta, tr_ms, created_at))
 
-def main():
-    if not os.path.exists(DB_PATH):
-        sys.exit(f"ERROR: no se encuentra DB: {DB_PATH}")
+def upsert_rows(cur, rows):
+    """
+    Aplica el lote; devuelve (insertadas, actualizadas) contadas por las propias
+    sentencias, sin mirar la tabla (otros escritores pueden añadir filas a la vez).
+    Dos pasadas en la misma transacción: INSERT ... DO NOTHING (claves nuevas) y
+    el UPSERT, que ya no cambia lo recién insertado y solo cuenta las
+    actualizaciones reales. rowcount = suma de changes() por sentencia: no incluye
+    lo que escriben los triggers (rollup, versión de datos, resumen).
+    """
+    if not rows:
+        return 0, 0
+    cur.executemany(INSERT_NEW_SQL, rows)
+    inserted = max(cur.rowcount, 0)
+    cur.executemany(UPSERT_SQL, rows)
+    return inserted, max(cur.rowcount, 0)
+
+def parse_file(task):
+    """
+    Etapa de parseo (se ejecuta en los procesos del pool).
+    task = (path, rel, start, inode, mtime) → (rel, inode, mtime, end, rows, nbytes, secs, rejected)
+    """
+    path, rel, start, inode, mtime = task
+    t0 = time.perf_counter()
+    records, end = read_new_records(path, start)
+    rejected = []
+    rows = [row for rec in records for row in normalize_record(rec, rejected)]
+    return rel, inode, mtime, end, rows, end - start, time.perf_counter() - t0, len(rejected)
 
-    con = sqlite3.connect(DB_PATH)
+def _summary(db_path, files, processed, inserted, updated, rejected):
+    """inserted / updated según upsert_rows; unchanged = lo demás; rejected = correcta inválida."""
+    return {
+        "files": len(files),
+        "processed": processed,
+        "rejected": rejected,
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": processed - inserted - updated,
+        "changes": inserted + updated,
+        "db": db_path,
+    }
+
+def _open(db_path):
+    con = sqlite3.connect(db_path)
     cur = con.cursor()
+    ensure_unique_index(con)
+    ensure_state_table(cur)
+    con.commit()
+    return con, cur
+
+def run(db_path=DB_PATH, sess_dir=SESS_DIR, full=False, progress=None):
+    """
+    Ingesta incremental: solo los bytes añadidos desde el último checkpoint de cada fichero.
+    progress(files_done, files_total, rows, bytes_done, bytes_total) se llama tras cada fichero.
+    """
+    con, cur = _open(db_path)
+
+    state = load_state(cur)
+    paths = discover_files(cur, state, sess_dir, full=full)
+
+    processed = inserted = updated = rejected = 0
+    files = pending_files(state, sess_dir, full=full, paths=paths)
+    bytes_total = sum(size - start for _p, _r, start, _i, _m, size in files)
+    bytes_done = 0
 
-    ensure_unique_index(cur)
+    for i, (path, rel, start, inode, mtime, _size) in enumerate(files, 1):
+        _rel, _ino, _mt, end, rows, n, _s, rej = parse_file((path, rel, start, inode, mtime))
+        rejected += rej
+        ins, upd = upsert_rows(cur, rows)
+        inserted += ins
+        updated += upd
+        processed += len(rows)
+        # Filas + checkpoint en la misma transacción: un corte no deja el fichero a medias
+        save_state(cur, rel, inode, end, mtime)
+        con.commit()
+        bytes_done += n
+        if progress:
+            progress(i, len(files), processed, bytes_done, bytes_total)
 
-    processed = 0
-    before = con.total_changes
+    summary = _summary(db_path, files, processed, inserted, updated, rejected)
+    con.close()
+    return summary
+
+def run_pipeline(db_path=DB_PATH, sess_dir=SESS_DIR, full=False, workers=2,
+                 batch_rows=PIPELINE_BATCH_ROWS):
+    """
+    Backfill masivo: un pool de procesos parsea/normaliza ficheros en paralelo
+    y este proceso (único escritor) aplica los lotes con executemany en
+    transacciones grandes. Los checkpoints de cada fichero se guardan en la
+    misma transacción que sus filas.
+    """
+    con, cur = _open(db_path)
+    # Durabilidad relajada solo para esta conexión: el checkpoint permite reanudar
+    cur.execute("PRAGMA synchronous=NORMAL;")
+
+    state = load_state(cur)
+    files = pending_files(state, sess_dir, full=full,
+                          paths=discover_files(cur, state, sess_dir, full=full))
+    tasks = deque((path, rel, start, inode, mtime) for path, rel, start, inode, mtime, _ in files)
 
-    for rec in iter_records():
-        sesion_id = int(rec.get("sesion_id") or 0)
-        ts = float(rec.get("ts") or time.time())
-        created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
-        for a in rec.get("answers", []):
-            ccp  = a.get("ccp_code", DEF_CCP)
-            ejer = a.get("ejer_code", DEF_EJER)
-            item = a.get("item_id", "demo_item_001")
-            correcta = int(a.get("correcta", 0))
-            tr_ms = int(a.get("tr_ms", 0))
-            upsert_answer(cur, sesion_id, ccp, ejer, item, correcta, tr_ms, created_at)
-            processed += 1
+    processed = nbytes = inserted = updated = rejected = 0
+    parse_secs = write_secs = 0.0
+    in_tx = 0
+    t0 = time.perf_counter()
 
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Ventana acotada de ficheros en vuelo: la memoria no crece con el backlog
+        window = deque()
+        while tasks or window:
+            while tasks and len(window) < workers * 2:
+                window.append(pool.submit(parse_file, tasks.popleft()))
+            rel, inode, mtime, end, rows, n, secs, rej = window.popleft().result()
+            parse_secs += secs
+            rejected += rej
+            nbytes += n
+
+            tw = time.perf_counter()
+            ins, upd = upsert_rows(cur, rows)
+            inserted += ins
+            updated += upd
+            save_state(cur, rel, inode, end, mtime)
+            in_tx += len(rows)
+            if in_tx >= batch_rows:
+                con.commit()
+                in_tx = 0
+            write_secs += time.perf_counter() - tw
+            processed += len(rows)
+
+    tw = time.perf_counter()
     con.commit()
-    after = con.total_changes
-    delta = after - before  # inserciones + reemplazos aplicados
+    write_secs += time.perf_counter() - tw
+    wall = time.perf_counter() - t0
+
+    summary = _summary(db_path, files, processed, inserted, updated, rejected)
     con.close()
+    return {
+        **summary,
+        "workers": workers,
+        "bytes": nbytes,
+        "wall_s": round(wall, 3),
+        # filas/s por etapa: parseo agregado del pool (CPU-s de los workers) y escritor
+        "parse_rows_s": round(processed / parse_secs, 1) if parse_secs else None,
+        "write_rows_s": round(processed / write_secs, 1) if write_secs else None,
+        "total_rows_s": round(processed / wall, 1) if wall else None,
+        "mb_s": round(nbytes / wall / 1e6, 2) if wall else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta JSONL de sesiones → tlt_respuesta")
+    parser.add_argument("--full", action="store_true", help="Ignora checkpoints y relee todos los ficheros")
+    parser.add_argument("--sessions-dir", default=SESS_DIR)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="N>0: parseo en paralelo con N procesos y un único escritor (backfills)")
+    parser.add_argument("--migrate-index", action="store_true",
+                        help="Solo ejecuta (o reanuda) el dedupe + índice único y termina")
+    parser.add_argument("--batch-rows", type=int, default=PIPELINE_BATCH_ROWS,
+                        help="Filas por transacción en modo --workers")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(DB_PATH):
+        sys.exit(f"ERROR: no se encuentra DB: {DB_PATH}")
+
+    if args.migrate_index:
+        with sqlite3.connect(DB_PATH) as con:
+            r = migrate_unique_index(con)
+        print(f"→ {UNIQUE_INDEX}: {r['index']}; duplicados eliminados: {r['deleted']}; DB: {DB_PATH}")
+        return
 
-    print(f"→ Procesadas {processed} respuestas; cambios aplicados: {delta}; DB: {DB_PATH}")
+    if args.workers > 0:
+        s = run_pipeline(DB_PATH, args.sessions_dir, full=args.full,
+                         workers=args.workers, batch_rows=args.batch_rows)
+    else:
+        s = run(DB_PATH, args.sessions_dir, full=args.full)
+    print(f"→ Ficheros con datos nuevos: {s['files']}; procesadas {s['processed']} respuestas; "
+          f"insertadas {s['inserted']}, actualizadas {s['updated']}, sin cambios {s['unchanged']}, "
+          f"descartadas {s['rejected']} (correcta no válida); "
+          f"DB: {s['db']}")
+    if args.workers > 0:
+        print(f"  workers={s['workers']} · parseo {s['parse_rows_s']} filas/s · "
+              f"escritura {s['write_rows_s']} filas/s · total {s['total_rows_s']} filas/s "
+              f"({s['mb_s']} MB/s, {s['wall_s']} s)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()